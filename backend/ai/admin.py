@@ -0,0 +1,41 @@
+from django.contrib import admin
+from .models import AIInteraction, CourseGenerationJob, TokenUsage, UsageRollup
+
+
+@admin.register(AIInteraction)
+class AIInteractionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'short_question', 'created_at')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    date_hierarchy = 'created_at'
+    ordering = ('-created_at',)
+    search_fields = ('question',)
+    show_full_result_count = False  # avoid COUNT(*) over the whole table
+
+    @admin.display(description='question')
+    def short_question(self, obj):
+        return obj.question[:80]
+
+
+@admin.register(TokenUsage)
+class TokenUsageAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'subject', 'endpoint', 'provider', 'prompt_tokens', 'completion_tokens', 'estimated')
+    list_filter = ('provider', 'endpoint')
+    raw_id_fields = ('user',)
+    date_hierarchy = 'created_at'
+    show_full_result_count = False
+
+
+@admin.register(UsageRollup)
+class UsageRollupAdmin(admin.ModelAdmin):
+    list_display = ('day', 'scope', 'key', 'prompt_tokens', 'completion_tokens', 'calls')
+    list_filter = ('scope', 'day')
+    search_fields = ('key',)
+
+
+@admin.register(CourseGenerationJob)
+class CourseGenerationJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'topic', 'status', 'stage', 'course', 'created_at')
+    list_filter = ('status',)
+    raw_id_fields = ('user', 'course')
+    search_fields = ('topic',)
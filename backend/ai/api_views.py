@@ -1,96 +1,133 @@
+"""AI assistant endpoints.
+
+These are native async views: while a provider call is in flight the request
+awaits on the event loop instead of holding a worker thread, so slow LLM
+responses do not starve the rest of the API when served under ASGI
+(``uvicorn config.asgi:application``). Database work (auth, rate limit,
+budget, usage rollups) runs through ``sync_to_async``. Under WSGI Django runs
+them in an event loop per request and they behave as before.
+"""
+import json
 import os
-import time
-from collections import defaultdict
-from rest_framework.views import APIView
-from rest_framework.response import Response
-from rest_framework import permissions
-from rest_framework.authentication import BaseAuthentication
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from users.authentication import OptionalJWTAuthentication
 from .models import AIInteraction
+from . import interaction_log
+from .prompts import PromptBuilder
+from .ratelimit import check_rate
+from .usage import check_budget, provider_within_budget, record_usage, usage_subject
 from .video_utils import generate_short_video
-from django.conf import settings
-from .llm_utils import (
-    get_openai_client,
-    chat_completion,
-    gemini_completion,
-    groq_completion,
-)
-
-# Simple in-memory rate limit (best-effort; resets on process restart)
-_RATE_STORE = defaultdict(list)  # key -> list[timestamps]
-_RATE_LIMIT_PER_MINUTE = int(os.getenv("AI_RATE_LIMIT_PER_MINUTE", "30"))
-
-
-def _rate_check(key: str):
-    now = time.time()
-    window_start = now - 60
-    entries = _RATE_STORE[key]
-    # prune old
-    while entries and entries[0] < window_start:
-        entries.pop(0)
-    if len(entries) >= _RATE_LIMIT_PER_MINUTE:
-        return False, len(entries)
-    entries.append(now)
-    return True, len(entries)
-
-
-class AIAssistantView(APIView):
+from .llm_utils import acomplete
+
+
+def _request_user(request):
+    user = getattr(request, "user", None)
+    return user if user is not None and user.is_authenticated else None
+
+
+def _request_data(request):
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    return request.POST
+
+
+def _preflight(request, scope):
+    """Authenticate from the bearer token (if any), then apply the rate limit
+    and the daily token budget. Returns a 429 response or None."""
+    # token-only identity, as before: session cookies do not identify AI callers
+    auth = OptionalJWTAuthentication().authenticate(request)
+    request.user = auth[0] if auth else AnonymousUser()
+    # Rate limit by IP and, when logged in, by user; then the daily token budget
+    return check_rate(request, scope) or check_budget(request)
+
+
+def _tutor_prompt(question, chunks):
+    return PromptBuilder(
+        system="You are a helpful tutor. Be concise and clear.",
+        user=question,
+        context=[f"[{c['title']}]\n{c['text']}" for c in chunks],
+        context_intro=(
+            "Ground your answer in the LearnX course excerpts below when they are relevant, "
+            "and say so when the question goes beyond them."
+        ),
+    )
+
+
+def _sources(chunks):
+    seen, out = set(), []
+    for c in chunks:
+        if c["lesson_id"] not in seen:
+            seen.add(c["lesson_id"])
+            out.append({"lesson_id": c["lesson_id"], "course_id": c["course_id"], "title": c["title"]})
+    return out
+
+
+def _retrieve(*args, **kwargs):
+    from .retrieval import retrieve  # NumPy is only needed once the tutor is asked something
+
+    return retrieve(*args, **kwargs)
+
+
+_apreflight = sync_to_async(_preflight)
+_aretrieve = sync_to_async(_retrieve)
+_aprovider_within_budget = sync_to_async(provider_within_budget)
+_arecord_usage = sync_to_async(record_usage)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AIAssistantView(View):
     """
     AI assistant endpoint.
-    POST {"question": "..."}
-    Returns {"answer": "..."}
+    POST {"question": "...", "course_id": optional, "lesson_id": optional}
+    Returns {"answer": "...", "sources": [...]}
+
+    With a course or lesson id the most relevant transcript chunks from that
+    scope are added to the system prompt (see ai/retrieval.py).
     """
-    permission_classes = [permissions.AllowAny]
-    authentication_classes: list[type[BaseAuthentication]] = []  # bypass JWT for public endpoint
+    http_method_names = ["post", "options"]
 
-    def post(self, request):
-        question = (request.data.get("question") or "").strip()
+    async def post(self, request):
+        data = _request_data(request)
+        if data is None:
+            return JsonResponse({"detail": "invalid JSON body"}, status=400)
+        question = (data.get("question") or "").strip()
         if not question:
-            return Response({"detail": "question is required"}, status=400)
+            return JsonResponse({"detail": "question is required"}, status=400)
 
-        # Rate limit by IP
-        ip = request.META.get("REMOTE_ADDR", "unknown")
-        allowed, count = _rate_check(f"ask:{ip}")
-        if not allowed:
-            return Response({"detail": "Rate limit exceeded. Please wait a minute."}, status=429)
+        try:
+            course_id = int(data["course_id"]) if data.get("course_id") not in (None, "") else None
+            lesson_id = int(data["lesson_id"]) if data.get("lesson_id") not in (None, "") else None
+        except (TypeError, ValueError):
+            return JsonResponse({"detail": "course_id and lesson_id must be integers"}, status=400)
 
-        messages = [
-            {"role": "system", "content": "You are a helpful tutor. Be concise and clear."},
-            {"role": "user", "content": question},
-        ]
-        
-        answer = None
-        usage = None
-        error = None
-        provider = "none"
+        limited = await _apreflight(request, "ask")
+        if limited:
+            return limited
+
+        chunks = []
+        if course_id is not None or lesson_id is not None:
+            try:
+                chunks = await _aretrieve(question, course_id=course_id, lesson_id=lesson_id)
+            except Exception:
+                chunks = []  # answer without context rather than fail
+
+        prompt = _tutor_prompt(question, chunks)
         
-        # Priority 1: Groq (Fastest/User Requested)
-        if not answer:
-            g_text, g_usage, g_error = groq_completion(messages, temperature=0.3, max_tokens=600)
-            if g_text:
-                provider = "groq"
-                answer, usage, error = g_text, g_usage, g_error
-            else:
-                error = g_error
-
-        # Priority 2: Gemini (User Requested)
-        if not answer:
-            g_text, g_usage, g_error = gemini_completion(messages, temperature=0.3, max_tokens=600)
-            if g_text:
-                provider = "gemini"
-                answer, usage, error = g_text, g_usage, g_error
-            else:
-                error = g_error
-
-        # Priority 3: OpenAI (Original)
-        if not answer:
-            client = get_openai_client()
-            if client:
-                o_text, o_usage, o_error = chat_completion(client, messages, temperature=0.3, max_tokens=600)
-                if o_text:
-                    provider = "openai"
-                    answer, usage, error = o_text, o_usage, o_error
-                else:
-                    error = o_error
+        answer, usage, error, provider = await acomplete(
+            prompt, temperature=0.3, max_tokens=600, allow=_aprovider_within_budget,
+        )
 
         # Final deterministic fallback
         if not answer:
@@ -107,23 +144,37 @@ class AIAssistantView(APIView):
                 f"Tip: Re-try in a minute for a richer AI-generated answer."
             )
 
-        # Persist interaction (best-effort)
+        # Token accounting (best-effort; never fail a successful answer)
+        if provider != "fallback":
+            try:
+                await _arecord_usage(
+                    subject=usage_subject(request), user=_request_user(request), endpoint="ask",
+                    provider=provider, messages=prompt.sent or prompt.build(), text=answer, usage=usage,
+                )
+            except Exception:
+                pass
+
+        # Persist interaction (best-effort, batched off the request path)
         try:
             meta = {"mode": "ask", "provider": provider}
+            if chunks:
+                meta["sources"] = [[c["lesson_id"], c["score"]] for c in chunks]
             if usage:
                 meta["usage"] = usage
             if error:
                 meta["error"] = error
-            AIInteraction.objects.create(
-                user=request.user if getattr(request, "user", None) and request.user.is_authenticated else None,
+            await interaction_log.alog(AIInteraction(
+                user=_request_user(request),
                 question=question,
                 response=answer,
                 metadata=meta,
-            )
+            ))
         except Exception:
             pass
 
         payload = {"answer": answer}
+        if chunks:
+            payload["sources"] = _sources(chunks)
         if getattr(settings, "DEBUG", False):
             payload["debug"] = {
                 "error": error,
@@ -132,31 +183,31 @@ class AIAssistantView(APIView):
                 "has_gemini_key": bool(os.getenv("GEMINI_API_KEY")),
                 "has_openai_key": bool(os.getenv("OPENAI_API_KEY")),
             }
-        return Response(payload)
+        return JsonResponse(payload)
 
 
-class AIGenerateLessonView(APIView):
+@method_decorator(csrf_exempt, name="dispatch")
+class AIGenerateLessonView(View):
     """
     Generate a lesson with transcript (and a demo video url placeholder).
     POST {"topic": "..."}
     Returns {title, transcript, video_url}
     """
-    permission_classes = [permissions.AllowAny]
-    authentication_classes: list[type[BaseAuthentication]] = []  # bypass JWT for public endpoint
+    http_method_names = ["post", "options"]
 
-    def post(self, request):
-        topic = (request.data.get("topic") or "").strip()
+    async def post(self, request):
+        data = _request_data(request)
+        if data is None:
+            return JsonResponse({"detail": "invalid JSON body"}, status=400)
+        topic = (data.get("topic") or "").strip()
         if not topic:
-            return Response({"detail": "topic is required"}, status=400)
+            return JsonResponse({"detail": "topic is required"}, status=400)
 
-        # Rate limit by IP
-        ip = request.META.get("REMOTE_ADDR", "unknown")
-        allowed, count = _rate_check(f"lesson:{ip}")
-        if not allowed:
-            return Response({"detail": "Rate limit exceeded. Please wait a minute."}, status=429)
+        limited = await _apreflight(request, "generate-lesson")
+        if limited:
+            return limited
 
         title = f"Introduction to {topic}"
-        transcript = None
         video_url = "https://samplelib.com/lib/preview/mp4/sample-5s.mp4"
 
         prompt = (
@@ -169,39 +220,9 @@ class AIGenerateLessonView(APIView):
             {"role": "user", "content": prompt},
         ]
         
-        transcript = None
-        usage = None
-        error = None
-        provider = "none"
-
-                # Priority 1: Groq
-        if not transcript:
-            g_text, g_usage, g_error = groq_completion(messages, temperature=0.4, max_tokens=900)
-            if g_text:
-                provider = "groq"
-                transcript, usage, error = g_text, g_usage, g_error
-            else:
-                error = g_error
-
-        # Priority 2: Gemini
-        if not transcript:
-            g_text, g_usage, g_error = gemini_completion(messages, temperature=0.4, max_tokens=900)
-            if g_text:
-                provider = "gemini"
-                transcript, usage, error = g_text, g_usage, g_error
-            else:
-                error = g_error
-
-        # Priority 3: OpenAI
-        if not transcript:
-            client = get_openai_client()
-            if client:
-                o_text, o_usage, o_error = chat_completion(client, messages, temperature=0.4, max_tokens=900)
-                if o_text:
-                    provider = "openai"
-                    transcript, usage, error = o_text, o_usage, o_error
-                else:
-                    error = o_error
+        transcript, usage, error, provider = await acomplete(
+            messages, temperature=0.4, max_tokens=900, allow=_aprovider_within_budget,
+        )
 
         # Final deterministic fallback
         if not transcript:
@@ -214,26 +235,37 @@ class AIGenerateLessonView(APIView):
                 f"4) Summary & Next Steps\n   - Recap the essentials and suggest what to try next."
             )
 
-        # Persist interaction (best-effort)
+        # Token accounting (best-effort; never fail a successful answer)
+        if provider != "fallback":
+            try:
+                await _arecord_usage(
+                    subject=usage_subject(request), user=_request_user(request), endpoint="generate-lesson",
+                    provider=provider, messages=messages, text=transcript, usage=usage,
+                )
+            except Exception:
+                pass
+
+        # Persist interaction (best-effort, batched off the request path)
         try:
             meta = {"title": title, "video_url": video_url, "mode": "generate_lesson", "provider": provider}
             if usage:
                 meta["usage"] = usage
             if error:
                 meta["error"] = error
-            AIInteraction.objects.create(
-                user=request.user if getattr(request, "user", None) and request.user.is_authenticated else None,
+            await interaction_log.alog(AIInteraction(
+                user=_request_user(request),
                 question=f"generate_lesson:{topic}",
                 response=transcript,
                 metadata=meta,
-            )
+            ))
         except Exception:
             pass
 
         # Attempt to generate a short video clip using transcript
         try:
             clip_text = f"{title}\n" + (transcript.strip().split("\n\n")[0] if transcript else "")
-            url, v_err = generate_short_video(clip_text or title, subfolder="ai_lessons", filename_prefix=title.replace(" ", "_")[:40], seconds=8)
+            # CPU-bound rendering; run it off the event loop without pinning the DB thread
+            url, v_err = await sync_to_async(generate_short_video, thread_sensitive=False)(clip_text or title, subfolder="ai_lessons", filename_prefix=title.replace(" ", "_")[:40], seconds=8)
             if url:
                 video_url = url
         except Exception:
@@ -252,4 +284,4 @@ class AIGenerateLessonView(APIView):
                 "has_groq_key": bool(os.getenv("GROQ_API_KEY")),
                 "has_gemini_key": bool(os.getenv("GEMINI_API_KEY")),
             }
-        return Response(payload)
+        return JsonResponse(payload)
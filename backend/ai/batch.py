@@ -0,0 +1,128 @@
+"""Concurrent batch generation for management commands.
+
+``generate_many`` runs up to ``concurrency`` provider calls at once. Each
+provider is paced by its own ``AsyncRateLimiter`` (AI_PROVIDER_RPM), so
+throughput follows what the provider allows rather than a fixed sleep.
+Results are appended to a JSONL checkpoint as they arrive. After a crash,
+finished work is reloaded from the file instead of being requested again.
+"""
+import asyncio
+import json
+import time
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .llm_utils import acomplete
+from .usage import provider_within_budget, record_usage
+
+
+class AsyncRateLimiter:
+    """Spaces acquisitions evenly at ``rate`` per ``per`` seconds."""
+
+    def __init__(self, rate, per=60.0):
+        self.interval = per / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class Checkpoint:
+    """Append-only JSONL log of ``{"id", "text"}`` / ``{"id", "error"}`` records."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._fh = None
+
+    def load(self):
+        done, failed = {}, set()
+        if self.path.exists():
+            with self.path.open(encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:  # torn final line from a crash
+                        continue
+                    if rec.get("text"):
+                        done[rec["id"]] = rec["text"]
+                        failed.discard(rec["id"])
+                    else:
+                        failed.add(rec["id"])
+        return done, failed
+
+    def write(self, rec):
+        if self._fh is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = self.path.open("a", encoding="utf-8")
+            if self._fh.tell() and not self._ends_with_newline():
+                self._fh.write("\n")  # start fresh after a torn final line
+        self._fh.write(json.dumps(rec) + "\n")
+        self._fh.flush()
+
+    def _ends_with_newline(self):
+        with self.path.open("rb") as fh:
+            fh.seek(-1, 2)
+            return fh.read(1) == b"\n"
+
+    def close(self, remove=False):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        if remove and self.path.exists():
+            self.path.unlink()
+
+
+def provider_limiters():
+    return {name: AsyncRateLimiter(rpm) for name, rpm in settings.AI_PROVIDER_RPM.items()}
+
+
+async def generate_many(items, build_messages, *, concurrency=8, temperature=0.4, max_tokens=1000,
+                        endpoint="batch", on_result=None):
+    """Complete ``build_messages(item)`` for every ``(id, item)`` in ``items``.
+
+    ``on_result(id, text, error)`` is called as each finishes (text is None on
+    failure). Returns the number of successful completions.
+    """
+    limiters = provider_limiters()
+    budget_ok = sync_to_async(provider_within_budget)
+    record = sync_to_async(record_usage)
+    sem = asyncio.Semaphore(concurrency)
+
+    async def allow(name):
+        if not await budget_ok(name):
+            return False
+        limiter = limiters.get(name)
+        if limiter:
+            await limiter.acquire()
+        return True
+
+    async def run(key, item):
+        messages = build_messages(item)
+        async with sem:
+            text, usage, error, provider = await acomplete(
+                messages, temperature=temperature, max_tokens=max_tokens, allow=allow,
+            )
+        if text:
+            try:
+                await record(
+                    subject=f"command:{endpoint}", user=None, endpoint=endpoint,
+                    provider=provider, messages=messages, text=text, usage=usage,
+                )
+            except Exception:
+                pass
+        if on_result:
+            await on_result(key, text, error)
+        return bool(text)
+
+    results = await asyncio.gather(*(run(key, item) for key, item in items))
+    return sum(results)
@@ -0,0 +1,62 @@
+"""Non-blocking, batched writes for AI interaction and usage-ledger rows.
+
+Views hand unsaved model instances to ``log()``; a daemon thread drains the
+queue and inserts them with ``bulk_create`` every AI_LOG_FLUSH_SECONDS or
+AI_LOG_BATCH_SIZE rows, whichever comes first (config.batching). When the
+queue is full rows are dropped and counted rather than blocking the request.
+Set AI_LOG_ASYNC=False to write synchronously (management commands, debugging).
+"""
+import atexit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from config.batching import BatchWriter
+from config.metrics import REGISTRY
+
+WRITTEN = REGISTRY.counter("ai_log_written_total", "Interaction log rows written", labels=("model",))
+
+
+class _LogWriter(BatchWriter):
+    def _write(self, batch):
+        by_model = {}
+        for obj in batch:
+            by_model.setdefault(type(obj), []).append(obj)
+        close_old_connections()
+        for model, objs in by_model.items():
+            try:
+                model.objects.bulk_create(objs, batch_size=self.batch_size)
+                WRITTEN.inc(model.__name__, amount=len(objs))
+                self.written(len(objs))
+            except Exception:
+                self.dropped(len(objs))
+        close_old_connections()
+
+
+_writer = _LogWriter(
+    batch_size=int(getattr(settings, "AI_LOG_BATCH_SIZE", 200)),
+    flush_seconds=float(getattr(settings, "AI_LOG_FLUSH_SECONDS", 1.0)),
+    name="ai-log-writer",
+)
+atexit.register(_writer.flush)
+
+
+def log(obj):
+    """Queue an unsaved model instance for insertion."""
+    if getattr(settings, "AI_LOG_ASYNC", True):
+        _writer.submit(obj)
+    else:
+        obj.save()
+
+
+async def alog(obj):
+    """log() for async views; only the synchronous fallback needs a thread."""
+    if getattr(settings, "AI_LOG_ASYNC", True):
+        _writer.submit(obj)
+    else:
+        await sync_to_async(obj.save)()
+
+
+def flush():
+    _writer.flush()
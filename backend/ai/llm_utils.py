@@ -1,29 +1,31 @@
 import os
-import time
-from collections import defaultdict
+import asyncio
+from functools import lru_cache
 
-try:  # Prefer the new SDK if available
-    from openai import OpenAI  # type: ignore
-    _OPENAI_SDK = "new"
-except Exception:  # pragma: no cover - environment dependent
-    import openai  # type: ignore
-    _OPENAI_SDK = "legacy"
+from django.conf import settings
 
-# Optional Gemini support
-try:  # pragma: no cover - env dependent
-    import google.generativeai as genai  # type: ignore
-    _GEMINI_AVAILABLE = True
-except Exception:  # pragma: no cover
-    _GEMINI_AVAILABLE = False
+from . import providers
+from .prompts import prepare
+
+
+# SDKs are imported on first call (ai/providers.py), not when this module loads
+def _openai_sdk():
+    """"new" (client classes), "legacy" (module-level API) or None when not installed."""
+    openai = providers.sdk("openai")
+    if openai is None:
+        return None
+    return "new" if hasattr(openai, "OpenAI") else "legacy"
 
 
 def get_openai_client():
     """Return an OpenAI client/module or None if no API key configured."""
     api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
+    flavour = _openai_sdk() if api_key else None
+    if flavour is None:
         return None
-    if _OPENAI_SDK == "new":
-        return OpenAI(api_key=api_key)
+    openai = providers.sdk("openai")
+    if flavour == "new":
+        return openai.OpenAI(api_key=api_key)
     # legacy doesn't create a client instance; return module
     openai.api_key = api_key  # type: ignore
     return openai
@@ -47,7 +49,7 @@ def chat_completion(client, messages, *, temperature=0.3, max_tokens=600, model:
         return None, None, "no_client"
     chosen_model = resolve_model(model)
     try:
-        if _OPENAI_SDK == "new":
+        if _openai_sdk() == "new":
             resp = client.chat.completions.create(
                 model=chosen_model,
                 messages=messages,
@@ -83,27 +85,15 @@ def gemini_completion(messages, *, temperature=0.3, max_tokens=600, model: str |
     Returns (content:str|None, usage:dict|None, error:str|None)
     """
     api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GEMNIUS_API_KEY")
-    if not (_GEMINI_AVAILABLE and api_key):
+    genai = providers.sdk("gemini") if api_key else None
+    if genai is None:
         return None, None, "gemini_unavailable"
     try:
         genai.configure(api_key=api_key)
         # Use user-preferred model or default to a known working one (2.0-flash or 1.5-flash)
         model_name = model or os.getenv("GEMINI_MODEL") or "gemini-2.0-flash"
-        # Flatten chat into a single prompt for simplicity
-        parts = []
-        for m in messages:
-            role = m.get("role")
-            content = m.get("content")
-            if not content:
-                continue
-            if role == "system":
-                parts.append(f"System: {content}")
-            elif role == "user":
-                parts.append(f"User: {content}")
-            else:
-                parts.append(str(content))
-        prompt = "\n".join(parts)
-        
+        prompt = _gemini_prompt(messages)
+
         # Handle model fallback if 2.0 isn't found
         try:
             model_obj = genai.GenerativeModel(model_name)
@@ -119,14 +109,8 @@ def gemini_completion(messages, *, temperature=0.3, max_tokens=600, model: str |
                 "max_output_tokens": int(max_tokens),
             })
 
-        text = (getattr(resp, "text", None) or "").strip()
-        if not text and getattr(resp, "candidates", None):
-            try:
-                text = resp.candidates[0].content.parts[0].text  # type: ignore
-            except Exception:
-                text = ""
-        usage = None
-        return (text or None), usage, None
+        text = _gemini_text(resp)
+        return (text or None), _gemini_usage(resp), None
     except Exception as e:  # pragma: no cover
         return None, None, str(e)
 
@@ -139,8 +123,8 @@ def groq_completion(messages, *, temperature=0.3, max_tokens=600, model: str | N
     
     try:
         # Use OpenAI client but pointing to Groq
-        if _OPENAI_SDK == "new":
-            client = OpenAI(api_key=api_key, base_url="https://api.groq.com/openai/v1")
+        if _openai_sdk() == "new":
+            client = providers.sdk("openai").OpenAI(api_key=api_key, base_url="https://api.groq.com/openai/v1")
             chosen_model = model or "llama3-70b-8192"
             resp = client.chat.completions.create(
                 model=chosen_model,
@@ -163,3 +147,194 @@ def groq_completion(messages, *, temperature=0.3, max_tokens=600, model: str | N
             return None, None, "groq_requires_new_openai_sdk"
     except Exception as e:
         return None, None, str(e)
+
+
+def _gemini_prompt(messages):
+    # Flatten chat into a single prompt for simplicity
+    parts = []
+    for m in messages:
+        role = m.get("role")
+        content = m.get("content")
+        if not content:
+            continue
+        if role == "system":
+            parts.append(f"System: {content}")
+        elif role == "user":
+            parts.append(f"User: {content}")
+        else:
+            parts.append(str(content))
+    return "\n".join(parts)
+
+
+def _gemini_text(resp):
+    text = (getattr(resp, "text", None) or "").strip()
+    if not text and getattr(resp, "candidates", None):
+        try:
+            text = resp.candidates[0].content.parts[0].text  # type: ignore
+        except Exception:
+            text = ""
+    return text
+
+
+def _gemini_usage(resp):
+    meta = getattr(resp, "usage_metadata", None)
+    if not meta:
+        return None
+    return {
+        "prompt_tokens": getattr(meta, "prompt_token_count", None),
+        "completion_tokens": getattr(meta, "candidates_token_count", None),
+        "total_tokens": getattr(meta, "total_token_count", None),
+    }
+
+
+def _openai_usage(resp):
+    usage = getattr(resp, "usage", None)
+    if not usage:
+        return None
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+        "total_tokens": getattr(usage, "total_tokens", None),
+    }
+
+
+# ------------------------------------------------------------------------------
+# Async clients: one pooled AsyncOpenAI client per (key, base_url) so many
+# in-flight requests share connections instead of each holding a thread.
+# ------------------------------------------------------------------------------
+@lru_cache(maxsize=8)
+def _async_openai_client(api_key, base_url=None):
+    return providers.sdk("openai").AsyncOpenAI(api_key=api_key, base_url=base_url)
+
+
+async def achat_completion(messages, *, temperature=0.3, max_tokens=600, model: str | None = None):
+    """Async OpenAI chat completion. Returns (content, usage, error)."""
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return None, None, "no_client"
+    if _openai_sdk() != "new":
+        return None, None, "async_requires_new_openai_sdk"
+    try:
+        resp = await _async_openai_client(api_key).chat.completions.create(
+            model=resolve_model(model),
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+        return (resp.choices[0].message.content or "").strip(), _openai_usage(resp), None
+    except Exception as e:  # pragma: no cover
+        return None, None, str(e)
+
+
+async def agroq_completion(messages, *, temperature=0.3, max_tokens=600, model: str | None = None):
+    """Async Groq completion (OpenAI-compatible API)."""
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        return None, None, "groq_unavailable"
+    if _openai_sdk() != "new":
+        return None, None, "groq_requires_new_openai_sdk"
+    try:
+        client = _async_openai_client(api_key, "https://api.groq.com/openai/v1")
+        resp = await client.chat.completions.create(
+            model=model or "llama3-70b-8192",
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+        return (resp.choices[0].message.content or "").strip(), _openai_usage(resp), None
+    except Exception as e:
+        return None, None, str(e)
+
+
+async def agemini_completion(messages, *, temperature=0.3, max_tokens=600, model: str | None = None):
+    """Async Gemini completion."""
+    api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GEMNIUS_API_KEY")
+    genai = providers.sdk("gemini") if api_key else None
+    if genai is None:
+        return None, None, "gemini_unavailable"
+    try:
+        genai.configure(api_key=api_key)
+        config = {"temperature": float(temperature), "max_output_tokens": int(max_tokens)}
+        prompt = _gemini_prompt(messages)
+        try:
+            model_obj = genai.GenerativeModel(model or os.getenv("GEMINI_MODEL") or "gemini-2.0-flash")
+            resp = await model_obj.generate_content_async(prompt, generation_config=config)
+        except Exception:
+            model_obj = genai.GenerativeModel("gemini-1.5-flash")
+            resp = await model_obj.generate_content_async(prompt, generation_config=config)
+        text = _gemini_text(resp)
+        return (text or None), _gemini_usage(resp), None
+    except Exception as e:  # pragma: no cover
+        return None, None, str(e)
+
+
+# ------------------------------------------------------------------------------
+# Provider chain: Groq -> Gemini -> OpenAI. ``allow(name)`` lets callers skip
+# providers (e.g. over budget). ``messages`` is a message list or an
+# ai.prompts.PromptBuilder; either way it is fitted to each provider's prompt
+# token budget before the call. Returns (text, usage, error, provider).
+# AI_SIMULATED_LATENCY_MS > 0 replaces the chain with a canned answer after a
+# sleep; it exists for load tests only.
+# ------------------------------------------------------------------------------
+def _chain_model(name):
+    if name == "groq":
+        return "llama3-70b-8192"
+    if name == "gemini":
+        return os.getenv("GEMINI_MODEL") or "gemini-2.0-flash"
+    return resolve_model(None)
+
+
+def provider_configured(name):
+    return providers.configured(name)
+
+
+def _simulated(messages):
+    question = messages[-1].get("content", "") if messages else ""
+    return f"Simulated answer for: {question[:200]}", None, None, "simulated"
+
+
+def complete(messages, *, temperature=0.3, max_tokens=600, allow=None):
+    delay = getattr(settings, "AI_SIMULATED_LATENCY_MS", 0)
+    if delay:
+        import time
+        time.sleep(delay / 1000)
+        return _simulated(prepare(messages))
+    error = None
+    for name, fn in (("groq", groq_completion), ("gemini", gemini_completion), ("openai", None)):
+        if not provider_configured(name):
+            error = error or f"{name}_unavailable"
+            continue
+        if allow and not allow(name):
+            continue
+        sent = prepare(messages, name, _chain_model(name))
+        if fn is None:
+            client = get_openai_client()
+            if not client:
+                continue
+            text, usage, err = chat_completion(client, sent, temperature=temperature, max_tokens=max_tokens)
+        else:
+            text, usage, err = fn(sent, temperature=temperature, max_tokens=max_tokens)
+        if text:
+            return text, usage, err, name
+        error = err
+    return None, None, error, "none"
+
+
+async def acomplete(messages, *, temperature=0.3, max_tokens=600, allow=None):
+    delay = getattr(settings, "AI_SIMULATED_LATENCY_MS", 0)
+    if delay:
+        await asyncio.sleep(delay / 1000)
+        return _simulated(prepare(messages))
+    error = None
+    for name, fn in (("groq", agroq_completion), ("gemini", agemini_completion), ("openai", achat_completion)):
+        if not provider_configured(name):
+            error = error or f"{name}_unavailable"
+            continue
+        if allow and not await allow(name):
+            continue
+        sent = prepare(messages, name, _chain_model(name))
+        text, usage, err = await fn(sent, temperature=temperature, max_tokens=max_tokens)
+        if text:
+            return text, usage, err, name
+        error = err
+    return None, None, error, "none"
@@ -0,0 +1,61 @@
+import gzip
+import json
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from ai.models import AIInteraction, TokenUsage
+
+
+class Command(BaseCommand):
+    help = (
+        "Archive AI interactions and token-usage ledger rows older than the retention window to "
+        "gzip-compressed NDJSON files (one per month), then delete them in chunks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.AI_INTERACTION_RETENTION_DAYS,
+                            help="Keep rows newer than this many days")
+        parser.add_argument("--dir", default=str(settings.AI_ARCHIVE_DIR), help="Archive directory")
+        parser.add_argument("--chunk", type=int, default=5000, help="Rows per read/delete chunk")
+        parser.add_argument("--dry-run", action="store_true", help="Only report how many rows would be archived")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        out_dir = Path(options["dir"])
+        out_dir.mkdir(parents=True, exist_ok=True)
+        for prefix, model in (("ai_interactions", AIInteraction), ("token_usage", TokenUsage)):
+            qs = model.objects.filter(created_at__lt=cutoff)
+            if options["dry_run"]:
+                self.stdout.write(f"{model.__name__}: {qs.count()} rows older than {cutoff:%Y-%m-%d}")
+                continue
+            total = self._archive(qs, out_dir, prefix, options["chunk"])
+            self.stdout.write(self.style.SUCCESS(f"{model.__name__}: archived and deleted {total} rows"))
+
+    def _archive(self, qs, out_dir, prefix, chunk):
+        fields = [f.attname for f in qs.model._meta.concrete_fields]
+        total = 0
+        last_id = 0
+        while True:
+            rows = list(qs.filter(id__gt=last_id).order_by("id").values(*fields)[:chunk])
+            if not rows:
+                return total
+            by_month = {}
+            for row in rows:
+                by_month.setdefault(row["created_at"].strftime("%Y-%m"), []).append(row)
+            # append a gzip member per chunk; readers see one concatenated stream
+            for month, month_rows in by_month.items():
+                with gzip.open(out_dir / f"{prefix}_{month}.ndjson.gz", "at", encoding="utf-8") as fh:
+                    for row in month_rows:
+                        fh.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n")
+            ids = [row["id"] for row in rows]
+            # delete only after the chunk is safely on disk
+            with transaction.atomic():
+                qs.model.objects.filter(id__in=ids).delete()
+            total += len(ids)
+            last_id = ids[-1]
@@ -0,0 +1,76 @@
+import asyncio
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient
+from django.test.utils import override_settings
+
+from courses.management.commands.bench_endpoints import _percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the async AI endpoints through the ASGI handler with simulated provider latency and "
+        "report catalog latency with and without AI requests in flight."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=50, help="AI requests in flight at once")
+        parser.add_argument("--latency-ms", type=int, default=2000, help="Simulated provider latency")
+        parser.add_argument("--probes", type=int, default=50, help="Catalog requests per phase")
+
+    def handle(self, *args, **options):
+        limits = {scope: {"window": 60, "per_ip": 10**9, "per_user": 10**9} for scope in ("ask", "generate-lesson")}
+        with override_settings(
+            AI_SIMULATED_LATENCY_MS=options["latency_ms"],
+            AI_RATE_LIMITS=limits,
+            AI_DAILY_TOKEN_BUDGET_PER_USER=0,
+            ALLOWED_HOSTS=["testserver"],
+        ):
+            asyncio.run(self._run(options))
+
+    async def _probe(self, client, count):
+        timings = []
+        for _ in range(count):
+            start = time.perf_counter()
+            resp = await client.get("/api/courses/")
+            timings.append(time.perf_counter() - start)
+            if resp.status_code != 200:
+                self.stderr.write(f"catalog returned {resp.status_code}")
+        return sorted(timings)
+
+    async def _ask(self, client, i):
+        start = time.perf_counter()
+        resp = await client.post(
+            "/api/ai/ask/", {"question": f"Explain topic {i}"}, content_type="application/json",
+        )
+        return resp.status_code, time.perf_counter() - start
+
+    def _report(self, label, timings):
+        self.stdout.write(
+            f"{label:<24} p50 {_percentile(timings, 50) * 1000:8.1f}ms  "
+            f"p95 {_percentile(timings, 95) * 1000:8.1f}ms  mean {statistics.mean(timings) * 1000:8.1f}ms"
+        )
+
+    async def _run(self, options):
+        client = AsyncClient()
+        await self._probe(client, 5)  # warm up
+        self._report("catalog idle", await self._probe(client, options["probes"]))
+
+        started = time.perf_counter()
+        ai = asyncio.gather(*(self._ask(client, i) for i in range(options["concurrency"])))
+        await asyncio.sleep(0.05)  # let the AI requests reach the provider await
+        loaded = await self._probe(client, options["probes"])
+        results = await ai
+        wall = time.perf_counter() - started
+        self._report(f"catalog + {options['concurrency']} AI", loaded)
+
+        ok = sum(1 for status, _ in results if status == 200)
+        ai_times = sorted(t for _, t in results)
+        self._report("ai requests", ai_times)
+        serial = options["concurrency"] * options["latency_ms"] / 1000
+        self.stdout.write(
+            f"{ok}/{len(results)} AI requests succeeded in {wall:.2f}s wall time "
+            f"(one thread per request serially would need {serial:.1f}s)"
+        )
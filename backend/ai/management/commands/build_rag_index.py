@@ -0,0 +1,59 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from ai import retrieval
+from courses import content_store
+from courses.management.commands.bench_endpoints import _percentile
+from courses.models import Lesson
+
+
+class Command(BaseCommand):
+    help = (
+        "Build or incrementally update the tutor's retrieval index over lesson transcripts/content. "
+        "Only lessons whose text changed since the last run are re-embedded."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="Discard the index and embed everything")
+        parser.add_argument("--bench", type=int, default=0, help="Run N random searches and report latency")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        lessons = (
+            (lesson.id, lesson.course_id, lesson.transcript, lesson.content)
+            for lesson in content_store.iter_with_texts(
+                Lesson.objects.order_by("id").only("id", "course_id", "transcript_blob", "content_blob"),
+            )
+        )
+        stats = retrieval.update_index(lessons, rebuild=options["rebuild"], log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['changed']} lessons re-embedded ({stats['chunks_added']} chunks), {stats['removed']} removed; "
+            f"{stats['live']}/{stats['rows']} live rows, generation {stats['generation']}, "
+            f"{time.perf_counter() - started:.2f}s"
+        ))
+        if options["bench"]:
+            self._bench(options["bench"])
+
+    def _bench(self, count):
+        index = retrieval.get_index()
+        if index is None or not index.live.any():
+            self.stdout.write("Index is empty; nothing to benchmark.")
+            return
+        words = ["introduction", "example", "function", "data", "model", "loop", "design", "network", "basics"]
+        course_ids = sorted(set(index.course_ids[index.live].tolist()))
+        rng = random.Random(1)
+        for label, scope in (("all lessons", None), ("one course", "course")):
+            timings = []
+            for _ in range(count):
+                query = " ".join(rng.sample(words, 3))
+                course_id = rng.choice(course_ids) if scope else None
+                start = time.perf_counter()
+                retrieval.search(query, course_id=course_id)
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            self.stdout.write(
+                f"search {label:<12} over {int(index.live.sum())} chunks: "
+                f"p50 {_percentile(timings, 50) * 1000:.2f}ms  p95 {_percentile(timings, 95) * 1000:.2f}ms"
+            )
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ai.models import CourseGenerationJob
+from ai.pipeline import STAGES, CoursePipeline
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a full course (outline, lesson transcripts, Course/Lesson rows, lesson videos) from a topic. "
+        "Re-running with the same topic resumes the unfinished job."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("topic", nargs="?")
+        parser.add_argument("--lessons", type=int, default=6)
+        parser.add_argument("--concurrency", type=int, default=8, help="Transcript calls in flight at once")
+        parser.add_argument("--no-videos", action="store_true", help="Leave video rendering to generate_content")
+        parser.add_argument("--video-workers", type=int, default=2)
+        parser.add_argument("--job", type=int, help="Resume this job id")
+        parser.add_argument("--new", action="store_true", help="Start a new job even if one exists for the topic")
+
+    def handle(self, *args, **options):
+        job = self._get_job(options)
+        if job.status == CourseGenerationJob.STATUS_DONE:
+            self.stdout.write(f"Job {job.id} already finished: course {job.course_id}. Use --new to generate again.")
+            return
+        self.stdout.write(f"Job {job.id}: {job.topic}")
+        pipeline = CoursePipeline(
+            job,
+            lessons=options["lessons"],
+            concurrency=options["concurrency"],
+            render_videos=not options["no_videos"],
+            video_workers=options["video_workers"],
+            log=self.stdout.write,
+        )
+        try:
+            pipeline.run()
+        except Exception as e:
+            self._report(job)
+            raise CommandError(f"Job {job.id} failed at {job.stage}: {e}. Re-run to resume.")
+        self._report(job)
+        self.stdout.write(self.style.SUCCESS(f"Course {job.course_id} created: {job.outline['title']}"))
+
+    def _get_job(self, options):
+        if options["job"]:
+            job = CourseGenerationJob.objects.filter(pk=options["job"]).first()
+            if not job:
+                raise CommandError(f"No job {options['job']}")
+            return job
+        topic = (options["topic"] or "").strip()
+        if not topic:
+            raise CommandError("Give a topic or --job ID")
+        if not options["new"]:
+            job = CourseGenerationJob.objects.filter(topic=topic).order_by("-id").first()
+            if job:
+                return job
+        return CourseGenerationJob.objects.create(topic=topic)
+
+    def _report(self, job):
+        total = sum(job.timings.values())
+        for stage in STAGES:
+            if stage in job.timings:
+                secs = job.timings[stage]
+                share = secs / total * 100 if total else 0
+                self.stdout.write(f"  {stage:<12} {secs:8.2f}s  {share:5.1f}%")
+        self.stdout.write(f"  {'total':<12} {total:8.2f}s")
@@ -8,3 +8,83 @@ class AIInteraction(models.Model):
     response = models.TextField()
     metadata = models.JSONField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="aiinteraction_user_created_idx"),
+            # admin date drill-down / ordering and retention scans
+            models.Index(fields=["-created_at"], name="aiinteraction_created_idx"),
+        ]
+
+
+class TokenUsage(models.Model):
+    """One row per provider call (the ledger)."""
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    subject = models.CharField(max_length=64)  # "user:<id>" or "ip:<addr>"
+    endpoint = models.CharField(max_length=32)
+    provider = models.CharField(max_length=32)
+    prompt_tokens = models.PositiveIntegerField(default=0)
+    completion_tokens = models.PositiveIntegerField(default=0)
+    estimated = models.BooleanField(default=False)  # True when counted locally
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at"], name="tokenusage_created_idx"),
+        ]
+
+
+class UsageRollup(models.Model):
+    """Daily token totals per subject ("user:..."/"ip:...") or per provider."""
+    SCOPE_SUBJECT = "subject"
+    SCOPE_PROVIDER = "provider"
+
+    scope = models.CharField(max_length=16)
+    key = models.CharField(max_length=64)
+    day = models.DateField()
+    prompt_tokens = models.BigIntegerField(default=0)
+    completion_tokens = models.BigIntegerField(default=0)
+    calls = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("scope", "key", "day")
+
+    @property
+    def total_tokens(self):
+        return self.prompt_tokens + self.completion_tokens
+
+
+class CourseGenerationJob(models.Model):
+    """State of one topic -> course pipeline run (see ai/pipeline.py).
+
+    Each stage stores its output here before the next starts, so an
+    interrupted run resumes at the first unfinished stage.
+    """
+    STATUS_RUNNING = "running"
+    STATUS_FAILED = "failed"
+    STATUS_DONE = "done"
+    STATUS_CHOICES = (
+        (STATUS_RUNNING, "Running"),
+        (STATUS_FAILED, "Failed"),
+        (STATUS_DONE, "Done"),
+    )
+
+    topic = models.CharField(max_length=200)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    stage = models.CharField(max_length=32, blank=True, default="")
+    outline = models.JSONField(null=True, blank=True)
+    transcripts = models.JSONField(default=dict, blank=True)  # lesson index -> text
+    course = models.ForeignKey(Course, on_delete=models.SET_NULL, null=True, blank=True)
+    timings = models.JSONField(default=dict, blank=True)  # stage -> seconds
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["topic", "status"], name="coursegenjob_topic_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} ({self.status})"
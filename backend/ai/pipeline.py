@@ -0,0 +1,226 @@
+"""Topic -> course generation pipeline.
+
+Stages run in order and each one records its output on the
+CourseGenerationJob before the next starts:
+
+    outline      one LLM call that plans the course title, description and lesson titles
+    transcripts  every lesson transcript, generated concurrently (ai.batch)
+    persist      Course + Lesson rows in one transaction (bulk_create)
+    videos       lesson videos rendered in a process pool
+
+A stage whose output already exists is skipped, so re-running a failed or
+interrupted job picks up where it stopped. Lessons whose transcript or video
+could not be generated fail the job with the reasons in ``job.error``; the
+re-run retries only those. Wall time per stage is kept in
+``job.timings``.
+"""
+import asyncio
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Q
+
+from courses import cache as course_cache
+from courses import content_store
+from courses.models import Course, Lesson
+from .batch import generate_many
+from .llm_utils import complete
+from .models import CourseGenerationJob
+from .usage import provider_within_budget
+
+STAGES = ("outline", "transcripts", "persist", "videos")
+LEVELS = {value for value, _ in Course.LEVEL_CHOICES}
+
+
+def _outline_messages(topic, lessons):
+    prompt = (
+        f"Plan a beginner-friendly online course about: {topic}. "
+        f"Respond with JSON only, no prose, in the form "
+        '{"title": str, "description": str, "category": str, "level": "beginner"|"intermediate"|"advanced", '
+        '"lessons": [{"title": str, "summary": str}]} '
+        f"with exactly {lessons} lessons in teaching order."
+    )
+    return [
+        {"role": "system", "content": "You are an expert curriculum designer."},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _parse_outline(text, topic, lessons):
+    """Best-effort JSON extraction; falls back to a generic outline."""
+    data = {}
+    if text and "{" in text:
+        try:
+            data = json.loads(text[text.index("{"): text.rindex("}") + 1])
+        except ValueError:
+            data = {}
+    items = [
+        {"title": str(item.get("title"))[:200], "summary": str(item.get("summary") or "")}
+        for item in (data.get("lessons") or []) if isinstance(item, dict) and item.get("title")
+    ][:lessons]
+    if not items:
+        generic = ["Overview", "Key Concepts", "Core Techniques", "Worked Examples", "Common Pitfalls", "Next Steps"]
+        items = [{"title": f"{topic}: {generic[i % len(generic)]}", "summary": ""} for i in range(lessons)]
+    level = data.get("level") if data.get("level") in LEVELS else "beginner"
+    return {
+        "title": str(data.get("title") or f"Introduction to {topic}")[:200],
+        "description": str(data.get("description") or f"An AI-generated course on {topic}."),
+        "category": str(data.get("category") or "")[:100],
+        "level": level,
+        "lessons": items,
+    }
+
+
+def _lesson_messages(args):
+    course_title, lesson = args
+    prompt = (
+        f"Create a structured mini-lesson titled \"{lesson['title']}\" for the course \"{course_title}\". "
+        f"{lesson['summary']} "
+        "Use clear section headings, concise explanations, and bullet lists. "
+        "Keep it beginner-friendly. Respond in plain UTF-8 text only."
+    )
+    return [
+        {"role": "system", "content": "You are an expert course author writing structured lessons."},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _render_lesson_video(lesson_id, title, transcript):
+    from .video_utils import generate_short_video
+
+    first_para = (transcript or "").strip().split("\n\n")[0]
+    text = f"{title}\n{first_para[:220]}" if first_para else title
+    url, err = generate_short_video(text, subfolder="lessons", filename_prefix=f"lesson_{lesson_id}", seconds=8)
+    return lesson_id, url, err
+
+
+class CoursePipeline:
+    def __init__(self, job, *, lessons=6, concurrency=8, render_videos=True, video_workers=2, log=print):
+        self.job = job
+        self.lessons = lessons
+        self.concurrency = concurrency
+        self.render_videos = render_videos
+        self.video_workers = video_workers
+        self.log = log
+
+    def run(self):
+        job = self.job
+        for stage in STAGES:
+            if self._is_done(stage):
+                continue
+            job.stage = stage
+            job.save(update_fields=["stage", "updated_at"])
+            started = time.perf_counter()
+            try:
+                getattr(self, f"_stage_{stage}")()
+            except Exception as e:
+                job.status = CourseGenerationJob.STATUS_FAILED
+                job.error = f"{stage}: {e}"
+                job.timings[stage] = round(time.perf_counter() - started, 3)
+                job.save(update_fields=["status", "error", "timings", "updated_at"])
+                raise
+            job.timings[stage] = round(time.perf_counter() - started, 3)
+            job.save(update_fields=["timings", "updated_at"])
+            self.log(f"{stage}: {job.timings[stage]:.2f}s")
+        job.status = CourseGenerationJob.STATUS_DONE
+        job.stage = ""
+        job.error = ""
+        job.save(update_fields=["status", "stage", "error", "updated_at"])
+        return job
+
+    def _is_done(self, stage):
+        job = self.job
+        if stage == "outline":
+            return bool(job.outline)
+        if stage == "transcripts":
+            return all(str(i) in job.transcripts for i in range(len(job.outline["lessons"])))
+        if stage == "persist":
+            return job.course_id is not None
+        return not self.render_videos or not self._lessons_without_video().exists()
+
+    def _lessons_without_video(self):
+        return Lesson.objects.filter(Q(video_url__isnull=True) | Q(video_url=""), course_id=self.job.course_id)
+
+    def _stage_outline(self):
+        text, _, _, _ = complete(
+            _outline_messages(self.job.topic, self.lessons),
+            temperature=0.3, max_tokens=900, allow=provider_within_budget,
+        )
+        self.job.outline = _parse_outline(text, self.job.topic, self.lessons)
+        self.job.save(update_fields=["outline", "updated_at"])
+
+    def _stage_transcripts(self):
+        job = self.job
+        title = job.outline["title"]
+        todo = [
+            (str(i), (title, lesson)) for i, lesson in enumerate(job.outline["lessons"])
+            if str(i) not in job.transcripts
+        ]
+        save = sync_to_async(job.save)
+        failed = []
+
+        async def on_result(key, text, error):
+            if not text:
+                failed.append(f"lesson {key}: {error or 'no provider available'}")
+                return
+            # persisted per lesson so a crash loses at most the calls in flight
+            job.transcripts[key] = text
+            await save(update_fields=["transcripts", "updated_at"])
+
+        asyncio.run(generate_many(
+            todo, _lesson_messages, concurrency=self.concurrency, endpoint="generate-course", on_result=on_result,
+        ))
+        if failed:
+            raise RuntimeError("; ".join(failed))
+
+    def _stage_persist(self):
+        outline = self.job.outline
+        with transaction.atomic():
+            job = CourseGenerationJob.objects.select_for_update().get(pk=self.job.pk)
+            if job.course_id:  # another run got here first
+                self.job.course_id = job.course_id
+                return
+            course = Course.objects.create(
+                title=outline["title"],
+                description=outline["description"],
+                category=outline["category"],
+                level=outline["level"],
+                instructor="LearnX AI",
+                type="ai",
+            )
+            Lesson.objects.bulk_create([
+                Lesson(
+                    course=course, title=lesson["title"], order=i + 1,
+                    transcript=self.job.transcripts[str(i)], content=self.job.transcripts[str(i)],
+                )
+                for i, lesson in enumerate(outline["lessons"])
+            ])
+            job.course = course
+            job.save(update_fields=["course", "updated_at"])
+            course_cache.bump_course(course.id)  # bulk_create sends no signals
+        self.job.course = course
+
+    def _stage_videos(self):
+        from courses.seeding import init_worker
+
+        lessons = list(self._lessons_without_video())
+        content_store.load_texts(lessons, ["transcript"])
+        pending = [(lesson.id, lesson.title, lesson.transcript) for lesson in lessons]
+        if not pending:
+            return
+        rendered, failed = [], []
+        with ProcessPoolExecutor(max_workers=self.video_workers, initializer=init_worker) as pool:
+            futures = [pool.submit(_render_lesson_video, *row) for row in pending]
+            for future in futures:
+                lesson_id, url, err = future.result()
+                if url:
+                    rendered.append(Lesson(id=lesson_id, video_url=url))
+                else:
+                    failed.append(f"lesson {lesson_id}: {err or 'no video'}")
+        Lesson.objects.bulk_update(rendered, ["video_url"])
+        course_cache.bump_course(self.job.course_id)
+        if failed:
+            raise RuntimeError("; ".join(failed))
@@ -0,0 +1,149 @@
+"""Prompt assembly under a per-provider token budget.
+
+``PromptBuilder`` keeps the parts of a prompt separate: system text, context
+chunks ranked most relevant first, and the user's message. ``build(provider)``
+fits them into the provider's budget (AI_PROMPT_TOKEN_BUDGETS). Chunks that
+don't fit are dropped from the end. The last one that partly fits is cut back
+to whole sentences, and as a last resort the user message is shortened in the
+middle. ``fit_messages`` applies the same budget to a plain message list.
+
+The provider chain in ``llm_utils`` calls these for every attempt, so nothing
+reaches a provider unbounded. System prompts and retrieved chunks repeat across
+requests, so their counts come from ``tokens.cached_tokens``. Tokens removed
+are counted on /metrics as ``ai_prompt_tokens_saved_total``.
+"""
+import re
+
+from django.conf import settings
+
+from config.metrics import REGISTRY
+from .tokens import MESSAGE_OVERHEAD, cached_tokens, count_message_tokens, estimate_tokens
+
+TOKENS_SAVED = REGISTRY.counter(
+    "ai_prompt_tokens_saved_total", "Prompt tokens removed to fit provider budgets", labels=("provider",),
+)
+PROMPTS_TRIMMED = REGISTRY.counter(
+    "ai_prompt_trimmed_total", "Prompts that had to be trimmed to fit", labels=("provider",),
+)
+
+_SENTENCE = re.compile(r"(?<=[.!?])\s+|\n+")
+# below this a partial chunk is more noise than help
+MIN_CHUNK_TOKENS = 40
+
+
+def prompt_budget(provider=None, model=None):
+    budgets = settings.AI_PROMPT_TOKEN_BUDGETS
+    if provider and model and f"{provider}:{model}" in budgets:
+        return budgets[f"{provider}:{model}"]
+    return budgets.get(provider, budgets["default"])
+
+
+def truncate_tokens(text, limit, keep_tail=False):
+    """Cut ``text`` to about ``limit`` tokens on word boundaries.
+
+    With ``keep_tail`` the middle is removed instead of the end.
+    """
+    total = estimate_tokens(text)
+    if total <= limit:
+        return text
+    if limit <= 0:
+        return ""
+    words = text.split()
+    keep = max(1, int(len(words) * limit / total))
+    while keep > 1 and estimate_tokens(" ".join(words[:keep])) > limit:
+        keep = int(keep * 0.9)
+    if keep_tail and keep > 8:
+        head, tail = words[: keep // 2], words[-(keep - keep // 2):]
+        return " ".join(head) + " … " + " ".join(tail)
+    return " ".join(words[:keep]) + " …"
+
+
+def shrink(text, limit):
+    """Keep whole leading sentences of ``text`` up to ``limit`` tokens."""
+    out, used = [], 0
+    for sentence in _SENTENCE.split(text):
+        n = estimate_tokens(sentence)
+        if used + n > limit:
+            break
+        out.append(sentence)
+        used += n
+    if not out:
+        return truncate_tokens(text, limit)
+    return " ".join(out)
+
+
+def _record(provider, full, sent):
+    if full > sent:
+        TOKENS_SAVED.inc(provider or "default", amount=full - sent)
+        PROMPTS_TRIMMED.inc(provider or "default")
+
+
+class PromptBuilder:
+    def __init__(self, system, user, context=(), context_intro=""):
+        self.system = system
+        self.user = user
+        self.context = [c for c in context if c]
+        self.context_intro = context_intro
+        self.sent = None  # messages from the most recent build()
+
+    def build(self, provider=None, model=None, budget=None):
+        budget = budget if budget is not None else prompt_budget(provider, model)
+        overhead = 2 * MESSAGE_OVERHEAD + 2
+        system_tokens = cached_tokens(self.system)
+        intro_tokens = cached_tokens(self.context_intro) if self.context_intro else 0
+        user_tokens = estimate_tokens(self.user)
+        chunk_tokens = [cached_tokens(c) for c in self.context]
+        full = overhead + system_tokens + user_tokens + (intro_tokens + sum(chunk_tokens) if self.context else 0)
+
+        user = self.user
+        if overhead + system_tokens + user_tokens > budget:
+            user = truncate_tokens(user, budget - overhead - system_tokens, keep_tail=True)
+            user_tokens = estimate_tokens(user)
+
+        remaining = budget - overhead - system_tokens - user_tokens - intro_tokens
+        kept = []
+        for chunk, n in zip(self.context, chunk_tokens):
+            if n <= remaining:
+                kept.append(chunk)
+                remaining -= n
+            elif remaining >= MIN_CHUNK_TOKENS:
+                kept.append(shrink(chunk, remaining))
+                remaining = 0
+
+        system = self.system
+        if kept:
+            system = f"{self.system} {self.context_intro}\n\n" + "\n\n".join(kept)
+        self.sent = [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ]
+        _record(provider, full, count_message_tokens(self.sent))
+        return self.sent
+
+
+def fit_messages(messages, provider=None, model=None, budget=None):
+    """Bound a plain message list: shorten the largest messages first, the final one last."""
+    budget = budget if budget is not None else prompt_budget(provider, model)
+    full = count_message_tokens(messages)
+    if full <= budget:
+        return messages
+    fitted = [dict(m) for m in messages]
+    sizes = [estimate_tokens(m.get("content")) for m in fitted]
+    excess = full - budget
+    # earlier messages (history, context) give way before the final request
+    order = sorted(range(len(fitted) - 1), key=lambda i: -sizes[i]) + [len(fitted) - 1]
+    for i in order:
+        if excess <= 0:
+            break
+        target = max(sizes[i] - excess, 0)
+        fitted[i]["content"] = truncate_tokens(fitted[i].get("content") or "", target, keep_tail=True)
+        excess -= sizes[i] - estimate_tokens(fitted[i]["content"])
+    _record(provider, full, count_message_tokens(fitted))
+    return fitted
+
+
+def prepare(prompt, provider=None, model=None):
+    """Messages for ``provider`` from a PromptBuilder or a plain message list."""
+    if isinstance(prompt, PromptBuilder):
+        return prompt.build(provider, model)
+    return fit_messages(prompt, provider, model)
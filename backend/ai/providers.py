@@ -0,0 +1,43 @@
+"""LLM provider registry with lazily imported SDKs.
+
+The OpenAI and Gemini SDKs take hundreds of milliseconds to import, and most
+processes never call them: web workers serving the catalog, and most
+management commands. ``sdk(name)`` imports a provider's SDK on first use and
+caches the module, or None when it isn't installed. ``configured(name)`` only
+reads the environment and imports nothing.
+"""
+import importlib
+import os
+from functools import lru_cache
+
+# name -> (SDK module, API key env vars); Groq speaks the OpenAI API
+PROVIDERS = {
+    "groq": ("openai", ("GROQ_API_KEY",)),
+    "gemini": ("google.generativeai", ("GEMINI_API_KEY", "GEMNIUS_API_KEY")),
+    "openai": ("openai", ("OPENAI_API_KEY",)),
+}
+
+
+def register(name, module, env_keys):
+    PROVIDERS[name] = (module, tuple(env_keys))
+
+
+def api_key(name):
+    return next((os.getenv(key) for key in PROVIDERS[name][1] if os.getenv(key)), None)
+
+
+def configured(name):
+    return api_key(name) is not None
+
+
+@lru_cache(maxsize=None)
+def _import(module):
+    try:
+        return importlib.import_module(module)
+    except Exception:  # pragma: no cover - environment dependent
+        return None
+
+
+def sdk(name):
+    """The provider's SDK module, imported on first use; None if unavailable."""
+    return _import(PROVIDERS[name][0])
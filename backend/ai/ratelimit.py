@@ -0,0 +1,103 @@
+"""Sliding-window-counter rate limiting backed by a shared store.
+
+Each (scope, subject) pair keeps one counter per fixed window. A request is
+allowed when ``previous * (1 - elapsed) + current < limit``, which approximates
+a true sliding window with two O(1) cache operations. Counters expire after
+two windows, so idle keys clean themselves up.
+
+The store is a Django cache alias (AI_RATE_LIMIT_CACHE). Redis or Memcached
+give atomic increments shared by every worker; DatabaseCache also works across
+workers; LocMemCache is a per-process stand-in for development. A custom
+AI_RATE_LIMIT_BACKEND provides the same ``check()`` and ``record()`` methods.
+"""
+import math
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from django.utils.module_loading import import_string
+
+
+class CacheRateLimiter:
+    def __init__(self, alias=None):
+        self.cache = caches[alias or getattr(settings, "AI_RATE_LIMIT_CACHE", "default")]
+
+    def _keys(self, key, window, now):
+        current = int(now // window)
+        return f"rl:{key}:{current}", f"rl:{key}:{current - 1}"
+
+    def check(self, key, limit, window):
+        """Whether one more hit for ``key`` fits, without counting it. Returns (allowed, retry_after_seconds)."""
+        now = time.time()
+        elapsed = (now % window) / window
+        k_cur, k_prev = self._keys(key, window, now)
+        counts = self.cache.get_many([k_cur, k_prev])
+        cur, prev = counts.get(k_cur, 0), counts.get(k_prev, 0)
+
+        if prev * (1 - elapsed) + cur + 1 > limit:
+            if cur + 1 > limit:
+                wait = (1 - elapsed) * window
+            else:
+                # wait until the previous window's weight has decayed enough
+                needed = 1 - (limit - cur - 1) / prev
+                wait = max(needed - elapsed, 0) * window
+            # round first: float noise would otherwise add a whole second (6.000000000000002 -> 7)
+            return False, max(1, math.ceil(round(wait, 6)))
+        return True, 0
+
+    def record(self, key, window):
+        """Count one hit for ``key``."""
+        k_cur, _ = self._keys(key, window, time.time())
+        if not self.cache.add(k_cur, 1, timeout=window * 2):
+            try:
+                self.cache.incr(k_cur)
+            except ValueError:  # expired between add() and incr()
+                self.cache.set(k_cur, 1, timeout=window * 2)
+
+    def hit(self, key, limit, window):
+        """check() and, if allowed, record(). Returns (allowed, retry_after_seconds)."""
+        allowed, retry_after = self.check(key, limit, window)
+        if allowed:
+            self.record(key, window)
+        return allowed, retry_after
+
+
+@lru_cache(maxsize=None)
+def get_limiter():
+    path = getattr(settings, "AI_RATE_LIMIT_BACKEND", "ai.ratelimit.CacheRateLimiter")
+    return import_string(path)()
+
+
+def client_ip(request):
+    return request.META.get("REMOTE_ADDR", "unknown")
+
+
+def check_rate(request, scope):
+    """Apply the per-IP and per-user limits for ``scope``.
+
+    Returns a 429 Response when a limit is exceeded, otherwise None.
+    """
+    rule = settings.AI_RATE_LIMITS[scope]
+    window = rule.get("window", 60)
+    subjects = [("ip", client_ip(request), rule["per_ip"])]
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        subjects.append(("user", user.pk, rule["per_user"]))
+
+    limiter = get_limiter()
+    # check every bucket before counting in any: a request one limit rejects must not
+    # use up the others (e.g. a throttled user behind a NAT draining the shared IP budget)
+    waits = []
+    for kind, ident, limit in subjects:
+        allowed, retry_after = limiter.check(f"{scope}:{kind}:{ident}", limit, window)
+        if not allowed:
+            waits.append(retry_after)
+    if waits:
+        resp = JsonResponse({"detail": "Rate limit exceeded. Please wait a minute."}, status=429)
+        resp["Retry-After"] = str(max(waits))
+        return resp
+    for kind, ident, _ in subjects:
+        limiter.record(f"{scope}:{kind}:{ident}", window)
+    return None
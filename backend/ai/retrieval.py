@@ -0,0 +1,344 @@
+"""Retrieval over lesson transcripts/content for the AI tutor.
+
+Lesson text is split into overlapping word windows and embedded with a signed
+hashing vectorizer (unigrams + bigrams, sublinear tf, L2-normalised), so no
+model download or vocabulary is needed and any process embeds a query the same
+way the index did. Vectors live in a float32 file that is memory-mapped for
+search; a query is one matrix-vector product plus ``argpartition``.
+
+On-disk layout in RAG_INDEX_DIR:
+
+    manifest.json       current generation, dims, per-lesson content hashes
+    vectors-<gen>.f32   row-major float32 vectors, append-only within a generation
+    meta-<gen>.npz      per-row lesson id (-1 = deleted), course id, field, chunk number
+
+``update_index()`` re-embeds only lessons whose text hash changed: their old
+rows are tombstoned and new rows appended. When a quarter of the rows are dead
+it writes a compacted generation instead. Readers size the memmap from the meta
+file, which is replaced only after the vectors it describes are on disk, so
+searches never see half-written rows.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import zlib
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+FIELDS = ("transcript", "content")
+_WORD = re.compile(r"\w+")
+_STOP = frozenset(
+    "a an and are as at be but by for from has have how i in is it its of on or that the this to was what "
+    "when where which who why will with you your".split()
+)
+
+
+def _dims():
+    return int(getattr(settings, "RAG_DIMS", 256))
+
+
+def _index_dir():
+    return Path(getattr(settings, "RAG_INDEX_DIR", settings.BASE_DIR / "rag_index"))
+
+
+# ------------------------------------------------------------------------------
+# Chunking / embedding
+# ------------------------------------------------------------------------------
+def chunk_text(text, size=None, overlap=None):
+    size = size or int(getattr(settings, "RAG_CHUNK_WORDS", 120))
+    overlap = overlap if overlap is not None else int(getattr(settings, "RAG_CHUNK_OVERLAP", 30))
+    words = (text or "").split()
+    if not words:
+        return []
+    step = max(size - overlap, 1)
+    return [" ".join(words[i:i + size]) for i in range(0, max(len(words) - overlap, 1), step)]
+
+
+def _features(text):
+    tokens = [t for t in _WORD.findall(text.lower()) if t not in _STOP]
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def embed(texts, dims=None):
+    """Return an (n, dims) float32 array of L2-normalised hashed vectors."""
+    dims = dims or _dims()
+    out = np.zeros((len(texts), dims), dtype=np.float32)
+    for row, text in enumerate(texts):
+        hashes = np.fromiter((zlib.crc32(f.encode()) for f in _features(text)), dtype=np.uint32)
+        if not hashes.size:
+            continue
+        signs = np.where(hashes & 0x80000000, -1.0, 1.0)
+        vec = np.bincount(hashes % dims, weights=signs, minlength=dims)
+        vec = np.sign(vec) * np.log1p(np.abs(vec))
+        norm = np.linalg.norm(vec)
+        if norm:
+            out[row] = vec / norm
+    return out
+
+
+def _lesson_hash(transcript, content):
+    return hashlib.sha1(f"{transcript or ''}\0{content or ''}".encode()).hexdigest()
+
+
+def _lesson_chunks(transcript, content):
+    """(field_no, chunk_no, text) for a lesson; content identical to the transcript is not indexed twice."""
+    out = []
+    for field_no, text in enumerate((transcript, content)):
+        if field_no == 1 and (content or "").strip() == (transcript or "").strip():
+            continue
+        out.extend((field_no, i, chunk) for i, chunk in enumerate(chunk_text(text)))
+    return out
+
+
+# ------------------------------------------------------------------------------
+# Index files
+# ------------------------------------------------------------------------------
+class _Paths:
+    def __init__(self, root, gen):
+        self.root = root
+        self.manifest = root / "manifest.json"
+        self.vectors = root / f"vectors-{gen}.f32"
+        self.meta = root / f"meta-{gen}.npz"
+
+
+def _read_manifest(root):
+    try:
+        return json.loads((root / "manifest.json").read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _atomic_write(path, write):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as fh:
+        write(fh)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+def _save_meta(path, meta):
+    _atomic_write(path, lambda fh: np.savez(fh, **meta))
+
+
+def _empty_meta():
+    return {
+        "lesson_ids": np.zeros(0, dtype=np.int32),
+        "course_ids": np.zeros(0, dtype=np.int32),
+        "fields": np.zeros(0, dtype=np.int8),
+        "chunk_nos": np.zeros(0, dtype=np.int32),
+    }
+
+
+def update_index(lessons, rebuild=False, log=None):
+    """Bring the index in line with ``lessons``.
+
+    ``lessons`` is an iterable of (id, course_id, transcript, content) covering
+    every lesson that should be searchable. Returns a stats dict.
+    """
+    log = log or (lambda msg: None)
+    root = _index_dir()
+    root.mkdir(parents=True, exist_ok=True)
+    dims = _dims()
+    manifest = None if rebuild else _read_manifest(root)
+    if manifest and manifest.get("dims") != dims:
+        log(f"dims changed ({manifest.get('dims')} -> {dims}); rebuilding")
+        manifest = None
+
+    if manifest:
+        gen = manifest["gen"]
+        paths = _Paths(root, gen)
+        with np.load(paths.meta) as data:
+            meta = {k: data[k].copy() for k in data.files}
+        known = manifest["lessons"]
+    else:
+        gen = (_read_manifest(root) or {}).get("gen", 0) + 1
+        paths = _Paths(root, gen)
+        paths.vectors.write_bytes(b"")
+        meta, known = _empty_meta(), {}
+
+    seen, changed = set(), []
+    for lesson_id, course_id, transcript, content in lessons:
+        key = str(lesson_id)
+        seen.add(key)
+        digest = _lesson_hash(transcript, content)
+        if known.get(key) != digest:
+            changed.append((lesson_id, course_id, transcript, content, digest))
+    removed = [key for key in known if key not in seen]
+
+    stale = {int(k) for k in removed} | {lesson_id for lesson_id, *_ in changed}
+    if stale:
+        meta["lesson_ids"][np.isin(meta["lesson_ids"], list(stale))] = -1
+    for key in removed:
+        del known[key]
+
+    new_rows = {k: [] for k in ("lesson_ids", "course_ids", "fields", "chunk_nos")}
+    texts = []
+    for lesson_id, course_id, transcript, content, digest in changed:
+        for field_no, chunk_no, text in _lesson_chunks(transcript, content):
+            new_rows["lesson_ids"].append(lesson_id)
+            new_rows["course_ids"].append(course_id)
+            new_rows["fields"].append(field_no)
+            new_rows["chunk_nos"].append(chunk_no)
+            texts.append(text)
+        known[str(lesson_id)] = digest
+
+    vectors = embed(texts, dims) if texts else np.zeros((0, dims), dtype=np.float32)
+    for key, values in new_rows.items():
+        meta[key] = np.concatenate([meta[key], np.asarray(values, dtype=meta[key].dtype)])
+
+    dead = int((meta["lesson_ids"] < 0).sum())
+    total = len(meta["lesson_ids"])
+    if manifest and total and dead / total > 0.25:
+        # compact into a new generation; readers keep using the old files until the manifest flips
+        old = np.memmap(paths.vectors, dtype=np.float32, mode="r", shape=(total - len(texts), dims)) \
+            if total - len(texts) else np.zeros((0, dims), dtype=np.float32)
+        live = meta["lesson_ids"] >= 0
+        merged = np.concatenate([np.asarray(old), vectors])[live]
+        meta = {k: v[live] for k, v in meta.items()}
+        old_paths, gen = paths, gen + 1
+        paths = _Paths(root, gen)
+        _atomic_write(paths.vectors, lambda fh: fh.write(merged.tobytes()))
+        log(f"compacted {dead} dead rows into generation {gen}")
+    else:
+        old_paths = None
+        with open(paths.vectors, "ab") as fh:
+            fh.write(vectors.tobytes())
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    _save_meta(paths.meta, meta)
+    _atomic_write(paths.manifest, lambda fh: fh.write(json.dumps({"gen": gen, "dims": dims, "lessons": known}).encode()))
+    if old_paths:
+        for path in (old_paths.vectors, old_paths.meta):
+            path.unlink(missing_ok=True)
+    if not manifest:
+        for path in root.glob("*-*.*"):
+            if path.name not in (paths.vectors.name, paths.meta.name):
+                path.unlink(missing_ok=True)
+
+    return {
+        "changed": len(changed), "removed": len(removed), "chunks_added": len(texts),
+        "rows": len(meta["lesson_ids"]), "live": int((meta["lesson_ids"] >= 0).sum()), "generation": gen,
+    }
+
+
+# ------------------------------------------------------------------------------
+# Search
+# ------------------------------------------------------------------------------
+class _Index:
+    def __init__(self, root):
+        manifest = _read_manifest(root)
+        if not manifest:
+            raise FileNotFoundError(root)
+        paths = _Paths(root, manifest["gen"])
+        self.stamp = self._stamp(root)
+        with np.load(paths.meta) as data:
+            self.lesson_ids = data["lesson_ids"]
+            self.course_ids = data["course_ids"]
+            self.fields = data["fields"]
+            self.chunk_nos = data["chunk_nos"]
+        rows = len(self.lesson_ids)
+        self.dims = manifest["dims"]
+        self.vectors = (
+            np.memmap(paths.vectors, dtype=np.float32, mode="r", shape=(rows, self.dims))
+            if rows else np.zeros((0, self.dims), dtype=np.float32)
+        )
+        self.live = self.lesson_ids >= 0
+        self.dead = np.flatnonzero(~self.live)
+
+    @staticmethod
+    def _stamp(root):
+        try:
+            st = (root / "manifest.json").stat()
+            return st.st_mtime_ns, st.st_ino
+        except OSError:
+            return None
+
+    def search(self, query_vec, k, course_id=None, lesson_id=None):
+        if lesson_id is not None:
+            rows = np.flatnonzero(self.lesson_ids == lesson_id)
+        elif course_id is not None:
+            rows = np.flatnonzero((self.course_ids == course_id) & self.live)
+        else:
+            rows = None
+        if rows is not None:
+            if not rows.size:
+                return []
+            scores = self.vectors[rows] @ query_vec
+        else:
+            scores = self.vectors @ query_vec
+            scores[self.dead] = -np.inf
+        k = min(k, scores.size)
+        if not k:
+            return []
+        top = np.argpartition(scores, scores.size - k)[-k:]
+        top = top[np.argsort(-scores[top])]
+        picked = rows[top] if rows is not None else top
+        return [
+            (int(self.lesson_ids[r]), int(self.course_ids[r]), int(self.fields[r]), int(self.chunk_nos[r]), float(s))
+            for r, s in zip(picked, scores[top])
+        ]
+
+
+_loaded = None
+_lock = threading.Lock()
+
+
+def get_index():
+    """Process-wide index, reloaded when the manifest changes. None if not built."""
+    global _loaded
+    root = _index_dir()
+    current = _loaded
+    if current is not None and current.stamp == _Index._stamp(root):
+        return current
+    with _lock:
+        if _loaded is None or _loaded.stamp != _Index._stamp(root):
+            try:
+                _loaded = _Index(root)
+            except (FileNotFoundError, OSError, ValueError):
+                _loaded = None
+        return _loaded
+
+
+def search(query, k=None, course_id=None, lesson_id=None):
+    """Top-k (lesson_id, course_id, field_no, chunk_no, score) rows for ``query``."""
+    index = get_index()
+    if index is None:
+        return []
+    k = k or int(getattr(settings, "RAG_TOP_K", 4))
+    return index.search(embed([query], index.dims)[0], k, course_id=course_id, lesson_id=lesson_id)
+
+
+def retrieve(query, k=None, course_id=None, lesson_id=None):
+    """Top-k chunks with their text, for prompt context.
+
+    Returns a list of {"lesson_id", "course_id", "title", "text", "score"}.
+    """
+    from courses.models import Lesson
+
+    min_score = float(getattr(settings, "RAG_MIN_SCORE", 0.05))
+    hits = [h for h in search(query, k, course_id, lesson_id) if h[4] >= min_score]
+    if not hits:
+        return []
+    from courses import content_store
+
+    lessons = Lesson.objects.only("id", "title", "transcript_blob", "content_blob").in_bulk({h[0] for h in hits})
+    content_store.load_texts(lessons.values())
+    out = []
+    for lesson_id, course_id, field_no, chunk_no, score in hits:
+        lesson = lessons.get(lesson_id)
+        if lesson is None:
+            continue
+        chunks = chunk_text(getattr(lesson, FIELDS[field_no]))
+        if chunk_no >= len(chunks):  # text changed since the last index update
+            continue
+        out.append({
+            "lesson_id": lesson_id, "course_id": course_id, "title": lesson.title,
+            "text": chunks[chunk_no], "score": round(score, 4),
+        })
+    return out
@@ -0,0 +1,177 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from courses.models import Course, Lesson
+
+from . import ratelimit
+from .models import CourseGenerationJob
+from .pipeline import CoursePipeline
+
+
+def in_threads(max_workers, initializer):
+    # mocks don't survive the trip to a worker process
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+
+@mock.patch("ai.pipeline.ProcessPoolExecutor", in_threads)
+class PipelineVideoTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(title="Rust", description="Systems", instructor="LearnX AI", type="ai")
+        self.lessons = [
+            Lesson.objects.create(course=self.course, title=title, order=i, transcript=f"{title} text")
+            for i, title in enumerate(["Ownership", "Borrowing"], start=1)
+        ]
+        self.job = CourseGenerationJob.objects.create(
+            topic="Rust",
+            outline={"title": "Rust", "lessons": [{"title": l.title, "summary": ""} for l in self.lessons]},
+            transcripts={"0": "Ownership text", "1": "Borrowing text"},
+            course=self.course,
+        )
+
+    def pipeline(self):
+        return CoursePipeline(self.job, log=lambda message: None)
+
+    def test_failed_videos_fail_the_job(self):
+        failing = self.lessons[1].id
+
+        def render(lesson_id, title, transcript):
+            if lesson_id == failing:
+                return lesson_id, None, "ffmpeg not found"
+            return lesson_id, f"/media/videos/lessons/{lesson_id}.mp4", None
+
+        with mock.patch("ai.pipeline._render_lesson_video", render):
+            with self.assertRaisesMessage(RuntimeError, f"lesson {failing}: ffmpeg not found"):
+                self.pipeline().run()
+
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, CourseGenerationJob.STATUS_FAILED)
+        self.assertEqual(self.job.error, f"videos: lesson {failing}: ffmpeg not found")
+        self.assertEqual(
+            dict(Lesson.objects.values_list("id", "video_url")),
+            {self.lessons[0].id: f"/media/videos/lessons/{self.lessons[0].id}.mp4", failing: None},
+        )
+
+    def test_rerun_renders_only_the_missing_videos(self):
+        Lesson.objects.filter(pk=self.lessons[0].pk).update(video_url="/media/videos/lessons/done.mp4")
+        self.job.status = CourseGenerationJob.STATUS_FAILED
+        self.job.error = "videos: lesson 2: ffmpeg not found"
+        self.job.save()
+        render = mock.Mock(side_effect=lambda lesson_id, title, transcript: (lesson_id, "/media/v.mp4", None))
+
+        with mock.patch("ai.pipeline._render_lesson_video", render):
+            self.pipeline().run()
+
+        render.assert_called_once_with(self.lessons[1].id, "Borrowing", "Borrowing text")
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, CourseGenerationJob.STATUS_DONE)
+        self.assertEqual(self.job.error, "")
+
+    def test_videos_stage_is_skipped_when_every_lesson_has_one(self):
+        Lesson.objects.update(video_url="/media/v.mp4")
+        render = mock.Mock()
+
+        with mock.patch("ai.pipeline._render_lesson_video", render):
+            self.pipeline().run()
+
+        render.assert_not_called()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, CourseGenerationJob.STATUS_DONE)
+        self.assertNotIn("videos", self.job.timings)
+
+
+RATE_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests-default"},
+    "ratelimit": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests-ratelimit"},
+}
+T0 = 60 * 1_000_000  # the start of a 60 s window
+
+
+@override_settings(
+    CACHES=RATE_CACHES, AI_RATE_LIMIT_CACHE="ratelimit",
+    AI_RATE_LIMITS={"ask": {"window": 60, "per_ip": 5, "per_user": 3}},
+)
+class RateLimitTests(SimpleTestCase):
+    def setUp(self):
+        caches["ratelimit"].clear()
+        ratelimit.get_limiter.cache_clear()
+        self.addCleanup(ratelimit.get_limiter.cache_clear)
+        self.now = T0
+        clock = mock.patch("ai.ratelimit.time.time", lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+        self.limiter = ratelimit.CacheRateLimiter()
+
+    def hits(self, key, count, limit=10):
+        return [self.limiter.hit(key, limit, 60)[0] for _ in range(count)]
+
+    def test_allows_up_to_the_limit_within_a_window(self):
+        self.assertEqual(self.hits("k", 12), [True] * 10 + [False] * 2)
+
+    def test_keys_are_counted_separately(self):
+        self.hits("a", 10)
+
+        self.assertEqual(self.hits("b", 1), [True])
+        self.assertEqual(self.hits("a", 1), [False])
+
+    def test_previous_window_is_weighted_by_its_remaining_share(self):
+        self.hits("k", 10)
+        self.now = T0 + 60 + 45  # 75% into the next window: 10 * 0.25 of the old hits still count
+
+        self.assertEqual(self.hits("k", 8), [True] * 7 + [False])
+
+    def test_matches_the_sliding_window_formula(self):
+        # brute force: every allowed hit keeps prev * (1 - elapsed) + cur within the limit
+        counts = {}
+        for step in range(0, 240, 3):
+            self.now = T0 + step
+            window, elapsed = divmod(step, 60)
+            allowed, _ = self.limiter.hit("k", 10, 60)
+            estimate = counts.get(window - 1, 0) * (1 - elapsed / 60) + counts.get(window, 0) + 1
+            self.assertEqual(allowed, estimate <= 10, f"t={step}s")
+            if allowed:
+                counts[window] = counts.get(window, 0) + 1
+
+    def test_retry_after_is_when_the_next_hit_is_allowed(self):
+        self.hits("k", 10)
+        self.now = T0 + 60 + 12
+        self.hits("k", 10)
+        allowed, retry_after = self.limiter.hit("k", 10, 60)
+        self.assertFalse(allowed)
+
+        self.now += retry_after - 1
+        self.assertFalse(self.limiter.hit("k", 10, 60)[0])
+        self.now += 1
+        self.assertTrue(self.limiter.hit("k", 10, 60)[0])
+
+    def test_check_rate_limits_per_ip_and_per_user(self):
+        factory = RequestFactory()
+        anonymous = factory.post("/api/ai/ask/", REMOTE_ADDR="10.0.0.1")
+        anonymous.user = mock.Mock(is_authenticated=False)
+        member = factory.post("/api/ai/ask/", REMOTE_ADDR="10.0.0.2")
+        member.user = mock.Mock(is_authenticated=True, pk=7)
+
+        self.assertEqual([ratelimit.check_rate(member, "ask") for _ in range(3)], [None] * 3)
+        blocked = ratelimit.check_rate(member, "ask")
+        self.assertEqual(blocked.status_code, 429)
+        self.assertGreaterEqual(int(blocked["Retry-After"]), 1)
+
+        self.assertEqual([ratelimit.check_rate(anonymous, "ask") for _ in range(5)], [None] * 5)
+        self.assertEqual(ratelimit.check_rate(anonymous, "ask").status_code, 429)
+
+    def test_rejected_requests_use_up_no_other_bucket(self):
+        factory = RequestFactory()
+
+        def request(user_pk):
+            req = factory.post("/api/ai/ask/", REMOTE_ADDR="10.0.0.9")  # one NAT, per_ip=5
+            req.user = mock.Mock(is_authenticated=True, pk=user_pk)
+            return req
+
+        self.assertEqual([ratelimit.check_rate(request(1), "ask") for _ in range(3)], [None] * 3)
+        for _ in range(10):  # user 1 is over its per_user=3; none of these count against the IP
+            self.assertEqual(ratelimit.check_rate(request(1), "ask").status_code, 429)
+
+        self.assertEqual([ratelimit.check_rate(request(2), "ask") for _ in range(2)], [None] * 2)
+        self.assertEqual(ratelimit.check_rate(request(2), "ask").status_code, 429)  # the IP's 5 are used
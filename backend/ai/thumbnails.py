@@ -0,0 +1,93 @@
+"""Title-slide thumbnails for courses and lessons.
+
+AI-generated courses have no ``Course.thumbnail``, so the catalog shows
+placeholders. These thumbnails reuse the slide renderer that draws the
+first frame of the videos (``video_utils._render_text_image``). The slide
+is scaled down to SIZE and saved as an optimized progressive JPEG next to
+the videos: media/videos/<courses|lessons>/<course|lesson>_<id>_thumb_<hash>.jpg.
+
+<hash> is a digest of everything the image depends on: the text, the size,
+the encoder settings and RENDER_VERSION. A row whose thumbnail URL already
+carries the digest of its current inputs, with the file on disk, is up to
+date and is skipped. Bump RENDER_VERSION when the slide layout changes.
+
+Only empty thumbnails and ones generated here are (re)placed; a thumbnail
+set by an instructor is left alone.
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import re
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+
+RENDER_VERSION = 1
+SIZE = (640, 360)  # 2x the catalog card
+JPEG_OPTIONS = {"quality": 80, "optimize": True, "progressive": True}
+SUBFOLDERS = {"course": "courses", "lesson": "lessons"}
+
+_GENERATED = re.compile(r"(?:^|/)videos/(?:courses|lessons)/(?:course|lesson)_\d+_thumb_[0-9a-f]{16}\.jpg$")
+
+
+def course_text(course) -> str:
+    # the same title slide as the course trailer
+    desc = (course.description or "").strip().split(".")[0]
+    return f"{course.title}\n{desc[:200]}"
+
+
+def lesson_text(lesson, course_title: str) -> str:
+    return f"{lesson.title}\n{course_title}"
+
+
+def fingerprint(text: str) -> str:
+    inputs = f"{RENDER_VERSION}|{SIZE}|{sorted(JPEG_OPTIONS.items())}|{text}"
+    return hashlib.sha256(inputs.encode()).hexdigest()[:16]
+
+
+def relative_path(kind: str, obj_id: int, digest: str) -> str:
+    return f"videos/{SUBFOLDERS[kind]}/{kind}_{obj_id}_thumb_{digest}.jpg"
+
+
+def url_for(rel: str) -> str:
+    return f"{settings.MEDIA_URL}{rel}"
+
+
+def is_generated(url: Optional[str]) -> bool:
+    return bool(url) and _GENERATED.search(url) is not None
+
+
+def is_current(url: Optional[str], rel: str) -> bool:
+    return url == url_for(rel) and (Path(settings.MEDIA_ROOT) / rel).exists()
+
+
+def render(text: str) -> bytes:
+    """JPEG bytes of the thumbnail for ``text``. Pure function, safe to run in a worker process."""
+    from PIL import Image
+
+    from .video_utils import _render_text_image
+
+    im = _render_text_image(text)
+    im = im.resize(SIZE, Image.Resampling.LANCZOS)
+    buf = io.BytesIO()
+    im.save(buf, "JPEG", **JPEG_OPTIONS)
+    return buf.getvalue()
+
+
+def write(rel: str, data: bytes) -> str:
+    """Write ``data`` under MEDIA_ROOT at ``rel`` (atomically) and return its URL."""
+    path = Path(settings.MEDIA_ROOT) / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+    return url_for(rel)
+
+
+def remove(url: Optional[str]) -> None:
+    """Delete a thumbnail file generated here; anything else is left alone."""
+    if not is_generated(url) or not url.startswith(settings.MEDIA_URL):
+        return
+    (Path(settings.MEDIA_ROOT) / url[len(settings.MEDIA_URL):]).unlink(missing_ok=True)
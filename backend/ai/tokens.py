@@ -0,0 +1,42 @@
+"""Local token counting used when a provider does not report usage.
+
+Uses tiktoken when it is installed; otherwise a regex heuristic that stays
+within ~10-15% of BPE tokenizers on English prose and code.
+"""
+import re
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    # loaded on first count: tiktoken reads (or downloads) its BPE table on get_encoding
+    try:  # pragma: no cover - optional dependency
+        import tiktoken  # type: ignore
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:  # pragma: no cover
+        return None
+
+
+_PIECE = re.compile(r"\w+|[^\w\s]")
+# chat formats add a few tokens per message for role/separators
+MESSAGE_OVERHEAD = 4
+
+
+def estimate_tokens(text: str | None) -> int:
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    # long words split into several BPE pieces
+    return sum(1 + len(p) // 6 for p in _PIECE.findall(text))
+
+
+@lru_cache(maxsize=4096)
+def cached_tokens(text: str) -> int:
+    """estimate_tokens() memoized for fragments that repeat (system prompts, context chunks)."""
+    return estimate_tokens(text)
+
+
+def count_message_tokens(messages) -> int:
+    return sum(estimate_tokens(m.get("content")) + MESSAGE_OVERHEAD for m in messages) + 2
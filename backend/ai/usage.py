@@ -0,0 +1,98 @@
+"""Token usage ledger, daily rollups and budget checks.
+
+Every provider call queues a TokenUsage row and bumps two UsageRollup rows
+(the caller's subject and the provider) with F() updates. Budget checks read a
+single rollup row by its unique (scope, key, day) key, so they cost one indexed
+lookup no matter how much history exists.
+"""
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import JsonResponse
+from django.utils import timezone
+
+from . import interaction_log
+from .models import TokenUsage, UsageRollup
+from .ratelimit import client_ip
+from .tokens import count_message_tokens, estimate_tokens
+
+
+def usage_subject(request):
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    return f"ip:{client_ip(request)}"
+
+
+def _today():
+    return timezone.localdate()
+
+
+def _bump(scope, key, day, prompt, completion):
+    updated = UsageRollup.objects.filter(scope=scope, key=key, day=day).update(
+        prompt_tokens=F("prompt_tokens") + prompt,
+        completion_tokens=F("completion_tokens") + completion,
+        calls=F("calls") + 1,
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            UsageRollup.objects.create(
+                scope=scope, key=key, day=day, prompt_tokens=prompt, completion_tokens=completion, calls=1,
+            )
+    except IntegrityError:  # another worker created the row first
+        _bump(scope, key, day, prompt, completion)
+
+
+def normalize_usage(usage, messages, text):
+    """Return (prompt_tokens, completion_tokens, estimated) from provider usage or a local estimate."""
+    prompt = completion = None
+    if usage:
+        prompt = usage.get("prompt_tokens")
+        completion = usage.get("completion_tokens")
+    estimated = False
+    if prompt is None:
+        prompt, estimated = count_message_tokens(messages), True
+    if completion is None:
+        completion, estimated = estimate_tokens(text), True
+    return int(prompt), int(completion), estimated
+
+
+def record_usage(*, subject, user, endpoint, provider, messages, text, usage):
+    prompt, completion, estimated = normalize_usage(usage, messages, text)
+    day = _today()
+    # the ledger row is batched; the rollups are written now because budget checks read them
+    interaction_log.log(TokenUsage(
+        user=user, subject=subject, endpoint=endpoint, provider=provider,
+        prompt_tokens=prompt, completion_tokens=completion, estimated=estimated,
+    ))
+    _bump(UsageRollup.SCOPE_SUBJECT, subject, day, prompt, completion)
+    _bump(UsageRollup.SCOPE_PROVIDER, provider, day, prompt, completion)
+    return prompt, completion
+
+
+def tokens_used_today(scope, key):
+    row = (
+        UsageRollup.objects.filter(scope=scope, key=key, day=_today())
+        .values_list("prompt_tokens", "completion_tokens")
+        .first()
+    )
+    return sum(row) if row else 0
+
+
+def check_budget(request):
+    """Return a 429 Response when the caller's daily token budget is spent, else None."""
+    budget = settings.AI_DAILY_TOKEN_BUDGET_PER_USER
+    if not budget:
+        return None
+    if tokens_used_today(UsageRollup.SCOPE_SUBJECT, usage_subject(request)) >= budget:
+        return JsonResponse({"detail": "Daily AI usage limit reached. Please try again tomorrow."}, status=429)
+    return None
+
+
+def provider_within_budget(provider):
+    budget = settings.AI_DAILY_TOKEN_BUDGET_PER_PROVIDER.get(provider)
+    if not budget:
+        return True
+    return tokens_used_today(UsageRollup.SCOPE_PROVIDER, provider) < budget
@@ -1,17 +1,19 @@
+from __future__ import annotations
+
 import os
 import io
 import uuid
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import TYPE_CHECKING, Optional, Tuple
 
 from django.conf import settings
-from PIL import Image, ImageDraw, ImageFont
 
-try:
-    from openai import OpenAI  # type: ignore
-    _OPENAI_TTS_AVAILABLE = True
-except Exception:  # pragma: no cover
-    _OPENAI_TTS_AVAILABLE = False
+from . import providers
+
+# Pillow and the OpenAI SDK are imported where they are used: callers such as
+# courses.api_views import this module at startup but rarely render anything.
+if TYPE_CHECKING:  # pragma: no cover
+    from PIL import Image, ImageDraw, ImageFont
 
 
 def _ensure_dir(path: Path) -> None:
@@ -37,6 +39,8 @@ def _wrap_text(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.FreeTypeFon
 
 
 def _render_text_image(text: str, width: int = 1280, height: int = 720) -> Image.Image:
+    from PIL import Image, ImageDraw, ImageFont
+
     bg_color = (18, 18, 22)
     fg_color = (240, 240, 245)
     accent = (139, 92, 246)
@@ -75,10 +79,11 @@ def _render_text_image(text: str, width: int = 1280, height: int = 720) -> Image
 
 def _synthesize_tts_openai(text: str, voice: str = "alloy") -> Tuple[Optional[bytes], Optional[str]]:
     api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key or not _OPENAI_TTS_AVAILABLE:
+    openai = providers.sdk("openai") if api_key else None
+    if not hasattr(openai, "OpenAI"):
         return None, "openai_tts_unavailable"
     try:
-        client = OpenAI(api_key=api_key)
+        client = openai.OpenAI(api_key=api_key)
         # Prefer gpt-4o-mini-tts if available; fallback to tts-1
         model = os.getenv("OPENAI_TTS_MODEL", "gpt-4o-mini-tts")
         # Non-streaming response; the SDK exposes output as bytes via .content
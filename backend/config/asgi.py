@@ -1,3 +1,10 @@
+"""ASGI entry point.
+
+Serve with an ASGI server so the async AI views can await provider calls
+without tying up a worker thread, e.g.:
+
+    uvicorn config.asgi:application --workers 4
+"""
 import os
 from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
@@ -0,0 +1,84 @@
+"""Background writers that take work off the request path.
+
+A BatchWriter owns a bounded queue and a daemon thread. ``submit()`` never
+blocks: when the queue is full the item is dropped and counted. The thread
+hands ``_write()`` up to ``batch_size`` items at a time, or whatever arrived
+within ``flush_seconds``. Subclasses implement ``_write()`` and report what
+they stored or lost with ``written()`` / ``dropped()``. Both counters are
+labelled with the writer's ``name``, so each writer can be told apart on
+/metrics.
+"""
+import os
+import queue
+import threading
+import time
+
+from .metrics import REGISTRY
+
+DROPPED = REGISTRY.counter(
+    "batch_writer_dropped_total", "Items a background writer dropped (queue full or write failed)",
+    labels=("writer",),
+)
+WRITTEN = REGISTRY.counter("batch_writer_written_total", "Items a background writer processed", labels=("writer",))
+
+
+class BatchWriter:
+    def __init__(self, batch_size=200, flush_seconds=1.0, max_queue=10_000, name="batch-writer"):
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def submit(self, obj):
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(obj)
+        except queue.Full:
+            self.dropped()
+
+    def written(self, amount=1):
+        WRITTEN.inc(self.name, amount=amount)
+
+    def dropped(self, amount=1):
+        DROPPED.inc(self.name, amount=amount)
+
+    def _ensure_thread(self):
+        # (re)start lazily so forked workers get their own thread
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch):
+        raise NotImplementedError
+
+    def flush(self):
+        """Write everything queued so far from the calling thread."""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._write(batch)
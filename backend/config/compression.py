@@ -0,0 +1,120 @@
+"""Response compression negotiated from Accept-Encoding.
+
+Brotli is preferred when the ``brotli`` package is installed and the client
+accepts it; gzip otherwise. Bodies under COMPRESS_MIN_BYTES are sent as they
+are: below about a kilobyte the saving doesn't pay for the CPU and the extra
+headers.
+
+Only GET and HEAD responses are compressed. The secret-bearing responses in
+this API (token obtain/refresh) are POSTs, and leaving them alone means a
+compressed body can't be used to guess a secret from its length (BREACH).
+
+Responses that already carry a Content-Encoding are passed through untouched.
+That lets courses/cache.py serve variants it compressed once at a higher
+level and kept in the cache.
+"""
+import gzip
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:  # pragma: no cover - optional dependency
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml", "image/svg+xml")
+
+# on-the-fly levels favour speed; cached variants are compressed once, so they use the best level
+FAST = {"br": 5, "gzip": 6}
+BEST = {"br": 11, "gzip": 9}
+
+
+def min_bytes():
+    return int(getattr(settings, "COMPRESS_MIN_BYTES", 1024))
+
+
+def _accepted(header):
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
+
+
+def negotiate(accept_encoding):
+    """The encoding to use for a client sending ``accept_encoding``: "br", "gzip" or None."""
+    if not accept_encoding:
+        return None
+    accepted = _accepted(accept_encoding)
+    for encoding in ("br", "gzip"):
+        if encoding == "br" and brotli is None:
+            continue
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body, encoding, best=False):
+    level = (BEST if best else FAST)[encoding]
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    # mtime=0 keeps output deterministic, so equal bodies compress to equal bytes
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def weak_etag(etag):
+    return etag if etag.startswith("W/") else f"W/{etag}"
+
+
+def compressible(request, response):
+    return (
+        request.method in ("GET", "HEAD")
+        and not response.streaming
+        and not response.has_header("Content-Encoding")
+        and response.get("Content-Type", "").startswith(COMPRESSIBLE_TYPES)
+        and len(response.content) >= min_bytes()
+    )
+
+
+class CompressionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process(request, await self.get_response(request))
+
+    def process(self, request, response):
+        if not compressible(request, response):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = negotiate(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+        body = compress(response.content, encoding)
+        if len(body) >= len(response.content):
+            return response
+        response.content = body
+        response["Content-Length"] = str(len(body))
+        response["Content-Encoding"] = encoding
+        # the compressed bytes differ from the identity ones, so a strong ETag would be wrong
+        if response.has_header("ETag"):
+            response["ETag"] = weak_etag(response["ETag"])
+        return response
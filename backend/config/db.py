@@ -0,0 +1,146 @@
+"""Database settings and per-connection tuning.
+
+``database_settings()`` builds DATABASES from the DB_* environment variables.
+config/apps.py connects ``configure_connection`` to ``connection_created``,
+which runs once per new connection. With persistent connections
+(DB_CONN_MAX_AGE) that is once per worker thread, not once per request.
+
+SQLite runs in WAL mode, so readers no longer wait for a writer and
+synchronous=NORMAL is safe: a power loss can drop the last commits but never
+corrupts the file. busy_timeout makes a second writer wait instead of failing
+with "database is locked". mmap lets reads come straight from the page cache.
+
+On PostgreSQL, GET requests to the catalog and lesson endpoints can read from
+replicas (DB_REPLICA_HOSTS). ``ReplicaRouter`` only routes reads made inside
+``replica_reads()``; everything else, and every write, goes to ``default``.
+So a request that writes and then reads back never sees a lagging replica.
+"""
+import contextvars
+import os
+import random
+from contextlib import contextmanager
+
+import django
+from django.conf import settings
+
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,  # ms
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+    "cache_size": -32000,  # KiB (negative = size, not pages)
+}
+
+
+def _env_bool(name, default):
+    return os.getenv(name, "True" if default else "False") == "True"
+
+
+def _psycopg3_pool_available():
+    try:
+        import psycopg  # noqa: F401  (Django only pools with psycopg 3, not psycopg2)
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def database_settings(base_dir):
+    engine = os.getenv("DB_ENGINE", "django.db.backends.sqlite3")
+    default = {
+        "ENGINE": engine,
+        "NAME": os.getenv("DB_NAME", base_dir / "db.sqlite3"),
+        # keep connections open between requests; health checks replace ones the server dropped
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {},
+    }
+    if "sqlite" in engine:
+        if django.VERSION >= (5, 1):
+            # BEGIN IMMEDIATE takes the write lock up front: a read transaction that later
+            # writes would otherwise fail with SQLITE_BUSY instead of waiting out busy_timeout
+            default["OPTIONS"]["transaction_mode"] = "IMMEDIATE"
+        return {"default": default}
+
+    default.update({
+        "USER": os.getenv("DB_USER", ""),
+        "PASSWORD": os.getenv("DB_PASSWORD", ""),
+        "HOST": os.getenv("DB_HOST", ""),
+        "PORT": os.getenv("DB_PORT", ""),
+    })
+    if "postgresql" in engine:
+        default["OPTIONS"]["connect_timeout"] = int(os.getenv("DB_CONNECT_TIMEOUT", "5"))
+        if _env_bool("DB_POOL", True) and django.VERSION >= (5, 1) and _psycopg3_pool_available():
+            # psycopg 3 pool shared by the worker's threads; replaces persistent connections
+            default["OPTIONS"]["pool"] = {
+                "min_size": int(os.getenv("DB_POOL_MIN", "2")),
+                "max_size": int(os.getenv("DB_POOL_MAX", "10")),
+                "timeout": int(os.getenv("DB_POOL_TIMEOUT", "10")),
+            }
+            default["CONN_MAX_AGE"] = 0
+        if _env_bool("DB_PGBOUNCER", False):
+            # transaction-pooling bouncers can't keep a named cursor across statements
+            default["DISABLE_SERVER_SIDE_CURSORS"] = True
+
+    databases = {"default": default}
+    hosts = [h.strip() for h in os.getenv("DB_REPLICA_HOSTS", "").split(",") if h.strip()]
+    for i, host in enumerate(hosts):
+        databases[f"replica_{i}"] = {
+            **default,
+            "OPTIONS": dict(default["OPTIONS"]),
+            "HOST": host,
+            "TEST": {"MIRROR": "default"},
+        }
+    return databases
+
+
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    pragmas = {**SQLITE_PRAGMAS, **getattr(settings, "SQLITE_PRAGMAS", {})}
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+# -- read replicas -----------------------------------------------------------------
+
+_read_alias = contextvars.ContextVar("read_alias", default=None)
+
+
+@contextmanager
+def replica_reads():
+    """Route ORM reads in this block to one replica, when any are configured."""
+    replicas = [alias for alias in settings.DATABASES if alias.startswith("replica_")]
+    # one replica per block, so its reads are consistent with each other
+    token = _read_alias.set(random.choice(replicas) if replicas else None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get() or "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas mirror default, so objects from any alias may be related
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+class ReplicaReadMixin:
+    """For read-only APIViews: GET/HEAD requests read from a replica."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in ("GET", "HEAD"):
+            with replica_reads():
+                return super().dispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
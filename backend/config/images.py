@@ -0,0 +1,241 @@
+"""Resized WebP/JPEG variants of uploaded and linked images.
+
+Avatars (Profile.avatar) and course thumbnails (Course.thumbnail) are served
+at the size they were uploaded, often several megabytes of camera photo. For
+each source image, ``render()`` produces every size in SIZES (longest side in
+px; avatars are cropped square) as WebP and JPEG. It applies the EXIF
+orientation and then drops EXIF, ICC and other metadata.
+
+Variant files are named after the SHA-256 of the source bytes:
+images/<2 hex>/<hash>[-sq]/<size>.<ext>. The same picture uploaded twice, or
+linked from several courses, is rendered once, and later builds only check
+that the files exist. The model keeps a small JSON record of the result in
+``<field>_variants``: {"source", "hash", "sizes": {size: {format: name}}}.
+``needs_refresh()`` compares that source with the current field value.
+
+Work runs on a background thread (IMAGE_VARIANTS_ASYNC, default on), so an
+upload request returns before the resizing is done. The ``build_image_variants``
+command backfills existing media with a process pool.
+
+Thumbnails given as external URLs are only fetched with IMAGE_FETCH_REMOTE
+(default off), and never from hosts that resolve to private, loopback or
+link-local addresses, redirects included.
+"""
+import atexit
+import hashlib
+import io
+import ipaddress
+import logging
+import socket
+import urllib.parse
+import urllib.request
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+
+from .batching import BatchWriter
+from .metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+VARIANTS = REGISTRY.counter("image_variants_total", "Image variant builds", labels=("result",))
+
+SIZES = (64, 256, 1024)
+FORMATS = {"webp": {"quality": 80, "method": 4}, "jpeg": {"quality": 82, "optimize": True, "progressive": True}}
+EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+
+
+def _max_bytes():
+    return int(getattr(settings, "IMAGE_MAX_BYTES", 20 * 1024 * 1024))
+
+
+def source_of(instance, field):
+    """The current source of ``field``: a storage name (ImageField) or a URL; "" when unset."""
+    value = getattr(instance, field)
+    return (getattr(value, "name", value) or "").strip()
+
+
+def needs_refresh(instance, field):
+    return source_of(instance, field) != getattr(instance, f"{field}_variants", {}).get("source", "")
+
+
+def check_public(url):
+    """Refuse ``url`` unless its host resolves only to public addresses.
+
+    Thumbnail URLs are typed in by instructors and fetched from inside the
+    network, so loopback, private, link-local (cloud metadata) and reserved
+    addresses are off limits.
+    """
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError(f"not an http(s) URL: {url}")
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    for *_, sockaddr in socket.getaddrinfo(parts.hostname, port, proto=socket.IPPROTO_TCP):
+        address = ipaddress.ip_address(sockaddr[0].split("%")[0])
+        if not address.is_global:
+            raise ValueError(f"refusing to fetch {parts.hostname}: {address} is not a public address")
+
+
+class _CheckedRedirects(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        check_public(newurl)  # a public URL must not bounce the fetch to an internal one
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+_opener = urllib.request.build_opener(_CheckedRedirects)
+
+
+def read(source):
+    """Bytes of ``source``: a storage name, a MEDIA_URL path or (with IMAGE_FETCH_REMOTE) a public http(s) URL."""
+    limit = _max_bytes()
+    if source.startswith(("http://", "https://")):
+        if not getattr(settings, "IMAGE_FETCH_REMOTE", False):
+            raise ValueError("remote images are disabled (IMAGE_FETCH_REMOTE)")
+        check_public(source)
+        with _opener.open(source, timeout=10) as response:
+            data = response.read(limit + 1)
+    else:
+        name = source[len(settings.MEDIA_URL):] if source.startswith(settings.MEDIA_URL) else source
+        with default_storage.open(name, "rb") as fh:
+            data = fh.read(limit + 1)
+    if len(data) > limit:
+        raise ValueError(f"image larger than IMAGE_MAX_BYTES ({limit} bytes)")
+    return data
+
+
+def render(data, crop=False):
+    """{size: {format: bytes}} for the image in ``data``. Pure function, safe to run in a worker process."""
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as img:
+        # JPEGs can be decoded at 1/2..1/8 scale straight from the DCT, far cheaper than a full decode
+        img.draft("RGB", (max(SIZES), max(SIZES)))
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "PA") else "RGB")
+        out = {}
+        for size in SIZES:
+            if crop:
+                side = min(size, *img.size)
+                variant = ImageOps.fit(img, (side, side), Image.Resampling.LANCZOS)
+            else:
+                variant = img.copy()
+                variant.thumbnail((size, size), Image.Resampling.LANCZOS)  # never upscales
+            flat = variant
+            if variant.mode == "RGBA":  # JPEG has no alpha channel
+                flat = Image.new("RGB", variant.size, "white")
+                flat.paste(variant, mask=variant.getchannel("A"))
+            encoded = {}
+            for fmt, options in FORMATS.items():
+                buf = io.BytesIO()
+                # no exif=/icc_profile= arguments, so none of the source metadata is written
+                (variant if fmt == "webp" else flat).save(buf, fmt.upper(), **options)
+                encoded[fmt] = buf.getvalue()
+            out[size] = encoded
+    return out
+
+
+def _names(digest, crop=False):
+    # square crops of a picture are different files from its plain resizes
+    folder = f"images/{digest[:2]}/{digest}{'-sq' if crop else ''}"
+    return {str(size): {fmt: f"{folder}/{size}.{ext}" for fmt, ext in EXTENSIONS.items()} for size in SIZES}
+
+
+def stored(digest, crop=False):
+    """{size: {format: name}} when every variant of ``digest`` is in storage already, else None."""
+    names = _names(digest, crop)
+    if all(default_storage.exists(name) for variants in names.values() for name in variants.values()):
+        return names
+    return None
+
+
+def store(data, rendered=None, crop=False):
+    """Write the variants of ``data`` unless they exist already; returns (hash, {size: {format: name}})."""
+    digest = hashlib.sha256(data).hexdigest()
+    names = stored(digest, crop)
+    if names is not None:
+        VARIANTS.inc("reused")
+        return digest, names
+    names = _names(digest, crop)
+    rendered = rendered if rendered is not None else render(data, crop=crop)
+    for size, variants in rendered.items():
+        for fmt, blob in variants.items():
+            name = names[str(size)][fmt]
+            if default_storage.exists(name):
+                default_storage.delete(name)  # a partial earlier run; the content is the same either way
+            names[str(size)][fmt] = default_storage.save(name, ContentFile(blob))
+    VARIANTS.inc("built")
+    return digest, names
+
+
+def refresh(model, pk, field, crop=False, force=False):
+    """Build variants for ``field`` of one row if its source changed. Returns True when the row was updated."""
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or not (force or needs_refresh(instance, field)):
+        return False
+    source = source_of(instance, field)
+    record = {}
+    if source:
+        try:
+            digest, sizes = store(read(source), crop=crop)
+        except Exception:
+            VARIANTS.inc("failed")
+            logger.warning("image variants failed for %s %s.%s (%s)", model.__name__, pk, field, source, exc_info=True)
+            return False
+        record = {"source": source, "hash": digest, "sizes": sizes}
+    # only if the field still holds the source we processed; a newer upload schedules its own run
+    current = model.objects.filter(pk=pk).values_list(field, flat=True).first()
+    if (current or "") != source:
+        return False
+    model.objects.filter(pk=pk).update(**{f"{field}_variants": record})
+    return True
+
+
+def urls(record, request=None):
+    """{size: {format: url}} for a ``<field>_variants`` record; absolute when ``request`` is given."""
+    out = {}
+    for size, variants in (record or {}).get("sizes", {}).items():
+        out[size] = {}
+        for fmt, name in variants.items():
+            url = default_storage.url(name)
+            out[size][fmt] = request.build_absolute_uri(url) if request is not None else url
+    return out
+
+
+def variant_urls(instance, field, request=None):
+    """urls() of ``instance``'s variants, or {} while they are still those of an earlier source."""
+    if needs_refresh(instance, field):
+        return {}
+    return urls(getattr(instance, f"{field}_variants"), request)
+
+
+class _ImageWorker(BatchWriter):
+    def _write(self, batch):
+        close_old_connections()
+        for fn, args in batch:
+            try:
+                fn(*args)
+                self.written()
+            except Exception:
+                self.dropped()
+                VARIANTS.inc("failed")
+                logger.exception("image job %s%r failed", getattr(fn, "__name__", fn), args)
+        close_old_connections()
+
+
+_worker = _ImageWorker(batch_size=8, flush_seconds=0.2, max_queue=1000, name="image-variants")
+atexit.register(_worker.flush)
+
+
+def schedule(fn, *args):
+    """Run ``fn(*args)`` on the image worker once the current transaction commits."""
+    if getattr(settings, "IMAGE_VARIANTS_ASYNC", True):
+        transaction.on_commit(lambda: _worker.submit((fn, args)))
+    else:
+        transaction.on_commit(lambda: fn(*args))
+
+
+def flush():
+    _worker.flush()
@@ -0,0 +1,147 @@
+"""Minimal in-process metrics registry with a Prometheus text endpoint.
+
+Metrics live in the memory of each worker process, so a scraper sees the
+numbers of whichever worker served the scrape. That is good enough for a
+single-host deployment; run one scrape target per worker otherwise.
+"""
+import bisect
+import hmac
+import os
+import threading
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+
+def _fmt_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for values, v in items:
+            yield f"{self.name}{_fmt_labels(self.labels, values)} {v}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(label_values)
+            if row is None:
+                row = self._values[label_values] = [0] * (len(self.buckets) + 2)
+            if idx < len(self.buckets):
+                row[idx] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        for values, row in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, row):
+                cumulative += n
+                yield f"{self.name}_bucket{_fmt_labels(self.labels, values, ('le', bound))} {cumulative}"
+            yield f"{self.name}_bucket{_fmt_labels(self.labels, values, ('le', '+Inf'))} {row[-1]}"
+            yield f"{self.name}_sum{_fmt_labels(self.labels, values)} {row[-2]:.6f}"
+            yield f"{self.name}_count{_fmt_labels(self.labels, values)} {row[-1]}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._get_or_create(Counter, name, help_text, labels)
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, labels, buckets=buckets)
+
+    def render(self):
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class RequestStats:
+    __slots__ = ("queries", "sql_seconds", "serialize_seconds", "serializing", "render_seconds", "slow_queries")
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.serializing = False
+        self.render_seconds = 0.0
+        self.slow_queries = []
+
+
+# Stats of the request being handled by the current thread/task (None outside requests)
+current_stats: ContextVar[RequestStats | None] = ContextVar("current_request_stats", default=None)
+
+
+def metrics_view(request):
+    """Prometheus text exposition.
+
+    Scrapers authenticate with ``Authorization: Bearer $METRICS_TOKEN``. Without
+    METRICS_TOKEN the endpoint is only open with DEBUG on.
+    """
+    token = os.getenv("METRICS_TOKEN")
+    if token:
+        if not hmac.compare_digest(request.headers.get("Authorization", "").encode(), f"Bearer {token}".encode()):
+            return HttpResponseForbidden("forbidden")
+    elif not settings.DEBUG:
+        return HttpResponseForbidden("forbidden: set METRICS_TOKEN to enable /metrics")
+    return HttpResponse(REGISTRY.render(), content_type="text/plain; version=0.0.4")
@@ -0,0 +1,126 @@
+import logging
+import time
+import traceback
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+from .metrics import COUNT_BUCKETS, REGISTRY, RequestStats, current_stats
+
+logger = logging.getLogger("learnx.sql")
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds", "Total request latency", labels=("route", "method", "status"),
+)
+SQL_SECONDS = REGISTRY.histogram("http_request_sql_seconds", "Time spent in SQL per request", labels=("route",))
+SQL_QUERIES = REGISTRY.histogram(
+    "http_request_sql_queries", "SQL queries per request", labels=("route",), buckets=COUNT_BUCKETS,
+)
+SERIALIZE_SECONDS = REGISTRY.histogram(
+    "http_request_serialize_seconds", "Time spent in serializer .data, excluding its SQL", labels=("route",),
+)
+RENDER_SECONDS = REGISTRY.histogram(
+    "http_request_render_seconds", "Time spent rendering response payloads", labels=("route",),
+)
+
+
+def _app_stack():
+    # keep only frames from this project so the log line stays readable
+    frames = traceback.extract_stack()[:-3]
+    base = str(settings.BASE_DIR)
+    own = [
+        f for f in frames
+        if f.filename.startswith(base) and "site-packages" not in f.filename and f.filename != __file__
+    ]
+    return "".join(traceback.format_list(own[-8:]))
+
+
+class RequestMetricsMiddleware:
+    """Records query count, SQL, serializer and render time and total latency per route.
+
+    The numbers are exported as a Server-Timing header and as histograms on
+    /metrics. Queries slower than SLOW_QUERY_MS are logged with the stack that
+    issued them; stack capture only happens for those, so the steady-state cost
+    is two perf_counter() calls per query.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = float(getattr(settings, "SLOW_QUERY_MS", 200))
+        # under ASGI stay async so async views are not pushed onto a thread
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            with self._wrapped_connections():
+                response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        total = time.perf_counter() - started
+        self._record(request, response, stats, total)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            # connections are context-local, so sync_to_async DB work sees these wrappers
+            with self._wrapped_connections():
+                response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        total = time.perf_counter() - started
+        self._record(request, response, stats, total)
+        return response
+
+    def _wrapped_connections(self):
+        stack = ExitStack()
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(self._wrap_query))
+        return stack
+
+    def _wrap_query(self, execute, sql, params, many, context):
+        stats = current_stats.get()
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            if stats is not None:
+                stats.queries += 1
+                stats.sql_seconds += elapsed
+                if elapsed * 1000 >= self.slow_ms:
+                    stats.slow_queries.append((elapsed, sql, _app_stack()))
+
+    def _record(self, request, response, stats, total):
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match else "unmatched"
+        REQUEST_SECONDS.observe(total, route, request.method, response.status_code)
+        SQL_SECONDS.observe(stats.sql_seconds, route)
+        SQL_QUERIES.observe(stats.queries, route)
+        SERIALIZE_SECONDS.observe(stats.serialize_seconds, route)
+        RENDER_SECONDS.observe(stats.render_seconds, route)
+
+        app = max(total - stats.sql_seconds - stats.serialize_seconds - stats.render_seconds, 0)
+        response["Server-Timing"] = ", ".join([
+            f'db;dur={stats.sql_seconds * 1000:.1f};desc="{stats.queries} queries"',
+            f"ser;dur={stats.serialize_seconds * 1000:.1f}",
+            f"render;dur={stats.render_seconds * 1000:.1f}",
+            f"app;dur={app * 1000:.1f}",
+            f"total;dur={total * 1000:.1f}",
+        ])
+
+        for elapsed, sql, stack in sorted(stats.slow_queries, key=lambda q: q[0], reverse=True)[:5]:
+            logger.warning("slow query %.1fms on %s %s\n%s\n%s", elapsed * 1000, request.method, route, sql[:2000], stack)
@@ -0,0 +1,48 @@
+"""DRF serializers that report their time to the request metrics.
+
+A view's ``serializer.data`` runs model-to-dict conversion inside the view, so
+without this it would be indistinguishable from the rest of the view in the
+Server-Timing "app" entry. ``.data`` of these serializers adds its wall time,
+minus the SQL it triggered (already under "db"), to the "ser" entry. Only the
+outermost ``.data`` of a request counts, so a serializer built inside another
+is not counted twice.
+"""
+import time
+
+from rest_framework import serializers
+
+from .metrics import current_stats
+
+
+def _timed(get_data):
+    stats = current_stats.get()
+    if stats is None or stats.serializing:
+        return get_data()
+    stats.serializing = True
+    start, sql_before = time.perf_counter(), stats.sql_seconds
+    try:
+        return get_data()
+    finally:
+        elapsed = time.perf_counter() - start - (stats.sql_seconds - sql_before)
+        stats.serialize_seconds += max(elapsed, 0)
+        stats.serializing = False
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        return _timed(lambda: super(TimedListSerializer, self).data)
+
+
+class TimedModelSerializer(serializers.ModelSerializer):
+    @property
+    def data(self):
+        return _timed(lambda: super(TimedModelSerializer, self).data)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        serializer = super().many_init(*args, **kwargs)
+        if type(serializer) is serializers.ListSerializer:
+            # no Meta.list_serializer_class: the plain list, timed
+            serializer.__class__ = TimedListSerializer
+        return serializer
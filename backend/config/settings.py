@@ -3,6 +3,8 @@ from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
 
+from .db import database_settings
+
 load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -36,6 +38,7 @@ INSTALLED_APPS = [
     'quizzes',
     'ai',
     'syllabus_demo',
+    'config.apps.ProjectConfig',  # project-wide hooks (database connection tuning)
 ]
 
 
@@ -44,6 +47,8 @@ INSTALLED_APPS = [
 # ------------------------------------------------------------------------------
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # must be first for CORS
+    'config.middleware.RequestMetricsMiddleware',  # query count / timings -> Server-Timing + /metrics
+    'config.compression.CompressionMiddleware',  # br/gzip for GET responses over COMPRESS_MIN_BYTES
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -81,12 +86,37 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # ------------------------------------------------------------------------------
 # DATABASE
 # ------------------------------------------------------------------------------
-DATABASES = {
+# DB_ENGINE/DB_NAME (+ DB_USER, DB_PASSWORD, DB_HOST, DB_PORT for servers),
+# DB_CONN_MAX_AGE, DB_POOL, DB_PGBOUNCER, DB_REPLICA_HOSTS; see config/db.py
+DATABASES = database_settings(BASE_DIR)
+DATABASE_ROUTERS = ['config.db.ReplicaRouter']
+
+
+# ------------------------------------------------------------------------------
+# CACHE
+# ------------------------------------------------------------------------------
+# LocMemCache is per-process; point CACHE_BACKEND at Redis/Memcached (or
+# DatabaseCache after `manage.py createcachetable`) to share state across workers.
+CACHES = {
     'default': {
-        'ENGINE': os.getenv('DB_ENGINE', 'django.db.backends.sqlite3'),
-        'NAME': os.getenv('DB_NAME', BASE_DIR / 'db.sqlite3'),
-    }
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'learnx-default'),
+    },
+    # course/lesson response cache (courses/cache.py). Versions are bumped by
+    # signals in the writing process, so multi-worker deployments should use a
+    # shared backend; with LocMem other workers can lag by COURSE_CACHE_TIMEOUT.
+    # e.g. COURSE_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+    #      COURSE_CACHE_LOCATION=/var/tmp/learnx-courses
+    'courses': {
+        'BACKEND': os.getenv('COURSE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('COURSE_CACHE_LOCATION', 'learnx-courses'),
+        'TIMEOUT': int(os.getenv('COURSE_CACHE_TIMEOUT', '300')),
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('COURSE_CACHE_MAX_ENTRIES', '5000'))},
+    },
 }
+COURSE_CACHE_ALIAS = os.getenv('COURSE_CACHE_ALIAS', 'courses')
+# view/enrollment/trending counters are buffered per process and applied this often (courses/counters.py)
+COURSE_COUNTERS_FLUSH_SECONDS = float(os.getenv('COURSE_COUNTERS_FLUSH_SECONDS', '10'))
 
 
 # ------------------------------------------------------------------------------
@@ -115,6 +145,8 @@ USE_TZ = True
 STATIC_URL = '/static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# printed on certificates; {id} is the verification UUID
+CERTIFICATE_VERIFY_URL = os.getenv('CERTIFICATE_VERIFY_URL', 'http://localhost:8000/api/courses/certificates/{id}/')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -135,13 +167,34 @@ CSRF_TRUSTED_ORIGINS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'config.renderers.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'config.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
+# Responses smaller than this are not compressed (config/compression.py)
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', '1024'))
+
+
+# ------------------------------------------------------------------------------
+# OBSERVABILITY
+# ------------------------------------------------------------------------------
+# Queries slower than this are logged (logger "learnx.sql") with the issuing stack
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '200'))
+# `manage.py bench_startup` fails when a cold worker takes longer than this to boot
+STARTUP_BUDGET_MS = float(os.getenv('STARTUP_BUDGET_MS', '800'))
+
 
 # ------------------------------------------------------------------------------
 # JWT CONFIG
@@ -151,4 +204,88 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    # access tokens carry username/role/profile id for ClaimsJWTAuthentication
+    'TOKEN_OBTAIN_SERIALIZER': 'users.tokens.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.tokens.ClaimsTokenRefreshSerializer',
+}
+
+# Build request.user from token claims instead of loading it per request (users/authentication.py)
+JWT_CLAIMS_AUTH = os.getenv('JWT_CLAIMS_AUTH', 'True') == 'True'
+# how long a full User row, once needed, is reused within a process
+JWT_USER_CACHE_SECONDS = float(os.getenv('JWT_USER_CACHE_SECONDS', '30'))
+# how often each process reloads the token deny-list (users/revocation.py)
+JWT_DENYLIST_REFRESH_SECONDS = float(os.getenv('JWT_DENYLIST_REFRESH_SECONDS', '5'))
+
+
+# ------------------------------------------------------------------------------
+# AI RATE LIMITS (sliding window, requests per window per IP / per user)
+# ------------------------------------------------------------------------------
+AI_RATE_LIMIT_BACKEND = 'ai.ratelimit.CacheRateLimiter'
+AI_RATE_LIMIT_CACHE = os.getenv('AI_RATE_LIMIT_CACHE', 'default')
+_AI_RATE = int(os.getenv('AI_RATE_LIMIT_PER_MINUTE', '30'))
+AI_RATE_LIMITS = {
+    'ask': {
+        'window': 60,
+        'per_ip': int(os.getenv('AI_ASK_RATE_PER_IP', _AI_RATE)),
+        'per_user': int(os.getenv('AI_ASK_RATE_PER_USER', _AI_RATE)),
+    },
+    'generate-lesson': {
+        'window': 60,
+        'per_ip': int(os.getenv('AI_LESSON_RATE_PER_IP', _AI_RATE)),
+        'per_user': int(os.getenv('AI_LESSON_RATE_PER_USER', _AI_RATE)),
+    },
+}
+
+# Daily token budgets (prompt + completion). 0 / missing = unlimited.
+AI_DAILY_TOKEN_BUDGET_PER_USER = int(os.getenv('AI_DAILY_TOKEN_BUDGET_PER_USER', '200000'))
+AI_DAILY_TOKEN_BUDGET_PER_PROVIDER = {
+    'groq': int(os.getenv('AI_DAILY_TOKEN_BUDGET_GROQ', '0')),
+    'gemini': int(os.getenv('AI_DAILY_TOKEN_BUDGET_GEMINI', '0')),
+    'openai': int(os.getenv('AI_DAILY_TOKEN_BUDGET_OPENAI', '0')),
+}
+
+
+# ------------------------------------------------------------------------------
+# AI INTERACTION LOGGING / RETENTION
+# ------------------------------------------------------------------------------
+AI_LOG_ASYNC = os.getenv('AI_LOG_ASYNC', 'True') == 'True'
+AI_LOG_BATCH_SIZE = int(os.getenv('AI_LOG_BATCH_SIZE', '200'))
+AI_LOG_FLUSH_SECONDS = float(os.getenv('AI_LOG_FLUSH_SECONDS', '1.0'))
+AI_INTERACTION_RETENTION_DAYS = int(os.getenv('AI_INTERACTION_RETENTION_DAYS', '90'))
+AI_ARCHIVE_DIR = Path(os.getenv('AI_ARCHIVE_DIR', BASE_DIR / 'archive'))
+
+
+# ------------------------------------------------------------------------------
+# AI PROVIDERS
+# ------------------------------------------------------------------------------
+# Max prompt (input) tokens per provider, or per "provider:model"; context is
+# trimmed to fit (ai/prompts.py). Output tokens come on top of this.
+AI_PROMPT_TOKEN_BUDGETS = {
+    'default': int(os.getenv('AI_PROMPT_TOKENS_DEFAULT', '4000')),
+    'groq': int(os.getenv('AI_PROMPT_TOKENS_GROQ', '6000')),
+    'gemini': int(os.getenv('AI_PROMPT_TOKENS_GEMINI', '12000')),
+    'openai': int(os.getenv('AI_PROMPT_TOKENS_OPENAI', '8000')),
+}
+
+# Load testing only: >0 replaces real provider calls with a canned answer
+# returned after this many milliseconds.
+AI_SIMULATED_LATENCY_MS = int(os.getenv('AI_SIMULATED_LATENCY_MS', '0'))
+
+# Requests per minute per provider for batch jobs (generate_transcripts);
+# 0 disables pacing for that provider.
+AI_PROVIDER_RPM = {
+    'groq': int(os.getenv('AI_RPM_GROQ', '30')),
+    'gemini': int(os.getenv('AI_RPM_GEMINI', '15')),
+    'openai': int(os.getenv('AI_RPM_OPENAI', '60')),
 }
+
+
+# ------------------------------------------------------------------------------
+# AI TUTOR RETRIEVAL (ai/retrieval.py; build with `manage.py build_rag_index`)
+# ------------------------------------------------------------------------------
+RAG_INDEX_DIR = Path(os.getenv('RAG_INDEX_DIR', BASE_DIR / 'rag_index'))
+RAG_DIMS = int(os.getenv('RAG_DIMS', '256'))
+RAG_CHUNK_WORDS = int(os.getenv('RAG_CHUNK_WORDS', '120'))
+RAG_CHUNK_OVERLAP = int(os.getenv('RAG_CHUNK_OVERLAP', '30'))
+RAG_TOP_K = int(os.getenv('RAG_TOP_K', '4'))
+RAG_MIN_SCORE = float(os.getenv('RAG_MIN_SCORE', '0.05'))
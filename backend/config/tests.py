@@ -0,0 +1,184 @@
+import io
+import socket
+import subprocess
+import sys
+import urllib.request
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework import serializers as drf
+
+from courses.management.commands.bench_startup import BOOT, HEAVY
+
+from courses.models import Course
+
+from . import batching, images
+from .metrics import RequestStats, current_stats
+from .serializers import TimedListSerializer, TimedModelSerializer
+
+
+def resolves_to(address):
+    return mock.patch.object(
+        images.socket, "getaddrinfo",
+        return_value=[(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", (address, 443))],
+    )
+
+
+class RemoteImageTests(SimpleTestCase):
+    def test_remote_fetch_is_off_by_default(self):
+        with mock.patch.object(images._opener, "open") as fetch:
+            with self.assertRaisesMessage(ValueError, "IMAGE_FETCH_REMOTE"):
+                images.read("https://example.com/a.jpg")
+        fetch.assert_not_called()
+
+    @override_settings(IMAGE_FETCH_REMOTE=True)
+    def test_internal_addresses_are_refused(self):
+        for url in (
+            "http://127.0.0.1/a.jpg", "http://localhost:8000/a.jpg", "http://10.0.0.5/a.jpg",
+            "http://192.168.1.1/a.jpg", "http://169.254.169.254/latest/meta-data/", "http://[::1]/a.jpg",
+            "http://0.0.0.0/a.jpg",
+        ):
+            with self.subTest(url=url), mock.patch.object(images._opener, "open") as fetch:
+                with self.assertRaisesMessage(ValueError, "not a public address"):
+                    images.read(url)
+                fetch.assert_not_called()
+
+    @override_settings(IMAGE_FETCH_REMOTE=True)
+    def test_hostname_resolving_to_a_private_address_is_refused(self):
+        with resolves_to("172.16.0.3"), mock.patch.object(images._opener, "open") as fetch:
+            with self.assertRaisesMessage(ValueError, "not a public address"):
+                images.read("https://images.example.com/a.jpg")
+        fetch.assert_not_called()
+
+    @override_settings(IMAGE_FETCH_REMOTE=True)
+    def test_public_host_is_fetched(self):
+        with resolves_to("93.184.216.34"), mock.patch.object(
+            images._opener, "open", return_value=io.BytesIO(b"jpeg bytes"),
+        ) as fetch:
+            self.assertEqual(images.read("https://images.example.com/a.jpg"), b"jpeg bytes")
+        fetch.assert_called_once_with("https://images.example.com/a.jpg", timeout=10)
+
+    def test_redirect_to_an_internal_address_is_refused(self):
+        handler = images._CheckedRedirects()
+        request = urllib.request.Request("https://images.example.com/a.jpg")
+
+        with self.assertRaisesMessage(ValueError, "not a public address"):
+            handler.redirect_request(request, None, 302, "Found", {}, "http://169.254.169.254/latest/meta-data/")
+        with resolves_to("93.184.216.34"):
+            redirected = handler.redirect_request(request, None, 302, "Found", {}, "https://cdn.example.com/a.jpg")
+        self.assertEqual(redirected.full_url, "https://cdn.example.com/a.jpg")
+
+
+class BatchWriterTests(SimpleTestCase):
+    def test_overflow_and_writes_are_counted_per_writer(self):
+        class Collect(batching.BatchWriter):
+            def _write(self, batch):
+                self.written(len(batch))
+
+        writer = Collect(max_queue=2, name="test-writer")
+        dropped, written = batching.DROPPED.value("test-writer"), batching.WRITTEN.value("test-writer")
+        with mock.patch.object(writer, "_ensure_thread"):  # no thread: the queue only fills up
+            for item in range(5):
+                writer.submit(item)
+        writer.flush()
+
+        self.assertEqual(batching.DROPPED.value("test-writer") - dropped, 3)
+        self.assertEqual(batching.WRITTEN.value("test-writer") - written, 2)
+
+
+class MetricsEndpointTests(SimpleTestCase):
+    def test_closed_without_a_token_outside_debug(self):
+        with mock.patch.dict("os.environ", {"METRICS_TOKEN": ""}):
+            response = self.client.get("/metrics")
+
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(DEBUG=True)
+    def test_open_in_debug_without_a_token(self):
+        with mock.patch.dict("os.environ", {"METRICS_TOKEN": ""}):
+            response = self.client.get("/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"# TYPE http_request_render_seconds histogram", response.content)
+
+    @override_settings(DEBUG=True)
+    def test_token_is_required_once_set(self):
+        with mock.patch.dict("os.environ", {"METRICS_TOKEN": "s3cret"}):
+            self.assertEqual(self.client.get("/metrics").status_code, 403)
+            self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+            self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret").status_code, 200)
+
+    def test_server_timing_entries(self):
+        response = self.client.get("/metrics")
+        entries = [part.split(";")[0].strip() for part in response["Server-Timing"].split(",")]
+
+        self.assertEqual(entries, ["db", "ser", "render", "app", "total"])
+
+
+def server_timing(response):
+    return {
+        part.split(";")[0].strip(): float(part.split("dur=")[1].split(";")[0])
+        for part in response["Server-Timing"].split(",")
+    }
+
+
+class SerializerTimingTests(TestCase):
+    def test_view_reports_serializer_time(self):
+        for i in range(30):
+            Course.objects.create(title=f"Course {i}", description="About " * 50, instructor="Ana")
+
+        timing = server_timing(self.client.get("/api/courses/", HTTP_ACCEPT="application/json"))
+
+        self.assertGreater(timing["ser"], 0)
+
+    def test_outermost_data_counts_once_without_its_sql(self):
+        stats = RequestStats()
+
+        class Inner(TimedModelSerializer):
+            class Meta:
+                model = User
+                fields = ["username"]
+
+        class Outer(TimedModelSerializer):
+            inner = drf.SerializerMethodField()
+
+            def get_inner(self, user):
+                stats.sql_seconds += 0.25  # as if a query ran meanwhile
+                return Inner(user).data
+
+            class Meta:
+                model = User
+                fields = ["username", "inner"]
+
+        users = [User(username="ann"), User(username="bob")]
+        token = current_stats.set(stats)
+        try:
+            with mock.patch("config.serializers.time.perf_counter", side_effect=[10.0, 11.0]):
+                serializer = Outer(users, many=True)
+                data = serializer.data
+        finally:
+            current_stats.reset(token)
+
+        self.assertIsInstance(serializer, TimedListSerializer)
+        self.assertEqual(data[1], {"username": "bob", "inner": {"username": "bob"}})
+        self.assertAlmostEqual(stats.serialize_seconds, 1.0 - 0.5)
+        self.assertFalse(stats.serializing)
+
+
+class StartupImportTests(SimpleTestCase):
+    def test_boot_imports_no_heavy_module(self):
+        script = BOOT + (
+            "import sys\n"
+            f"heavy = {HEAVY!r}\n"
+            "print(*sorted(m for m in heavy if m in sys.modules))\n"
+        )
+        proc = subprocess.run([sys.executable, "-c", script], cwd=settings.BASE_DIR, capture_output=True, text=True)
+
+        self.assertEqual(proc.returncode, 0, proc.stderr[-2000:])
+        self.assertEqual(
+            proc.stdout.split(), [],
+            "imported at boot; move the import into the function that needs it "
+            "(bench_startup shows the importing module)",
+        )
@@ -4,6 +4,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenRefreshView
 from users.api_views import CustomTokenObtainPairView
+from config.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -14,6 +15,7 @@ urlpatterns = [
     path('api/quizzes/', include('quizzes.api_urls')),
     path('api/ai/', include('ai.api_urls')),
     path('syllabus/', include('syllabus_demo.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 if settings.DEBUG:
@@ -2,6 +2,7 @@ from django.urls import path
 from .api_views import (
     CourseListView,
     CourseDetailView,
+    CourseStatsView,
     CourseRelatedView,
     LessonListView,
     LessonDetailView,
@@ -12,6 +13,7 @@ from .api_views import (
     NotesListCreateView,
     DiscussionListCreateView,
     CertificateView,
+    CertificateVerifyView,
     GenerateCourseTrailerView,
     GenerateLessonVideoView,
     GenerateAllVideosView,
@@ -24,6 +26,7 @@ urlpatterns = [
     path("enrolled/", EnrolledCoursesView.as_view()),
     path("recently_viewed/", RecentlyViewedCoursesView.as_view()),
     path("<int:pk>/", CourseDetailView.as_view()),
+    path("<int:pk>/stats/", CourseStatsView.as_view()),
     path("<int:pk>/related/", CourseRelatedView.as_view()),
     path("<int:pk>/lessons/", LessonListView.as_view()),
     path("<int:pk>/lessons/<int:lesson_id>/", LessonDetailView.as_view()),
@@ -38,6 +41,7 @@ urlpatterns = [
     path("<int:pk>/lessons/<int:lesson_id>/discussions/", DiscussionListCreateView.as_view()),
     # certificate
     path("<int:pk>/certificate/", CertificateView.as_view()),
+    path("certificates/<uuid:verification_id>/", CertificateVerifyView.as_view()),
     # video generation
     path("<int:pk>/generate_trailer/", GenerateCourseTrailerView.as_view()),
     path("<int:pk>/lessons/<int:lesson_id>/generate_video/", GenerateLessonVideoView.as_view()),
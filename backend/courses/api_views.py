@@ -4,13 +4,21 @@ from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.authentication import BaseAuthentication
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
-from django.http import HttpResponse
+from django.db.models.functions import Lower
+from django.http import FileResponse, HttpResponse
+from django.utils.http import http_date
 from django.conf import settings
 from ai.video_utils import generate_short_video
 
-from .models import Course, Lesson, Enrollment, Review, Note, Discussion
+from config import images
+from config.db import ReplicaReadMixin
+from users.authentication import OptionalJWTAuthentication
+
+from . import counters, facets, history
+from .cache import cached_response
+from .models import Certificate, Course, Lesson, Enrollment, Review, Note, Discussion
 from .serializers import (
+    CachedCourseSerializer,
     CourseSerializer,
     LessonSerializer,
     EnrollmentSerializer,
@@ -20,92 +28,108 @@ from .serializers import (
 )
 
 
-class CourseListView(APIView):
+class CourseListView(ReplicaReadMixin, APIView):
     permission_classes = [AllowAny]
     authentication_classes: list[type[BaseAuthentication]] = []
+    # each order has a matching index (see Course.Meta); -id breaks ties and doubles as "newest"
+    SORTS = {
+        "popular": ("-enrollment_count", "-id"),
+        "trending": ("-trending_score", "-id"),
+        "rating": ("-rating_avg", "-id"),
+        "newest": ("-id",),
+    }
 
     def get(self, request):
-        qs = Course.objects.all()
-        # simple facets: category, level, language, min_rating, max_price, q
-        category = request.query_params.get("category")
-        level = request.query_params.get("level")
-        language = request.query_params.get("language")
-        min_rating = request.query_params.get("min_rating")
-        max_price = request.query_params.get("max_price")
-        q = request.query_params.get("q")
-        if category:
-            qs = qs.filter(category__iexact=category)
-        if level:
-            qs = qs.filter(level=level)
-        if language:
-            qs = qs.filter(language__iexact=language)
-        if min_rating:
-            try:
-                qs = qs.filter(rating_avg__gte=float(min_rating))
-            except Exception:
-                pass
-        if max_price:
-            try:
-                qs = qs.filter(price__lte=float(max_price))
-            except Exception:
-                pass
-        if q:
-            qs = qs.filter(Q(title__icontains=q) | Q(description__icontains=q) | Q(tags__icontains=q))
-        return Response(CourseSerializer(qs, many=True).data)
-
-
-class CourseDetailView(APIView):
+        # filters: category, level, language, min_rating, max_price, q
+        filters = facets.normalize(request.query_params)
+        qs = facets.apply(Course.objects.prefetch_related("lessons"), filters)
+        sort = request.query_params.get("sort")
+        if sort in self.SORTS:
+            qs = qs.order_by(*self.SORTS[sort])
+        data = CourseSerializer(qs, many=True).data
+        if request.query_params.get("facets") in ("1", "true"):
+            # opt-in so the plain list response stays as it was
+            return Response({"results": data, "facets": facets.facet_counts(filters)})
+        return Response(data)
+
+
+class CourseDetailView(ReplicaReadMixin, APIView):
+    permission_classes = [AllowAny]
+    # identifies signed-in users for their history; a bad token just means anonymous
+    authentication_classes = [OptionalJWTAuthentication]
+
+    def get(self, request, pk):
+        response = cached_response(
+            request, "course_detail", pk, lambda: CachedCourseSerializer(get_object_or_404(Course, pk=pk)).data,
+        )
+        history.record_view(request, response, pk)
+        counters.course_viewed(pk)
+        return response
+
+
+class CourseStatsView(ReplicaReadMixin, APIView):
+    """Popularity counters of one course, uncached (they trail live traffic by a flush interval)."""
     permission_classes = [AllowAny]
     authentication_classes: list[type[BaseAuthentication]] = []
 
     def get(self, request, pk):
-        course = get_object_or_404(Course, pk=pk)
-        
-        # Session Logic: Track recently viewed courses
-        viewed = request.session.get('viewed_courses', [])
-        if pk in viewed:
-            viewed.remove(pk)
-        viewed.insert(0, pk)
-        request.session['viewed_courses'] = viewed[:5]  # Keep last 5
-        
-        return Response(CourseSerializer(course).data)
+        stats = Course.objects.filter(pk=pk).values("view_count", "enrollment_count").first()
+        if stats is None:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(stats)
 
 
 class RecentlyViewedCoursesView(APIView):
     permission_classes = [AllowAny]
-    
+    authentication_classes = [OptionalJWTAuthentication]
+
     def get(self, request):
-        viewed_ids = request.session.get('viewed_courses', [])
-        # Preserve order
-        courses = []
-        for pk in viewed_ids:
-            try:
-                courses.append(Course.objects.get(pk=pk))
-            except Course.DoesNotExist:
-                pass
-        return Response(CourseSerializer(courses, many=True).data)
-
-
-class CourseRelatedView(APIView):
+        ids = history.recent_ids(request)
+        courses = Course.objects.prefetch_related("lessons").in_bulk(ids)
+        return Response(CourseSerializer([courses[pk] for pk in ids if pk in courses], many=True).data)
+
+
+class CourseRelatedView(ReplicaReadMixin, APIView):
     permission_classes = [AllowAny]
     authentication_classes: list[type[BaseAuthentication]] = []
 
     def get(self, request, pk):
-        course = get_object_or_404(Course, pk=pk)
-        qs = Course.objects.filter(category__iexact=course.category).exclude(id=pk)[:6]
-        return Response(CourseSerializer(qs, many=True).data)
-
-
-class LessonListView(APIView):
+        def build():
+            # precomputed by `refresh_recommendations`; one indexed lookup on (course, rank)
+            qs = (
+                Course.objects.filter(recommended_for__course_id=pk)
+                .order_by("recommended_for__rank")
+                .prefetch_related("lessons")
+            )
+            data = CachedCourseSerializer(qs, many=True).data
+            if data:
+                return data
+            # not scored yet (new course or the command has not run): same category
+            course = get_object_or_404(Course, pk=pk)
+            qs = (
+                Course.objects.alias(category_lower=Lower("category"))
+                .filter(category_lower=course.category.lower())
+                .exclude(id=pk)
+                .order_by("-rating_avg")
+                .prefetch_related("lessons")[:6]
+            )
+            return CachedCourseSerializer(qs, many=True).data
+
+        return cached_response(request, "course_related", pk, build, catalog=True)
+
+
+class LessonListView(ReplicaReadMixin, APIView):
     permission_classes = [AllowAny]
     authentication_classes: list[type[BaseAuthentication]] = []
 
     def get(self, request, pk):
-        lessons = Lesson.objects.filter(course_id=pk).order_by("order")
-        return Response(LessonSerializer(lessons, many=True).data)
+        return cached_response(
+            request, "lesson_list", pk,
+            lambda: LessonSerializer(Lesson.objects.filter(course_id=pk).order_by("order"), many=True).data,
+        )
 
 
-class LessonDetailView(APIView):
+class LessonDetailView(ReplicaReadMixin, APIView):
     permission_classes = [AllowAny]
     authentication_classes: list[type[BaseAuthentication]] = []
 
@@ -130,11 +154,15 @@ class EnrollView(APIView):
     def post(self, request, pk):
         course = get_object_or_404(Course, pk=pk)
         obj, created = Enrollment.objects.get_or_create(user=request.user, course=course)
+        if created:
+            counters.enrollment_changed(course.id, 1)
         return Response(EnrollmentSerializer(obj).data, status=201 if created else 200)
 
     def delete(self, request, pk):
         course = get_object_or_404(Course, pk=pk)
-        Enrollment.objects.filter(user=request.user, course=course).delete()
+        deleted, _ = Enrollment.objects.filter(user=request.user, course=course).delete()
+        if deleted:
+            counters.enrollment_changed(course.id, -1)
         return Response(status=204)
 
 
@@ -251,32 +279,50 @@ class CertificateView(APIView):
         enrollment = Enrollment.objects.filter(user=request.user, course=course).first()
         if not enrollment or enrollment.progress_percent < 100:
             return Response({"detail": "Completion required"}, status=403)
-        # generate a simple PDF certificate
+        # rendered once on first request (or by `issue_certificates`), then served from storage
+        from .certificates import issue_certificate  # Pillow + reportlab, kept out of worker startup
+
         try:
-            from reportlab.pdfgen import canvas
-            from io import BytesIO
-            buffer = BytesIO()
-            p = canvas.Canvas(buffer)
-            p.setTitle("Certificate of Completion")
-            p.setFont("Helvetica-Bold", 24)
-            p.drawCentredString(300, 770, "Certificate of Completion")
-            p.setFont("Helvetica", 14)
-            p.drawCentredString(300, 720, f"This certifies that {request.user.username}")
-            p.drawCentredString(300, 700, f"has successfully completed")
-            p.setFont("Helvetica-Bold", 16)
-            p.drawCentredString(300, 675, f"{course.title}")
-            p.setFont("Helvetica", 12)
-            p.drawCentredString(300, 640, "Date: ")
-            p.drawCentredString(350, 640, __import__('datetime').datetime.utcnow().strftime('%Y-%m-%d'))
-            p.showPage()
-            p.save()
-            pdf = buffer.getvalue()
-            buffer.close()
-            resp = HttpResponse(pdf, content_type='application/pdf')
-            resp['Content-Disposition'] = f'inline; filename="certificate_{course.id}.pdf"'
-            return resp
+            cert = issue_certificate(request.user, course)
         except Exception:
             return Response({"detail":"Failed to generate certificate"}, status=500)
+        etag = f'"{cert.verification_id}"'
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "private, max-age=86400",
+            "Last-Modified": http_date(cert.issued_at.timestamp()),
+            "X-Certificate-Id": str(cert.verification_id),
+        }
+        if etag in [t.strip() for t in request.META.get("HTTP_IF_NONE_MATCH", "").split(",")]:
+            return HttpResponse(status=304, headers=headers)
+        resp = FileResponse(cert.pdf.open("rb"), content_type='application/pdf', headers=headers)
+        resp['Content-Disposition'] = f'inline; filename="certificate_{course.id}.pdf"'
+        return resp
+
+
+class CertificateVerifyView(APIView):
+    permission_classes = [AllowAny]
+    authentication_classes: list[type[BaseAuthentication]] = []
+
+    def get(self, request, verification_id):
+        cert = (
+            Certificate.objects.select_related("course")
+            .only("verification_id", "recipient_name", "issued_at", "course__id", "course__title")
+            .filter(verification_id=verification_id)
+            .first()
+        )
+        if not cert:
+            return Response({"valid": False}, status=404)
+        return Response(
+            {
+                "valid": True,
+                "verification_id": str(cert.verification_id),
+                "recipient": cert.recipient_name,
+                "course": {"id": cert.course.id, "title": cert.course.title},
+                "issued_at": cert.issued_at,
+            },
+            headers={"Cache-Control": "public, max-age=3600"},
+        )
 
 
 class GenerateCourseTrailerView(APIView):
@@ -354,6 +400,7 @@ class EnrolledCoursesView(APIView):
                 "id": c.id,
                 "title": c.title,
                 "thumbnail": c.thumbnail,
+                "thumbnail_variants": images.variant_urls(c, "thumbnail"),
                 "level": c.level,
                 "type": c.type,
                 "progress_percent": e.progress_percent,
@@ -0,0 +1,140 @@
+"""Versioned response cache for read-only course endpoints.
+
+Every course has a version key, and the catalog as a whole has one more.
+Writes to a Course, Lesson or Review bump them (courses/signals.py), so
+cached payloads are never invalidated one by one. They simply stop being
+addressed and age out. A version is a nanosecond timestamp rather than a
+counter: if a version key is evicted, the value that replaces it can't
+collide with one an old entry was stored under.
+
+The ETag is derived from the versions alone, so a matching If-None-Match is
+answered with 304 before the payload is even read from the cache.
+
+Entries hold the rendered JSON bytes rather than the serializer data, so a
+hit neither re-renders nor re-compresses. The gzip and brotli variants are
+compressed at the best level on first request and cached next to the JSON.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework.response import Response
+
+from config import compression
+from config.metrics import REGISTRY
+from config.renderers import TimedJSONRenderer
+
+REQUESTS = REGISTRY.counter(
+    "course_cache_requests_total", "Course response cache lookups", labels=("endpoint", "result"),
+)
+
+CATALOG = "catalog"
+
+
+def _cache():
+    return caches[getattr(settings, "COURSE_CACHE_ALIAS", "default")]
+
+
+def _version_key(scope):
+    return f"cv:{scope}"
+
+
+def versions(*scopes):
+    """Current version for each scope ("catalog" or a course id), creating missing ones."""
+    cache = _cache()
+    keys = [_version_key(s) for s in scopes]
+    found = cache.get_many(keys)
+    out = []
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+        out.append(found[key])
+    return out
+
+
+def _bump(*scopes):
+    now = time.time_ns()
+    _cache().set_many({_version_key(s): now for s in scopes}, timeout=None)
+
+
+def bump_course(course_id, catalog=False):
+    """Invalidate one course's cached responses once the current transaction commits.
+
+    Call this after bulk_create/bulk_update/queryset.update(), which skip signals.
+    """
+    scopes = [course_id, CATALOG] if catalog else [course_id]
+    transaction.on_commit(lambda: _bump(*scopes))
+
+
+def bump_courses(course_ids, catalog=False):
+    """bump_course() for many courses, in one cache write."""
+    scopes = list(course_ids)
+    if catalog:
+        scopes.append(CATALOG)
+    if scopes:
+        transaction.on_commit(lambda: _bump(*scopes))
+
+
+def bump_catalog():
+    transaction.on_commit(lambda: _bump(CATALOG))
+
+
+def cached_response(request, endpoint, course_id, build, catalog=False):
+    """Serve ``build()`` (JSON-able data) for ``course_id`` from the cache.
+
+    ``catalog=True`` also ties the entry to the catalog version, for payloads
+    that include other courses.
+    """
+    scopes = [course_id, CATALOG] if catalog else [course_id]
+    stamp = ":".join(str(v) for v in versions(*scopes))
+    key = f"crb:{endpoint}:{course_id}:{stamp}"
+    etag = '"%s"' % hashlib.sha1(key.encode()).hexdigest()[:20]
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+    # compressed responses carry W/"..."; the versions are the same either way
+    tags = [t.strip().removeprefix("W/") for t in request.META.get("HTTP_IF_NONE_MATCH", "").split(",")]
+    if etag in tags:
+        REQUESTS.inc(endpoint, "not_modified")
+        return Response(status=304, headers=headers)
+
+    cache = _cache()
+    body = cache.get(key)
+    if body is None:
+        REQUESTS.inc(endpoint, "miss")
+        body = TimedJSONRenderer().render(build())
+        cache.set(key, body)
+    else:
+        REQUESTS.inc(endpoint, "hit")
+
+    if getattr(request, "accepted_renderer", None) is None or request.accepted_renderer.format != "json":
+        return Response(json.loads(body), headers=headers)  # browsable API
+    encoding = compression.negotiate(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    if encoding and len(body) >= compression.min_bytes():
+        variant = cache.get(f"{key}:{encoding}")
+        if variant is None:
+            variant = compression.compress(body, encoding, best=True)
+            cache.set(f"{key}:{encoding}", variant)
+        headers.update({"Content-Encoding": encoding, "ETag": compression.weak_etag(etag)})
+        body = variant
+    return HttpResponse(body, content_type="application/json", headers=headers)
+
+
+def catalog_data(name, params, build):
+    """``build()`` cached until the next catalog write, keyed on ``params`` (a dict of normalized filters)."""
+    (version,) = versions(CATALOG)
+    digest = hashlib.sha1(repr(sorted(params.items())).encode()).hexdigest()[:20]
+    key = f"cd:{name}:{version}:{digest}"
+    cache = _cache()
+    data = cache.get(key)
+    if data is None:
+        REQUESTS.inc(name, "miss")
+        data = build()
+        cache.set(key, data)
+    else:
+        REQUESTS.inc(name, "hit")
+    return data
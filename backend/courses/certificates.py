@@ -0,0 +1,166 @@
+"""Certificate issuing.
+
+Each course gets one background image holding everything certificates of that
+course share: border, headings, course title and footer. It is rendered with
+Pillow once and saved as a JPEG under MEDIA_ROOT/certificates/templates.
+reportlab embeds JPEG data without re-encoding it, so a certificate costs one
+image reference plus the recipient's name, the date and the verification id.
+ASCII85 stream encoding is switched off: in pure Python it took ~90% of the
+render time and made each file a quarter larger.
+The PDF is stored on the Certificate row, which makes later downloads plain
+file reads.
+
+``render_pdf`` needs no database or settings, so ``issue_certificates`` can run
+it in worker processes.
+"""
+import hashlib
+import io
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from PIL import Image, ImageDraw, ImageFont
+from reportlab import rl_config
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.pdfgen import canvas
+
+from .models import Certificate
+
+PAGE = landscape(A4)  # points
+TEMPLATE_DPI = 150
+# bump to re-render every course template after a layout change
+TEMPLATE_VERSION = 1
+
+rl_config.useA85 = 0
+
+
+def _font(bold, size):
+    try:
+        return ImageFont.truetype("DejaVuSans-Bold.ttf" if bold else "DejaVuSans.ttf", size)
+    except Exception:
+        return ImageFont.load_default()
+
+
+def _wrap(draw, text, font, max_width):
+    lines, cur = [], []
+    for word in text.split():
+        trial = " ".join(cur + [word])
+        if cur and draw.textlength(trial, font=font) > max_width:
+            lines.append(" ".join(cur))
+            cur = [word]
+        else:
+            cur.append(word)
+    if cur:
+        lines.append(" ".join(cur))
+    return lines[:3]
+
+
+def _px(points):
+    return int(points * TEMPLATE_DPI / 72)
+
+
+def _render_template(course_title, path):
+    width, height = _px(PAGE[0]), _px(PAGE[1])
+    im = Image.new("RGB", (width, height), (252, 250, 245))
+    draw = ImageDraw.Draw(im)
+    accent, ink, muted = (139, 92, 246), (30, 30, 40), (110, 110, 125)
+    m = _px(24)
+    draw.rectangle([m, m, width - m, height - m], outline=accent, width=_px(4))
+    draw.rectangle([m + _px(8), m + _px(8), width - m - _px(8), height - m - _px(8)], outline=accent, width=_px(1))
+
+    def centred(y, text, font, fill):
+        draw.text((width / 2, y), text, font=font, fill=fill, anchor="mm")
+
+    centred(_px(95), "LearnX", _font(True, _px(22)), accent)
+    centred(_px(150), "Certificate of Completion", _font(True, _px(38)), ink)
+    centred(_px(205), "This certifies that", _font(False, _px(16)), muted)
+    # the recipient's name is stamped at y=250pt by render_pdf
+    centred(_px(300), "has successfully completed", _font(False, _px(16)), muted)
+    title_font = _font(True, _px(24))
+    for i, line in enumerate(_wrap(draw, course_title, title_font, width - 2 * _px(90))):
+        centred(_px(340) + i * _px(32), line, title_font, ink)
+    draw.line([_px(120), _px(500), _px(320), _px(500)], fill=muted, width=2)
+    draw.text((_px(220), _px(512)), "Date issued", font=_font(False, _px(11)), fill=muted, anchor="mt")
+    draw.line([width - _px(320), _px(500), width - _px(120), _px(500)], fill=muted, width=2)
+    draw.text((width - _px(220), _px(512)), "LearnX Academy", font=_font(False, _px(11)), fill=muted, anchor="mt")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    im.save(tmp, "JPEG", quality=88, optimize=True)
+    tmp.replace(path)
+
+
+def course_template(course):
+    """Path to the course's background JPEG, rendering it on first use."""
+    digest = hashlib.sha1(f"{TEMPLATE_VERSION}:{course.title}".encode()).hexdigest()[:10]
+    path = Path(settings.MEDIA_ROOT) / "certificates" / "templates" / f"course_{course.id}_{digest}.jpg"
+    if not path.exists():
+        _render_template(course.title, path)
+    return str(path)
+
+
+def verify_url(verification_id):
+    return settings.CERTIFICATE_VERIFY_URL.format(id=verification_id)
+
+
+def render_pdf(template_path, recipient, issued_on, verification_id, url):
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=PAGE)
+    pdf.setTitle("Certificate of Completion")
+    width, height = PAGE
+    pdf.drawImage(template_path, 0, 0, width=width, height=height)
+    pdf.setFillColorRGB(0.12, 0.12, 0.16)
+    size = 30 if len(recipient) < 32 else 22
+    pdf.setFont("Helvetica-Bold", size)
+    pdf.drawCentredString(width / 2, height - 250 - size / 3, recipient)
+    pdf.setFont("Helvetica", 13)
+    pdf.drawCentredString(220, height - 492, issued_on)
+    pdf.setFillColorRGB(0.43, 0.43, 0.49)
+    pdf.setFont("Helvetica", 8)
+    pdf.drawCentredString(width / 2, 42, f"Verification ID {verification_id}  ·  {url}")
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def display_name(user):
+    return user.get_full_name() or user.username
+
+
+def build_certificate(user, course, template_path=None):
+    """An unsaved Certificate with its PDF attached (file written to storage)."""
+    cert = Certificate(user=user, course=course, recipient_name=display_name(user))
+    pdf = render_pdf(
+        template_path or course_template(course), cert.recipient_name, _today(),
+        cert.verification_id, verify_url(cert.verification_id),
+    )
+    cert.pdf.save(f"{cert.verification_id}.pdf", ContentFile(pdf), save=False)
+    return cert
+
+
+def _today():
+    return timezone.localdate().strftime("%d %B %Y")
+
+
+def issue_certificate(user, course):
+    """Return the user's certificate for ``course``, creating it on first request."""
+    cert = Certificate.objects.filter(user=user, course=course).first()
+    if cert and cert.pdf:
+        return cert
+    if cert:  # row without a stored PDF: render it now
+        pdf = render_pdf(
+            course_template(course), cert.recipient_name, cert.issued_at.strftime("%d %B %Y"),
+            cert.verification_id, verify_url(cert.verification_id),
+        )
+        cert.pdf.save(f"{cert.verification_id}.pdf", ContentFile(pdf), save=True)
+        return cert
+    cert = build_certificate(user, course)
+    try:
+        with transaction.atomic():
+            cert.save()
+    except IntegrityError:  # a concurrent request issued it first
+        cert.pdf.delete(save=False)
+        cert = Certificate.objects.get(user=user, course=course)
+    return cert
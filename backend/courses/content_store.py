@@ -0,0 +1,232 @@
+"""Lesson text stored once per distinct value, compressed.
+
+Lesson.transcript and Lesson.content are properties backed by foreign keys
+to ContentBlob, whose primary key is the SHA-256 of the text. Generated
+lessons carry the same text in both, so it is stored once. Blobs are
+compressed with zstd when the ``zstandard`` package is installed and with
+zlib otherwise. Each row records its codec, so either can be read back.
+
+Lesson queries no longer pull any text. A property reads its text on first
+access: from the instance, then from a process-wide cache, then from the
+database. Blobs never change, so the cache can't go stale. ``load_texts()``
+fills a whole list of lessons with one query per 500 distinct blobs. The
+lesson serializers call it, so a list of lessons costs one query instead of
+two per lesson.
+
+Setting a property stores nothing until the lesson is written.
+Lesson.save() and Lesson.objects.bulk_create()/bulk_update() store the blobs
+first. Blobs are never modified; ``prune()`` deletes the ones no lesson
+points at anymore.
+"""
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Exists, OuterRef, Q
+
+try:  # pragma: no cover - optional dependency
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+# Lesson property -> foreign key holding its blob
+FIELDS = {"transcript": "transcript_blob", "content": "content_blob"}
+ZSTD_LEVEL = 12
+ZLIB_LEVEL = 9
+CHUNK = 500  # digests per IN (...) query
+
+# zstd (de)compressors are costly to create and not thread-safe: one of each per thread
+_local = threading.local()
+
+
+def _zstd():
+    if not hasattr(_local, "compressor"):
+        _local.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+        _local.decompressor = zstandard.ZstdDecompressor()
+    return _local
+
+
+def digest(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def encode(text):
+    """(codec, data) for ``text``; "raw" when compressing wouldn't make it smaller."""
+    raw = text.encode()
+    if zstandard is not None:
+        codec, data = "zstd", _zstd().compressor.compress(raw)
+    else:
+        codec, data = "zlib", zlib.compress(raw, ZLIB_LEVEL)
+    return (codec, data) if len(data) < len(raw) else ("raw", raw)
+
+
+def decode(codec, data):
+    data = bytes(data)  # memoryview on PostgreSQL
+    if codec == "zstd":
+        if zstandard is None:
+            raise ImproperlyConfigured("Lesson text is zstd-compressed; install the zstandard package.")
+        data = _zstd().decompressor.decompress(data)
+    elif codec == "zlib":
+        data = zlib.decompress(data)
+    return data.decode()
+
+
+def blob_fields(fields):
+    """``fields`` with transcript/content replaced by their foreign keys, for update_fields/bulk_update."""
+    return [FIELDS.get(f, f) for f in fields]
+
+
+class _TextCache:
+    """LRU of decoded texts by digest, bounded by total characters (CONTENT_CACHE_CHARS)."""
+
+    def __init__(self):
+        self._items = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            text = self._items.get(key)
+            if text is not None:
+                self._items.move_to_end(key)
+            return text
+
+    def put(self, key, text):
+        limit = int(getattr(settings, "CONTENT_CACHE_CHARS", 16_000_000))
+        if len(text) > limit:
+            return
+        with self._lock:
+            if key in self._items:
+                return
+            self._items[key] = text
+            self._chars += len(text)
+            while self._chars > limit:
+                _, old = self._items.popitem(last=False)
+                self._chars -= len(old)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._chars = 0
+
+
+_cache = _TextCache()
+
+
+def texts(digests):
+    """{digest: text} for ``digests``, reading only the ones not cached."""
+    from .models import ContentBlob
+
+    found, missing = {}, []
+    for key in set(digests):
+        text = _cache.get(key)
+        if text is None:
+            missing.append(key)
+        else:
+            found[key] = text
+    for i in range(0, len(missing), CHUNK):
+        rows = ContentBlob.objects.filter(digest__in=missing[i:i + CHUNK]).values_list("digest", "codec", "data")
+        for key, codec, data in rows:
+            found[key] = decode(codec, data)
+            _cache.put(key, found[key])
+    return found
+
+
+# -- Lesson properties -------------------------------------------------------------
+# instance.__dict__["_texts"]: field -> (digest, text) as last loaded or stored
+# instance.__dict__["_unsaved_texts"]: field -> text assigned since the last write
+
+
+def _loaded(lesson, field):
+    """The text already on ``lesson`` for ``field``: (True, text), or (False, None) if it must be read."""
+    unsaved = lesson.__dict__.get("_unsaved_texts", {})
+    if field in unsaved:
+        return True, unsaved[field]
+    key = getattr(lesson, FIELDS[field] + "_id")
+    if key is None:
+        return True, None
+    cached = lesson.__dict__.get("_texts", {}).get(field)
+    if cached is not None and cached[0] == key:
+        return True, cached[1]
+    return False, None
+
+
+def text_property(field):
+    def get(self):
+        ready, text = _loaded(self, field)
+        if ready:
+            return text
+        key = getattr(self, FIELDS[field] + "_id")
+        text = texts([key]).get(key)
+        self.__dict__.setdefault("_texts", {})[field] = (key, text)
+        return text
+
+    def set(self, value):
+        self.__dict__.setdefault("_unsaved_texts", {})[field] = value
+
+    return property(get, set, doc=f"Lesson {field}, stored in ContentBlob and read on first access.")
+
+
+def load_texts(lessons, fields=tuple(FIELDS)):
+    """Read ``fields`` of all ``lessons`` (instances) in as few queries as possible."""
+    wanted = []
+    for lesson in lessons:
+        for field in fields:
+            if not _loaded(lesson, field)[0]:
+                wanted.append((lesson, field, getattr(lesson, FIELDS[field] + "_id")))
+    if not wanted:
+        return
+    found = texts(key for _, _, key in wanted)
+    for lesson, field, key in wanted:
+        lesson.__dict__.setdefault("_texts", {})[field] = (key, found.get(key))
+
+
+def iter_with_texts(queryset, fields=tuple(FIELDS), chunk_size=2000):
+    """Iterate over ``queryset`` of lessons with ``fields`` loaded, reading blobs once per chunk."""
+    chunk = []
+    for lesson in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(lesson)
+        if len(chunk) == chunk_size:
+            load_texts(chunk, fields)
+            yield from chunk
+            chunk = []
+    load_texts(chunk, fields)
+    yield from chunk
+
+
+def attach(lessons):
+    """Store the unsaved texts of ``lessons`` as blobs and point their foreign keys at them."""
+    from .models import ContentBlob
+
+    blobs = {}
+    for lesson in lessons:
+        unsaved = lesson.__dict__.pop("_unsaved_texts", None)
+        for field, text in (unsaved or {}).items():
+            key = None if text is None else digest(text)
+            setattr(lesson, FIELDS[field] + "_id", key)
+            lesson.__dict__.setdefault("_texts", {})[field] = (key, text)
+            if key is not None:
+                blobs[key] = text
+    keys = list(blobs)
+    existing = set()
+    for i in range(0, len(keys), CHUNK):
+        existing.update(ContentBlob.objects.filter(digest__in=keys[i:i + CHUNK]).values_list("digest", flat=True))
+    new = []
+    for key, text in blobs.items():
+        if key not in existing:
+            codec, data = encode(text)
+            new.append(ContentBlob(digest=key, codec=codec, size=len(text), data=data))
+    # two writers storing the same text race harmlessly: the rows are identical
+    ContentBlob.objects.bulk_create(new, batch_size=CHUNK, ignore_conflicts=True)
+
+
+def prune():
+    """Delete blobs no lesson refers to (e.g. replaced transcripts). Returns the number deleted."""
+    from .models import ContentBlob, Lesson
+
+    used = Lesson.objects.filter(Q(transcript_blob=OuterRef("pk")) | Q(content_blob=OuterRef("pk")))
+    deleted, _ = ContentBlob.objects.filter(~Exists(used)).delete()
+    return deleted
@@ -0,0 +1,101 @@
+"""Buffered popularity counters on Course.
+
+Requests only queue events in memory. A background thread (config.batching)
+adds up the deltas per course and applies them every
+COURSE_COUNTERS_FLUSH_SECONDS in a single ``bulk_update`` of
+``F(field) + delta`` expressions. Because they are increments rather than
+absolute values, several worker processes flushing their own buffers never
+overwrite each other.
+
+``trending_score`` decays exponentially without a periodic rewrite of every
+row. Each event adds ``weight * 2 ** ((now - EPOCH) / HALF_LIFE)``, so an
+event HALF_LIFE older than another counts half as much, and sorting on the
+stored value is the same as sorting on the decayed one. The increment doubles
+every HALF_LIFE; at three days a float64 lasts for about eight years past EPOCH
+before EPOCH has to move forward (see ``refresh_course_counters --rescale-from``).
+
+Flushes leave the course response cache alone: the cached payloads omit the
+counters (CachedCourseSerializer) and /api/courses/<id>/stats/ serves them.
+"""
+import atexit
+import logging
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from config.batching import BatchWriter
+from config.metrics import REGISTRY
+
+from .models import Course
+
+logger = logging.getLogger(__name__)
+
+EVENTS = REGISTRY.counter("course_counter_events_total", "Popularity events queued", labels=("kind",))
+FLUSHES = REGISTRY.counter("course_counter_flushes_total", "Counter flushes", labels=("result",))
+
+EPOCH = 1735689600  # 2025-01-01T00:00:00Z
+HALF_LIFE = 3 * 24 * 3600
+VIEW_WEIGHT = 1.0
+ENROLL_WEIGHT = 5.0
+
+
+def trend_increment(weight, now=None):
+    return weight * 2 ** (((now or time.time()) - EPOCH) / HALF_LIFE)
+
+
+class _CounterWriter(BatchWriter):
+    def _write(self, batch):
+        deltas = {}
+        for course_id, views, enrollments, trend in batch:
+            d = deltas.setdefault(course_id, [0, 0, 0.0])
+            d[0] += views
+            d[1] += enrollments
+            d[2] += trend
+        courses = []
+        for course_id, (views, enrollments, trend) in deltas.items():
+            course = Course(id=course_id)
+            course.view_count = F("view_count") + views
+            # unenrolls can arrive before the enroll they undo is flushed; never go below zero
+            course.enrollment_count = Greatest(F("enrollment_count") + enrollments, 0)
+            course.trending_score = F("trending_score") + trend
+            courses.append(course)
+        close_old_connections()
+        try:
+            # rows deleted meanwhile simply match nothing
+            Course.objects.bulk_update(
+                courses, ["view_count", "enrollment_count", "trending_score"], batch_size=500,
+            )
+            FLUSHES.inc("ok")
+            self.written(len(batch))
+        except Exception:
+            FLUSHES.inc("error")
+            self.dropped(len(batch))
+            logger.exception("course counter flush failed; dropped deltas for %d courses", len(courses))
+        close_old_connections()
+
+
+_writer = _CounterWriter(
+    batch_size=20_000,  # events per flush at most; they collapse to one row per course
+    flush_seconds=float(getattr(settings, "COURSE_COUNTERS_FLUSH_SECONDS", 10.0)),
+    max_queue=100_000,
+    name="course-counter-writer",
+)
+atexit.register(_writer.flush)
+
+
+def course_viewed(course_id):
+    EVENTS.inc("view")
+    _writer.submit((course_id, 1, 0, trend_increment(VIEW_WEIGHT)))
+
+
+def enrollment_changed(course_id, delta):
+    """``delta`` is +1 on enroll and -1 on unenroll; only enrolling counts towards trending."""
+    EVENTS.inc("enroll" if delta > 0 else "unenroll")
+    _writer.submit((course_id, 0, delta, trend_increment(ENROLL_WEIGHT) if delta > 0 else 0.0))
+
+
+def flush():
+    _writer.flush()
@@ -0,0 +1,140 @@
+"""Catalog filters and facet counts.
+
+Facets are disjunctive: the counts for one dimension apply every active
+filter except that dimension's own. With category=programming, the category
+facet still lists the other categories, counted under the remaining filters.
+
+A single grouped query computes all of them. It groups the courses matching
+``q`` by category, level, language, a rating bucket and a price bucket. The
+GROUP BY also carries whether each row passes the min_rating and max_price
+filters, because those thresholds are arbitrary numbers that the buckets
+alone can't evaluate. Each dimension's counts are then summed in Python from
+those group rows (a few hundred at most). Results are cached per normalized
+filter set under the catalog version, so any course write invalidates them.
+"""
+from django.db.models import Case, Count, IntegerField, Min, Q, Value, When
+from django.db.models.functions import Lower
+
+from . import cache
+from .models import Course
+
+# min_rating facet: courses rated at least this much
+RATING_THRESHOLDS = (4.5, 4.0, 3.5, 3.0)
+# max_price facet: courses costing at most this much (0 = free)
+PRICE_THRESHOLDS = (0, 20, 50, 100)
+LEVEL_LABELS = dict(Course.LEVEL_CHOICES)
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize(params):
+    """The filter set from query params, normalized so equal filters compare (and cache) equal."""
+    return {
+        "category": (params.get("category") or "").strip().lower(),
+        "level": (params.get("level") or "").strip(),
+        "language": (params.get("language") or "").strip().lower(),
+        "min_rating": _float(params.get("min_rating")) if params.get("min_rating") else None,
+        "max_price": _float(params.get("max_price")) if params.get("max_price") else None,
+        "q": (params.get("q") or "").strip(),
+    }
+
+
+def apply(qs, filters):
+    # compare against lower(...) so the functional indexes are usable
+    if filters["category"]:
+        qs = qs.alias(category_lower=Lower("category")).filter(category_lower=filters["category"])
+    if filters["level"]:
+        qs = qs.filter(level=filters["level"])
+    if filters["language"]:
+        qs = qs.alias(language_lower=Lower("language")).filter(language_lower=filters["language"])
+    if filters["min_rating"] is not None:
+        qs = qs.filter(rating_avg__gte=filters["min_rating"])
+    if filters["max_price"] is not None:
+        qs = qs.filter(price__lte=filters["max_price"])
+    if filters["q"]:
+        q = filters["q"]
+        qs = qs.filter(Q(title__icontains=q) | Q(description__icontains=q) | Q(tags__icontains=q))
+    return qs
+
+
+def _flag(condition):
+    if condition is None:
+        return Value(1)
+    return Case(When(condition, then=Value(1)), default=Value(0), output_field=IntegerField())
+
+
+def _groups(filters):
+    qs = Course.objects.all()
+    if filters["q"]:
+        qs = apply(qs, {**normalize({}), "q": filters["q"]})
+    # bucket = index of the strictest threshold the course meets, len(thresholds) if none
+    rating_bucket = Case(
+        *[When(rating_avg__gte=t, then=Value(i)) for i, t in enumerate(RATING_THRESHOLDS)],
+        default=Value(len(RATING_THRESHOLDS)), output_field=IntegerField(),
+    )
+    price_bucket = Case(
+        *[When(price__lte=t, then=Value(i)) for i, t in enumerate(PRICE_THRESHOLDS)],
+        default=Value(len(PRICE_THRESHOLDS)), output_field=IntegerField(),
+    )
+    return list(
+        qs.annotate(
+            cat=Lower("category"), lang=Lower("language"), rb=rating_bucket, pb=price_bucket,
+            rating_ok=_flag(None if filters["min_rating"] is None else Q(rating_avg__gte=filters["min_rating"])),
+            price_ok=_flag(None if filters["max_price"] is None else Q(price__lte=filters["max_price"])),
+        )
+        .values("cat", "level", "lang", "rb", "pb", "rating_ok", "price_ok")
+        .annotate(n=Count("id"), cat_label=Min("category"), lang_label=Min("language"))
+        .order_by()
+    )
+
+
+def _passes(group, filters, skip):
+    return (
+        (skip == "category" or not filters["category"] or group["cat"] == filters["category"])
+        and (skip == "level" or not filters["level"] or group["level"] == filters["level"])
+        and (skip == "language" or not filters["language"] or group["lang"] == filters["language"])
+        and (skip == "min_rating" or group["rating_ok"])
+        and (skip == "max_price" or group["price_ok"])
+    )
+
+
+def _terms(groups, filters, dimension, key, label):
+    counts, labels = {}, {}
+    for g in groups:
+        if g[key] and _passes(g, filters, dimension):
+            counts[g[key]] = counts.get(g[key], 0) + g["n"]
+            labels.setdefault(g[key], label(g))
+    return [
+        {"value": k, "label": labels[k], "count": n}
+        for k, n in sorted(counts.items(), key=lambda kv: (-kv[1], labels[kv[0]]))
+    ]
+
+
+def _thresholds(groups, filters, dimension, key, thresholds):
+    counts = [0] * len(thresholds)
+    for g in groups:
+        if _passes(g, filters, dimension):
+            # thresholds are nested: meeting one means meeting every looser one after it
+            for i in range(g[key], len(thresholds)):
+                counts[i] += g["n"]
+    return [{"value": t, "count": n} for t, n in zip(thresholds, counts)]
+
+
+def compute(filters):
+    groups = _groups(filters)
+    return {
+        "category": _terms(groups, filters, "category", "cat", lambda g: g["cat_label"]),
+        "level": _terms(groups, filters, "level", "level", lambda g: LEVEL_LABELS.get(g["level"], g["level"])),
+        "language": _terms(groups, filters, "language", "lang", lambda g: g["lang_label"]),
+        "min_rating": _thresholds(groups, filters, "min_rating", "rb", RATING_THRESHOLDS),
+        "max_price": _thresholds(groups, filters, "max_price", "pb", PRICE_THRESHOLDS),
+    }
+
+
+def facet_counts(filters):
+    return cache.catalog_data("facets", filters, lambda: compute(filters))
@@ -0,0 +1,131 @@
+"""Recently viewed courses without touching the session table.
+
+Anonymous visitors carry their list in a signed cookie, so nothing is stored
+server-side. For signed-in users the list lives in the default cache under
+``rv:<user_id>``, and each view is queued as a RecentView upsert that a
+background thread writes in batches (config.batching). The cache is rebuilt from RecentView after eviction. Either way, opening
+a course does no database writes on the request path.
+"""
+import atexit
+import logging
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.signing import BadSignature
+from django.db import IntegrityError, close_old_connections
+from django.utils import timezone
+
+from config.batching import BatchWriter
+
+from .models import Course, RecentView
+
+logger = logging.getLogger(__name__)
+
+LIMIT = 5
+COOKIE = "recently_viewed"
+COOKIE_SALT = "courses.recently_viewed"
+COOKIE_MAX_AGE = 30 * 24 * 3600
+CACHE_TIMEOUT = 7 * 24 * 3600
+
+
+def _push(ids, course_id):
+    return [course_id] + [i for i in ids if i != course_id][: LIMIT - 1]
+
+
+# -- anonymous: signed cookie ---------------------------------------------------
+
+def read_cookie(request):
+    try:
+        value = request.get_signed_cookie(COOKIE, default="", salt=COOKIE_SALT, max_age=COOKIE_MAX_AGE)
+    except BadSignature:
+        return []
+    return [int(v) for v in value.split(".") if v.isdigit()][:LIMIT]
+
+
+def write_cookie(response, ids):
+    response.set_signed_cookie(
+        COOKIE, ".".join(str(i) for i in ids), salt=COOKIE_SALT,
+        max_age=COOKIE_MAX_AGE, httponly=True, samesite="Lax",
+    )
+
+
+# -- signed in: cache + batched RecentView upserts -------------------------------
+
+class _HistoryWriter(BatchWriter):
+    def _write(self, batch):
+        latest = {}
+        for user_id, course_id, viewed_at in batch:
+            key = (user_id, course_id)
+            if key not in latest or viewed_at > latest[key]:
+                latest[key] = viewed_at
+        rows = [RecentView(user_id=u, course_id=c, viewed_at=t) for (u, c), t in latest.items()]
+        close_old_connections()
+        try:
+            self._upsert(rows)
+            self.written(len(rows))
+        except IntegrityError:
+            # a user or course deleted while its views were queued; keep everyone else's
+            users = set(User.objects.filter(id__in={r.user_id for r in rows}).values_list("id", flat=True))
+            courses = set(Course.objects.filter(id__in={r.course_id for r in rows}).values_list("id", flat=True))
+            kept = [r for r in rows if r.user_id in users and r.course_id in courses]
+            logger.warning("dropped %d recent views of deleted users or courses", len(rows) - len(kept))
+            self.dropped(len(rows) - len(kept))
+            try:
+                self._upsert(kept)
+                self.written(len(kept))
+            except Exception:
+                self.dropped(len(kept))
+                logger.exception("recent-view flush failed; dropped %d views", len(kept))
+        except Exception:
+            # history is best-effort, but must not kill the thread
+            self.dropped(len(rows))
+            logger.exception("recent-view flush failed; dropped %d views", len(rows))
+        close_old_connections()
+
+    def _upsert(self, rows):
+        RecentView.objects.bulk_create(
+            rows, batch_size=self.batch_size,
+            update_conflicts=True, unique_fields=["user", "course"], update_fields=["viewed_at"],
+        )
+
+
+_writer = _HistoryWriter(batch_size=500, flush_seconds=2.0, name="course-history-writer")
+atexit.register(_writer.flush)
+
+
+def _cache_key(user_id):
+    return f"rv:{user_id}"
+
+
+def user_history(user_id):
+    ids = cache.get(_cache_key(user_id))
+    if ids is None:
+        ids = list(
+            RecentView.objects.filter(user_id=user_id).order_by("-viewed_at")
+            .values_list("course_id", flat=True)[:LIMIT]
+        )
+        cache.set(_cache_key(user_id), ids, CACHE_TIMEOUT)
+    return ids
+
+
+def record_user_view(user_id, course_id):
+    cache.set(_cache_key(user_id), _push(user_history(user_id), course_id), CACHE_TIMEOUT)
+    _writer.submit((user_id, course_id, timezone.now()))
+
+
+def record_view(request, response, course_id):
+    """Track ``course_id`` for whoever made ``request``; anonymous lists go out on ``response``."""
+    if request.user.is_authenticated:
+        record_user_view(request.user.pk, course_id)
+    else:
+        write_cookie(response, _push(read_cookie(request), course_id))
+
+
+def recent_ids(request):
+    if request.user.is_authenticated:
+        return user_history(request.user.pk)
+    return read_cookie(request)
+
+
+def flush():
+    _writer.flush()
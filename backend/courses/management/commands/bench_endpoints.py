@@ -0,0 +1,194 @@
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from courses.models import Course, Enrollment
+from quizzes.models import Attempt, Quiz
+from users.tokens import ClaimsRefreshToken
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=settings.BASE_DIR)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the main API endpoints in-process and report p50/p95/p99 latency, query counts and throughput. "
+        "Seed data first with `seed_demo --courses N --users K`. POST endpoints write to the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=200, help="Measured requests per endpoint")
+        parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per endpoint")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--only", nargs="*", help="Run only these endpoints")
+        parser.add_argument("--output", help="Write results as JSON to this path")
+        parser.add_argument("--compare", help="Previous JSON result to diff against")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        enrollments = list(
+            Enrollment.objects.filter(course__lessons__isnull=False).select_related("user").distinct()[:500]
+        )
+        if not enrollments:
+            raise CommandError("No enrollments with lessons found; run `seed_demo --courses 50 --users 200` first.")
+        quizzes = list(Quiz.objects.filter(questions__isnull=False).distinct()[:200])
+        tokens = {}
+
+        def auth(user):
+            if user.id not in tokens:
+                tokens[user.id] = f"Bearer {ClaimsRefreshToken.for_user(user).access_token}"
+            return {"HTTP_AUTHORIZATION": tokens[user.id]}
+
+        client = Client(SERVER_NAME="localhost")
+        course_ids = list(Course.objects.values_list("id", flat=True))
+
+        # each scenario does its (untimed) setup and returns the request to time
+        def catalog():
+            return lambda: client.get("/api/courses/")
+
+        def course_detail():
+            pk = rng.choice(course_ids)
+            return lambda: client.get(f"/api/courses/{pk}/")
+
+        def lesson_detail():
+            e = rng.choice(enrollments)
+            lesson = e.course.lessons.order_by("?").values_list("id", flat=True).first()
+            return lambda: client.get(f"/api/courses/{e.course_id}/lessons/{lesson}/")
+
+        def progress():
+            e = rng.choice(enrollments)
+            body = {"position_seconds": rng.randint(0, 600), "progress_percent": rng.randint(0, 100)}
+            headers = auth(e.user)
+            return lambda: client.post(
+                f"/api/courses/{e.course_id}/progress/", body, content_type="application/json", **headers,
+            )
+
+        def reviews():
+            pk = rng.choice(course_ids)
+            return lambda: client.get(f"/api/courses/{pk}/reviews/")
+
+        def review_submit():
+            e = rng.choice(enrollments)
+            body = {"rating": rng.randint(1, 5), "text": "bench"}
+            headers = auth(e.user)
+            return lambda: client.post(
+                f"/api/courses/{e.course_id}/reviews/", body, content_type="application/json", **headers,
+            )
+
+        def quiz_submit():
+            e = rng.choice(enrollments)
+            quiz = rng.choice(quizzes)
+            attempt = Attempt.objects.create(user=e.user, quiz=quiz)
+            answers = [
+                {"question_id": q.id, "choice_id": rng.choice([c.id for c in q.choices.all()])}
+                for q in quiz.questions.prefetch_related("choices")
+            ]
+            headers = auth(e.user)
+            return lambda: client.post(
+                f"/api/quizzes/attempt/{attempt.id}/submit/", {"answers": answers},
+                content_type="application/json", **headers,
+            )
+
+        scenarios = {
+            "catalog": catalog,
+            "course_detail": course_detail,
+            "lesson_detail": lesson_detail,
+            "progress": progress,
+            "reviews": reviews,
+            "review_submit": review_submit,
+        }
+        if quizzes:
+            scenarios["quiz_submit"] = quiz_submit
+        if options.get("only"):
+            scenarios = {k: v for k, v in scenarios.items() if k in options["only"]}
+
+        results = {}
+        for name, fn in scenarios.items():
+            results[name] = self._run(fn, options["iterations"], options["warmup"])
+            r = results[name]
+            self.stdout.write(
+                f"{name:<15} p50={r['p50_ms']:>8.2f}ms p95={r['p95_ms']:>8.2f}ms p99={r['p99_ms']:>8.2f}ms "
+                f"queries={r['queries_avg']:>6.1f} (max {r['queries_max']}) rps={r['rps']:>8.1f} errors={r['errors']}"
+            )
+
+        report = {
+            "meta": {
+                "commit": _git_commit(),
+                "timestamp": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "db_vendor": connection.vendor,
+                "courses": len(course_ids),
+                "iterations": options["iterations"],
+            },
+            "endpoints": results,
+        }
+        if options.get("output"):
+            Path(options["output"]).write_text(json.dumps(report, indent=2))
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        if options.get("compare"):
+            self._compare(json.loads(Path(options["compare"]).read_text()), report)
+
+    def _run(self, prepare, iterations, warmup):
+        for _ in range(warmup):
+            prepare()()
+        latencies, queries, errors = [], [], 0
+        wall = 0.0
+        for _ in range(iterations):
+            call = prepare()
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                resp = call()
+                elapsed = time.perf_counter() - start
+            wall += elapsed
+            latencies.append(elapsed * 1000)
+            queries.append(len(ctx.captured_queries))
+            if resp.status_code >= 400:
+                errors += 1
+        latencies.sort()
+        return {
+            "p50_ms": round(_percentile(latencies, 50), 3),
+            "p95_ms": round(_percentile(latencies, 95), 3),
+            "p99_ms": round(_percentile(latencies, 99), 3),
+            "mean_ms": round(statistics.fmean(latencies), 3),
+            "queries_avg": round(statistics.fmean(queries), 2),
+            "queries_max": max(queries),
+            "rps": round(iterations / wall, 1) if wall else 0.0,
+            "errors": errors,
+        }
+
+    def _compare(self, old, new):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Compared to {old['meta'].get('commit')}:"))
+        for name, r in new["endpoints"].items():
+            prev = old["endpoints"].get(name)
+            if not prev:
+                continue
+            delta = (r["p95_ms"] - prev["p95_ms"]) / prev["p95_ms"] * 100 if prev["p95_ms"] else 0.0
+            line = (
+                f"{name:<15} p95 {prev['p95_ms']:.2f} -> {r['p95_ms']:.2f}ms ({delta:+.1f}%), "
+                f"queries {prev['queries_avg']} -> {r['queries_avg']}"
+            )
+            style = self.style.WARNING if delta > 10 or r["queries_avg"] > prev["queries_avg"] else self.style.SUCCESS
+            self.stdout.write(style(line))
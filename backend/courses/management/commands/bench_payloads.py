@@ -0,0 +1,83 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from rest_framework.renderers import JSONRenderer
+
+from config import compression
+from config.renderers import FastJSONRenderer
+from courses.models import Lesson
+
+
+def _p95(values):
+    values = sorted(values)
+    return values[max(0, round(0.95 * (len(values) - 1)))]
+
+
+def _timed(fn, iterations):
+    out, samples = None, []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        out = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return out, samples
+
+
+class Command(BaseCommand):
+    help = (
+        "Report bytes on the wire (identity, gzip, brotli) and p50/p95 serialize time (stdlib json vs orjson) "
+        "for the catalog list and the lesson with the longest transcript, then check what the API actually "
+        "sends for each Accept-Encoding."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+
+    def handle(self, *args, **options):
+        lesson = Lesson.objects.filter(transcript_blob__isnull=False).order_by("-transcript_blob__size").first()
+        if lesson is None:
+            raise CommandError("No lessons found; run `seed_demo` first.")
+        client = Client(SERVER_NAME="localhost")
+        payloads = {
+            "catalog": "/api/courses/",
+            "long_lesson": f"/api/courses/{lesson.course_id}/lessons/{lesson.id}/",
+        }
+        n = options["iterations"]
+        stdlib, fast = JSONRenderer(), FastJSONRenderer()
+
+        for name, url in payloads.items():
+            response = client.get(url, HTTP_ACCEPT="application/json")
+            if response.status_code != 200:
+                raise CommandError(f"{url} returned {response.status_code}")
+            data = response.data
+            body, slow_ms = _timed(lambda: stdlib.render(data), n)
+            fast_body, fast_ms = _timed(lambda: fast.render(data), n)
+            if fast_body != body:
+                raise CommandError(f"{name}: orjson output differs from JSONRenderer")
+            self.stdout.write(
+                f"{name:<12} {len(data) if isinstance(data, list) else 1} object(s), {len(body):,} B  "
+                f"serialize p50/p95: json {statistics.median(slow_ms):.2f}/{_p95(slow_ms):.2f} ms, "
+                f"orjson {statistics.median(fast_ms):.2f}/{_p95(fast_ms):.2f} ms"
+            )
+            for encoding in ("gzip", "br"):
+                if encoding == "br" and compression.brotli is None:
+                    self.stdout.write("  br: brotli not installed")
+                    continue
+                for best in (False, True):
+                    packed, ms = _timed(lambda: compression.compress(body, encoding, best=best), max(n // 10, 1))
+                    level = (compression.BEST if best else compression.FAST)[encoding]
+                    self.stdout.write(
+                        f"  {encoding:<4} level {level:<2} {len(packed):>9,} B ({len(packed) / len(body):.0%})  "
+                        f"compress p95 {_p95(ms):.2f} ms"
+                    )
+
+        self.stdout.write("On the wire (Accept-Encoding -> Content-Encoding, bytes):")
+        urls = {**payloads, "lesson_list": f"/api/courses/{lesson.course_id}/lessons/"}
+        for name, url in urls.items():
+            for accept in ("", "gzip", "br, gzip"):
+                response = client.get(url, HTTP_ACCEPT="application/json", HTTP_ACCEPT_ENCODING=accept)
+                self.stdout.write(
+                    f"  {name:<12} {accept or 'identity':<9} -> {response.get('Content-Encoding', 'identity'):<8} "
+                    f"{len(response.content):>9,} B  ETag {response.get('ETag', '-')}"
+                )
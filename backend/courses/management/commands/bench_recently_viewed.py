@@ -0,0 +1,113 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.shortcuts import get_object_or_404
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from courses import history
+from courses.api_views import CourseDetailView, CourseSerializer
+from courses.cache import cached_response
+from courses.management.commands.bench_endpoints import _percentile
+from courses.models import Course
+from users.tokens import ClaimsRefreshToken
+
+WRITES = ("INSERT", "UPDATE", "DELETE")
+
+
+def _rendered(response):
+    # cached_response() returns a plain HttpResponse holding the already-rendered JSON
+    return response.render() if hasattr(response, "render") else response
+
+
+class _SessionDetailView(CourseDetailView):
+    """The previous implementation: the list is kept in request.session."""
+    authentication_classes = []
+
+    def get(self, request, pk):
+        viewed = request.session.get("viewed_courses", [])
+        if pk in viewed:
+            viewed.remove(pk)
+        viewed.insert(0, pk)
+        request.session["viewed_courses"] = viewed[:5]
+        return cached_response(
+            request, "course_detail", pk, lambda: CourseSerializer(get_object_or_404(Course, pk=pk)).data,
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare recently-viewed tracking on the course detail endpoint: the old session-backed list against "
+        "the signed cookie (anonymous) and cached, batch-written history (signed in). Reports latency and "
+        "queries/writes per request. Session rows it creates are left in django_session."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=500)
+        parser.add_argument("--warmup", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        course_ids = list(Course.objects.values_list("id", flat=True)[:200])
+        user = User.objects.order_by("id").first()
+        if not course_ids or not user:
+            raise CommandError("Needs courses and a user; run `seed_demo` first.")
+        factory = RequestFactory()
+        token = f"Bearer {ClaimsRefreshToken.for_user(user).access_token}"
+        rng = random.Random(options["seed"])
+
+        def make_client(view, headers=None):
+            view_func = view.as_view()
+            cookies = {}
+
+            def call(pk):
+                request = factory.get(f"/api/courses/{pk}/", **(headers or {}))
+                request.COOKIES.update(cookies)
+                response = SessionMiddleware(lambda r: _rendered(view_func(r, pk=pk)))(request)
+                cookies.update({k: m.value for k, m in response.cookies.items()})
+                return response
+
+            return call
+
+        scenarios = {
+            "session": make_client(_SessionDetailView),
+            "cookie": make_client(CourseDetailView),
+            "signed_in": make_client(CourseDetailView, {"HTTP_AUTHORIZATION": token}),
+        }
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            for name, call in scenarios.items():
+                r = self._run(call, course_ids, rng, options["iterations"], options["warmup"])
+                self.stdout.write(
+                    f"{name:<10} p50={r['p50_ms']:>7.3f}ms p95={r['p95_ms']:>7.3f}ms "
+                    f"queries={r['queries']:>5.2f} writes={r['writes']:>5.2f} errors={r['errors']}"
+                )
+        started = time.perf_counter()
+        history.flush()
+        self.stdout.write(f"signed-in history flushed in {(time.perf_counter() - started) * 1000:.1f}ms (off the request path)")
+
+    def _run(self, call, course_ids, rng, iterations, warmup):
+        for _ in range(warmup):
+            call(rng.choice(course_ids))
+        latencies, queries, writes, errors = [], [], [], 0
+        for _ in range(iterations):
+            pk = rng.choice(course_ids)
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                response = call(pk)
+                latencies.append((time.perf_counter() - start) * 1000)
+            queries.append(len(ctx.captured_queries))
+            writes.append(sum(q["sql"].lstrip().upper().startswith(WRITES) for q in ctx.captured_queries))
+            errors += response.status_code >= 400
+        latencies.sort()
+        return {
+            "p50_ms": _percentile(latencies, 50),
+            "p95_ms": _percentile(latencies, 95),
+            "queries": statistics.fmean(queries),
+            "writes": statistics.fmean(writes),
+            "errors": errors,
+        }
@@ -0,0 +1,90 @@
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a WSGI/ASGI worker runs before it can answer its first request: build the
+# application, then load the URLconf (which imports every view module).
+BOOT = (
+    "import os; os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')\n"
+    "from config.wsgi import application\n"
+    "from django.urls import get_resolver; get_resolver().url_patterns\n"
+)
+# SDKs and media libraries that must be imported on first use, never at boot
+HEAVY = ("openai", "google.generativeai", "PIL", "reportlab", "numpy", "tiktoken", "moviepy")
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def _parse(stderr):
+    """[(module, self_us, cumulative_us, depth)] from ``-X importtime`` output."""
+    rows = []
+    for line in stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure cold worker boot (application + URLconf) in fresh interpreters with `python -X importtime`. "
+        "Fails if a heavy optional module is imported at boot or the median boot time exceeds --max-ms."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument("--max-ms", type=float, default=getattr(settings, "STARTUP_BUDGET_MS", 0),
+                            help="Fail above this median wall time (0 = report only)")
+        parser.add_argument("--top", type=int, default=15, help="Slowest top-level imports to list")
+        parser.add_argument("--allow", nargs="*", default=[], help="Heavy modules to tolerate at boot")
+
+    def handle(self, *args, **options):
+        walls, runs = [], []
+        for _ in range(max(options["runs"], 1)):
+            started = time.perf_counter()
+            proc = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", BOOT],
+                cwd=settings.BASE_DIR, env=os.environ.copy(), capture_output=True, text=True,
+            )
+            walls.append((time.perf_counter() - started) * 1000)
+            if proc.returncode:
+                raise CommandError(f"Boot failed:\n{proc.stderr[-2000:]}")
+            runs.append(_parse(proc.stderr))
+
+        rows = runs[-1]
+        imported = {name for name, *_ in rows}
+        total_ms = sum(cum for _, _, cum, depth in rows if depth == 0) / 1000
+        self.stdout.write(
+            f"boot wall: median {statistics.median(walls):.0f}ms, min {min(walls):.0f}ms over {len(walls)} runs; "
+            f"imports {total_ms:.0f}ms, {len(imported)} modules"
+        )
+        self.stdout.write("slowest top-level imports (cumulative):")
+        for name, _, cum, _ in sorted((r for r in rows if r[3] == 0), key=lambda r: -r[2])[: options["top"]]:
+            self.stdout.write(f"  {cum / 1000:>8.1f}ms  {name}")
+
+        problems = [m for m in HEAVY if m in imported and m not in options["allow"]]
+        if problems:
+            chains = []
+            for m in problems:
+                chains.append(f"{m} (imported by {self._importer(rows, m)})")
+            raise CommandError("Heavy modules imported at boot: " + ", ".join(chains))
+        median = statistics.median(walls)
+        if options["max_ms"] and median > options["max_ms"]:
+            raise CommandError(f"Median boot {median:.0f}ms exceeds the {options['max_ms']:.0f}ms budget")
+        self.stdout.write(self.style.SUCCESS("No heavy modules imported at boot."))
+
+    @staticmethod
+    def _importer(rows, module):
+        # importtime prints children before their parent, one indent level deeper
+        for i, (name, _, _, depth) in enumerate(rows):
+            if name == module:
+                for parent, _, _, parent_depth in rows[i + 1:]:
+                    if parent_depth < depth:
+                        return parent
+                return "boot script"
+        return "?"
@@ -0,0 +1,113 @@
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from config import images
+from courses import cache
+from courses.models import Course
+from courses.seeding import init_worker
+from users.models import Profile
+
+# name -> (model, field, square crop)
+TARGETS = {
+    "avatars": (Profile, "avatar", True),
+    "thumbnails": (Course, "thumbnail", False),
+}
+
+
+def _render(args):
+    try:
+        return images.render(*args)
+    except Exception as exc:  # not an image, truncated, ...: report it rather than abort the map
+        return exc
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the resized WebP/JPEG variants of avatars and course thumbnails that have none or whose source "
+        "changed. Each distinct picture is read once and rendered in a process pool; pictures whose variants "
+        "are in storage already are only recorded."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--only", choices=sorted(TARGETS), action="append", help="Limit to these targets (repeatable)")
+        parser.add_argument("--force", action="store_true", help="Rebuild the records of rows that look up to date")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+        parser.add_argument("--batch-size", type=int, default=200, help="Rows per read/render/bulk_update round")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        counts = {"built": 0, "reused": 0, "failed": 0, "cleared": 0}
+        with ProcessPoolExecutor(max_workers=max(options["workers"], 1), initializer=init_worker) as pool:
+            for name in options["only"] or sorted(TARGETS):
+                model, field, crop = TARGETS[name]
+                rows = [
+                    row for row in model.objects.only("id", field, f"{field}_variants").order_by("id").iterator()
+                    if options["force"] or images.needs_refresh(row, field)
+                ]
+                self.stdout.write(f"{name}: {len(rows)} to check")
+                updated = []
+                for i in range(0, len(rows), options["batch_size"]):
+                    batch = rows[i:i + options["batch_size"]]
+                    updated += self._build(pool, options["workers"], model, field, crop, batch, counts)
+                if updated and model is Course:
+                    # bulk_update sends no signals; course detail is cached per course
+                    cache.bump_courses([row.pk for row in updated], catalog=True)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{counts['built']} built, {counts['reused']} reused, {counts['failed']} failed, "
+            f"{counts['cleared']} cleared. Done in {elapsed:.2f}s"
+        ))
+
+    def _build(self, pool, workers, model, field, crop, rows, counts):
+        # read each distinct source once, and render each distinct picture once
+        sources = {}
+        for row in rows:
+            source = images.source_of(row, field)
+            if source and source not in sources:
+                try:
+                    sources[source] = images.read(source)
+                except Exception as exc:
+                    counts["failed"] += 1
+                    sources[source] = None
+                    self.stderr.write(f"  {model.__name__} {row.pk}: {source}: {exc}")
+        digests, pictures, todo = {}, {}, []
+        for source, data in sources.items():
+            if data is None:
+                continue
+            digests[source] = digest = hashlib.sha256(data).hexdigest()
+            if digest not in pictures:
+                pictures[digest] = data
+                if images.stored(digest, crop) is None:
+                    todo.append(digest)
+        rendered = {}
+        chunk = max(1, len(todo) // (max(workers, 1) * 4))
+        for digest, result in zip(todo, pool.map(_render, [(pictures[d], crop) for d in todo], chunksize=chunk)):
+            if isinstance(result, Exception):
+                counts["failed"] += 1
+                self.stderr.write(f"  {model.__name__} picture {digest[:12]}: {result}")
+            else:
+                rendered[digest] = result
+        records = {}
+        for source, digest in digests.items():
+            if digest in todo and digest not in rendered:
+                continue
+            _, sizes = images.store(pictures[digest], rendered.get(digest), crop=crop)
+            records[source] = {"source": source, "hash": digest, "sizes": sizes}
+        counts["built"] += len(rendered)
+        counts["reused"] += len(pictures) - len(todo)
+
+        changed = []
+        for row in rows:
+            source = images.source_of(row, field)
+            if source and source not in records:
+                continue  # unreadable: leave the old record so the next run retries
+            record = records.get(source, {})
+            counts["cleared"] += not record
+            setattr(row, f"{field}_variants", record)
+            changed.append(row)
+        model.objects.bulk_update(changed, [f"{field}_variants"], batch_size=500)
+        return changed
@@ -0,0 +1,131 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from courses.models import Course, Lesson
+from quizzes.models import Quiz
+from users.tokens import ClaimsRefreshToken
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Capture EXPLAIN plans for the queries behind each API endpoint and flag sequential scans."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Username used for authenticated endpoints (skipped if omitted)")
+        parser.add_argument("--course", type=int, help="Course id to exercise (defaults to the first course with lessons)")
+        parser.add_argument("--verbose-plans", action="store_true", help="Print the full plan for every query")
+
+    def handle(self, *args, **options):
+        course = self._pick_course(options.get("course"))
+        lesson = course.lessons.order_by("order").first()
+        user = None
+        if options.get("user"):
+            user = User.objects.filter(username=options["user"]).first()
+            if not user:
+                raise CommandError(f"User {options['user']!r} not found")
+
+        client = Client(SERVER_NAME="localhost")
+        headers = {}
+        if user:
+            headers["HTTP_AUTHORIZATION"] = f"Bearer {ClaimsRefreshToken.for_user(user).access_token}"
+
+        base = f"/api/courses/{course.id}"
+        endpoints = [
+            ("catalog", "get", "/api/courses/", {}),
+            ("catalog_filtered", "get", "/api/courses/", {"category": course.category, "level": course.level, "language": course.language}),
+            ("course_detail", "get", f"{base}/", {}),
+            ("course_related", "get", f"{base}/related/", {}),
+            ("lesson_list", "get", f"{base}/lessons/", {}),
+            ("reviews", "get", f"{base}/reviews/", {}),
+            ("quizzes", "get", "/api/quizzes/", {}),
+        ]
+        if lesson:
+            endpoints += [
+                ("lesson_detail", "get", f"{base}/lessons/{lesson.id}/", {}),
+                ("discussions", "get", f"{base}/lessons/{lesson.id}/discussions/", {}),
+            ]
+        quiz = Quiz.objects.filter(course=course).first() or Quiz.objects.first()
+        if quiz:
+            endpoints.append(("quiz_detail", "get", f"/api/quizzes/{quiz.id}/", {}))
+        if user:
+            endpoints += [
+                ("enrolled", "get", "/api/courses/enrolled/", {}),
+                ("enrollment", "get", f"{base}/enrollment/", {}),
+                ("progress", "post", f"{base}/progress/", {"lesson_id": lesson.id if lesson else None, "position_seconds": 30, "progress_percent": 10}),
+                ("review_create", "post", f"{base}/reviews/", {"rating": 5, "text": "explain"}),
+            ]
+            if lesson:
+                endpoints.append(("notes", "get", f"{base}/lessons/{lesson.id}/notes/", {}))
+
+        flagged = 0
+        for label, method, url, data in endpoints:
+            queries = self._capture(client, method, url, data, headers)
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{label}: {method.upper()} {url} ({len(queries)} queries)"))
+            for sql in queries:
+                if not sql.lstrip().upper().startswith("SELECT"):
+                    continue
+                plan = self._explain(sql)
+                scans = [line for line in plan if self._is_seq_scan(line)]
+                if scans:
+                    flagged += 1
+                    self.stdout.write(self.style.WARNING(f"  SEQ SCAN: {sql[:160]}"))
+                    for line in scans:
+                        self.stdout.write(f"    {line}")
+                if options["verbose_plans"]:
+                    self.stdout.write(f"  {sql[:160]}")
+                    for line in plan:
+                        self.stdout.write(f"    | {line}")
+
+        if flagged:
+            self.stdout.write(self.style.WARNING(f"{flagged} queries use sequential scans."))
+        else:
+            self.stdout.write(self.style.SUCCESS("No sequential scans found."))
+
+    def _pick_course(self, course_id):
+        if course_id:
+            course = Course.objects.filter(pk=course_id).first()
+        else:
+            course = Course.objects.filter(lessons__isnull=False).order_by("id").first() or Course.objects.order_by("id").first()
+        if not course:
+            raise CommandError("No courses found; run seed_demo first.")
+        return course
+
+    def _capture(self, client, method, url, data, headers):
+        # writes run inside a transaction that is always rolled back
+        try:
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as ctx:
+                    if method == "get":
+                        client.get(url, data, **headers)
+                    else:
+                        client.post(url, data, content_type="application/json", **headers)
+                raise _Rollback()
+        except _Rollback:
+            pass
+        return [q["sql"] for q in ctx.captured_queries]
+
+    def _explain(self, sql):
+        if connection.vendor == "sqlite":
+            prefix = "EXPLAIN QUERY PLAN"
+        else:
+            prefix = "EXPLAIN"
+        with connection.cursor() as cursor:
+            try:
+                cursor.execute(f"{prefix} {sql}")
+            except Exception as e:
+                return [f"explain failed: {e}"]
+            rows = cursor.fetchall()
+        # sqlite rows are (id, parent, notused, detail); postgres rows are single text columns
+        return [str(r[-1]) for r in rows]
+
+    def _is_seq_scan(self, line):
+        if connection.vendor == "sqlite":
+            # "SCAN courses_course" is a full table scan; "SCAN ... USING INDEX" walks an index
+            return line.startswith("SCAN ") and "USING" not in line and "CONSTANT ROW" not in line
+        return "Seq Scan" in line
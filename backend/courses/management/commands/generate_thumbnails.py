@@ -0,0 +1,121 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from ai import thumbnails
+from config import images
+from courses import cache
+from courses.models import Course, Lesson
+from courses.seeding import init_worker
+
+
+def _render(text):
+    try:
+        return thumbnails.render(text)
+    except Exception as exc:  # report it rather than abort the whole map
+        return exc
+
+
+class Command(BaseCommand):
+    help = (
+        "Render title-slide thumbnails for courses and lessons that have none (or an outdated generated one). "
+        "Slides are rendered in a process pool; rows whose inputs haven't changed are skipped. "
+        "New course thumbnails get their resized variants in the same run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--only", choices=["courses", "lessons"], action="append", help="Limit to these (repeatable)")
+        parser.add_argument("--course", type=int, action="append", help="Limit to these course ids (repeatable)")
+        parser.add_argument("--force", action="store_true", help="Re-render even when the inputs are unchanged")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows per render/bulk_update round")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        self.counts = {"rendered": 0, "unchanged": 0, "custom": 0, "failed": 0}
+        self.workers = max(options["workers"], 1)
+        self.force = options["force"]
+        only = options["only"] or ["courses", "lessons"]
+
+        courses = Course.objects.only("id", "title", "description", "thumbnail").order_by("id")
+        lessons = Lesson.objects.select_related("course").only("id", "title", "thumbnail", "course__title").order_by("id")
+        if options["course"]:
+            courses = courses.filter(id__in=options["course"])
+            lessons = lessons.filter(course_id__in=options["course"])
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker) as pool:
+            if "courses" in only:
+                updated = self._run(pool, courses, "course", thumbnails.course_text, Course, options["batch_size"])
+                # bulk_update sends no signals, so do what course_changed would have: variants and cache
+                for course in updated:
+                    images.refresh(Course, course.id, "thumbnail")
+                if updated:
+                    cache.bump_courses([course.id for course in updated], catalog=True)
+                self.stdout.write(f"  courses: {len(updated)} updated")
+            if "lessons" in only:
+                updated = self._run(
+                    pool, lessons, "lesson", lambda l: thumbnails.lesson_text(l, l.course.title), Lesson,
+                    options["batch_size"],
+                )
+                for course_id in {lesson.course_id for lesson in updated}:
+                    cache.bump_course(course_id)
+                self.stdout.write(f"  lessons: {len(updated)} updated")
+
+        elapsed = time.perf_counter() - started
+        c = self.counts
+        self.stdout.write(self.style.SUCCESS(
+            f"{c['rendered']} rendered, {c['unchanged']} unchanged, {c['custom']} with a custom thumbnail, "
+            f"{c['failed']} failed. Done in {elapsed:.2f}s"
+        ))
+
+    def _run(self, pool, queryset, kind, text_of, model, batch_size):
+        updated, batch = [], []
+        for obj in queryset.iterator(chunk_size=batch_size):
+            batch.append(obj)
+            if len(batch) == batch_size:
+                updated += self._batch(pool, kind, text_of, model, batch)
+                batch = []
+        if batch:
+            updated += self._batch(pool, kind, text_of, model, batch)
+        return updated
+
+    def _batch(self, pool, kind, text_of, model, objs):
+        pending = []  # (obj, rel, digest)
+        texts = {}  # digest -> text; identical slides are rendered once
+        for obj in objs:
+            if obj.thumbnail and not thumbnails.is_generated(obj.thumbnail):
+                self.counts["custom"] += 1
+                continue
+            text = text_of(obj)
+            digest = thumbnails.fingerprint(text)
+            rel = thumbnails.relative_path(kind, obj.id, digest)
+            if not self.force and thumbnails.is_current(obj.thumbnail, rel):
+                self.counts["unchanged"] += 1
+                continue
+            pending.append((obj, rel, digest))
+            texts[digest] = text
+        if not pending:
+            return []
+
+        digests = list(texts)
+        chunk = max(1, len(digests) // (self.workers * 4))
+        rendered = dict(zip(digests, pool.map(_render, [texts[d] for d in digests], chunksize=chunk)))
+        changed, stale = [], []
+        for obj, rel, digest in pending:
+            data = rendered[digest]
+            if isinstance(data, Exception):
+                self.counts["failed"] += 1
+                self.stderr.write(f"  {kind} {obj.id}: {data}")
+                continue
+            url = thumbnails.write(rel, data)
+            if obj.thumbnail != url:
+                stale.append(obj.thumbnail)
+            obj.thumbnail = url
+            changed.append(obj)
+            self.counts["rendered"] += 1
+        model.objects.bulk_update(changed, ["thumbnail"], batch_size=500)
+        for url in stale:
+            thumbnails.remove(url)
+        return changed
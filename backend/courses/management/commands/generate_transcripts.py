@@ -0,0 +1,115 @@
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from ai.batch import Checkpoint, generate_many
+from courses import cache
+from courses.models import Lesson
+
+MIN_TRANSCRIPT_CHARS = 50
+
+
+def _messages(title):
+    prompt = (
+        f"Create a structured mini-lesson on: {title}. "
+        "Use clear section headings, concise explanations, and bullet lists. "
+        "Keep it beginner-friendly. Respond in plain UTF-8 text only."
+    )
+    return [
+        {"role": "system", "content": "You are an expert course author."},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _missing_transcripts():
+    return (
+        Lesson.objects.filter(Q(transcript_blob__isnull=True) | Q(transcript_blob__size__lt=MIN_TRANSCRIPT_CHARS))
+        .only("id", "course_id", "title", "transcript_blob")
+        .order_by("id")
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate transcripts for lessons that miss them, with concurrent LLM calls paced per provider "
+        "(AI_PROVIDER_RPM). Progress is checkpointed so an interrupted run resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=8, help="Provider calls in flight at once")
+        parser.add_argument("--batch-size", type=int, default=50, help="Lessons per bulk_update")
+        parser.add_argument("--limit", type=int, help="Process at most this many lessons")
+        parser.add_argument(
+            "--checkpoint", default=str(settings.BASE_DIR / ".generate_transcripts.jsonl"),
+            help="Resume file; removed once every lesson has succeeded",
+        )
+        parser.add_argument("--retry-failed", action="store_true", help="Retry lessons that failed last run")
+
+    def handle(self, *args, **options):
+        checkpoint = Checkpoint(options["checkpoint"])
+        done, failed = checkpoint.load()
+        lessons = {lesson.id: lesson for lesson in _missing_transcripts()}
+
+        # text generated before a crash but never written to the database
+        recovered = [lid for lid in done if lid in lessons]
+        if recovered:
+            self._save([lessons.pop(lid) for lid in recovered], done, options["batch_size"])
+            self.stdout.write(f"Recovered {len(recovered)} transcripts from {checkpoint.path}.")
+        skipped = []
+        if failed and not options["retry_failed"]:
+            skipped = [lid for lid in failed if lid in lessons]
+            for lid in skipped:
+                del lessons[lid]
+            if skipped:
+                self.stdout.write(f"Skipping {len(skipped)} lessons that failed last run (use --retry-failed).")
+
+        todo = list(lessons.values())[: options["limit"]]
+        self.stdout.write(f"Generating {len(todo)} transcripts with concurrency {options['concurrency']}.")
+        started = time.perf_counter()
+        ok, errors = asyncio.run(self._generate(todo, checkpoint, options))
+        checkpoint.close(remove=not (errors or skipped))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Saved {ok} transcripts, {errors} failed, in {elapsed:.1f}s."
+        ))
+
+    async def _generate(self, todo, checkpoint, options):
+        by_id = {lesson.id: lesson for lesson in todo}
+        pending, texts = [], {}
+        errors = 0
+        save = sync_to_async(self._save)
+
+        async def on_result(lid, text, error):
+            nonlocal errors
+            checkpoint.write({"id": lid, "text": text} if text else {"id": lid, "error": error})
+            if not text:
+                errors += 1
+                self.stderr.write(f"  lesson {lid}: {error or 'no provider available'}")
+                return
+            texts[lid] = text
+            pending.append(by_id[lid])
+            if len(pending) >= options["batch_size"]:
+                batch = pending[:]
+                pending.clear()
+                await save(batch, texts, options["batch_size"])
+
+        ok = await generate_many(
+            [(lesson.id, lesson.title) for lesson in todo], _messages,
+            concurrency=options["concurrency"], endpoint="generate-transcripts", on_result=on_result,
+        )
+        if pending:
+            await save(pending, texts, options["batch_size"])
+        return ok, errors
+
+    def _save(self, lessons, texts, batch_size):
+        for lesson in lessons:
+            lesson.transcript = texts[lesson.id]
+            lesson.content = texts[lesson.id]
+        Lesson.objects.bulk_update(lessons, ["transcript", "content"], batch_size=batch_size)
+        for course_id in {lesson.course_id for lesson in lessons}:
+            cache.bump_course(course_id)
+        self.stdout.write(f"  saved {len(lessons)} lessons")
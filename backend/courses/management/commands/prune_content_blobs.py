@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+from django.db.models.functions import Length
+
+from courses import content_store
+from courses.models import ContentBlob
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete lesson text blobs no lesson refers to anymore (replaced transcripts, deleted lessons) "
+        "and report how much space the store saves. Run it off-peak: a blob being re-attached at the "
+        "same moment would be deleted from under the lesson being saved."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report the current sizes")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if not options["dry_run"]:
+            self.stdout.write(f"{content_store.prune()} unreferenced blobs deleted")
+        totals = ContentBlob.objects.aggregate(n=Count("digest"), chars=Sum("size"), stored=Sum(Length("data")))
+        self.stdout.write(
+            f"{totals['n']} blobs, {totals['chars'] or 0:,} characters stored in {totals['stored'] or 0:,} bytes"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Done in {time.perf_counter() - started:.2f}s"))
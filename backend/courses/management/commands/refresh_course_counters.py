@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from courses import cache, counters
+from courses.models import Course, Enrollment
+
+
+class Command(BaseCommand):
+    help = (
+        "Flush this process's buffered counters and recount Course.enrollment_count from Enrollment, "
+        "correcting drift from events lost in a crash. Optionally rebuild or rescale trending scores."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild-trending", action="store_true",
+            help="Recompute trending_score from enrollment dates (past views are not stored and are dropped)",
+        )
+        parser.add_argument(
+            "--rescale-from", type=float, metavar="OLD_EPOCH",
+            help="After moving counters.EPOCH forward, convert scores accumulated against OLD_EPOCH",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        counters.flush()
+        counts = (
+            Enrollment.objects.filter(course_id=OuterRef("pk")).order_by()
+            .values("course_id").annotate(n=Count("id")).values("n")
+        )
+        drifted = Course.objects.exclude(enrollment_count=Coalesce(Subquery(counts), 0))
+        fixed = drifted.update(enrollment_count=Coalesce(Subquery(counts), 0))
+        self.stdout.write(f"enrollment_count corrected on {fixed} courses")
+
+        if options["rescale_from"] is not None:
+            factor = 2 ** ((options["rescale_from"] - counters.EPOCH) / counters.HALF_LIFE)
+            Course.objects.update(trending_score=F("trending_score") * factor)
+            self.stdout.write(f"trending_score rescaled by {factor:.6g}")
+
+        if options["rebuild_trending"]:
+            scores = {}
+            rows = Enrollment.objects.values_list("course_id", "created_at").iterator(chunk_size=20000)
+            for course_id, created_at in rows:
+                scores[course_id] = scores.get(course_id, 0.0) + counters.trend_increment(
+                    counters.ENROLL_WEIGHT, created_at.timestamp(),
+                )
+            courses = list(Course.objects.only("id"))
+            for course in courses:
+                course.trending_score = scores.get(course.id, 0.0)
+            with transaction.atomic():
+                Course.objects.bulk_update(courses, ["trending_score"], batch_size=1000)
+            self.stdout.write(f"trending_score rebuilt for {len(courses)} courses")
+
+        if fixed or options["rebuild_trending"] or options["rescale_from"] is not None:
+            cache.bump_catalog()
+        self.stdout.write(self.style.SUCCESS(f"Done in {time.perf_counter() - started:.2f}s"))
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses import cache, recommend
+from courses.models import RecommendationRun
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute related-course neighbours (tf-idf text similarity + co-enrollment) and store the top K per "
+        "course. Skips work when courses and enrollments are unchanged since the last run; otherwise only "
+        "courses whose list changed are rewritten."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--k", type=int, default=6, help="Neighbours per course")
+        parser.add_argument("--text-weight", type=float, default=0.6, help="Weight of text vs co-enrollment")
+        parser.add_argument("--force", action="store_true", help="Recompute even if nothing changed")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        courses = recommend.load_courses()
+        fingerprint = recommend.fingerprint(courses)
+        last = RecommendationRun.objects.order_by("-id").first()
+        if last and last.fingerprint == fingerprint and not options["force"]:
+            self.stdout.write("Courses and enrollments unchanged since the last run; nothing to do.")
+            return
+
+        neighbors = recommend.top_neighbors(courses, k=options["k"], text_weight=options["text_weight"])
+        scored = time.perf_counter() - started
+        changed = recommend.write_neighbors(neighbors)
+        if changed:
+            cache.bump_catalog()
+        elapsed = time.perf_counter() - started
+        RecommendationRun.objects.create(
+            fingerprint=fingerprint, courses=len(courses), rows_changed=changed, seconds=round(elapsed, 3),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(courses)} courses scored in {scored:.2f}s; {changed} neighbour lists rewritten; {elapsed:.2f}s total"
+        ))
@@ -0,0 +1,152 @@
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.db.models import Avg, Count
+
+from courses.models import Course, Lesson, Review
+from courses.seeding import WORDS, init_worker, seed_chunk, zipf_weights
+from quizzes.models import Choice, Question, Quiz
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a production-scale synthetic dataset (users, enrollments, reviews, notes, discussions, "
+        "quiz attempts) with bulk_create, deterministic seeds and a pool of worker processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100_000)
+        parser.add_argument("--courses", type=int, default=500, help="Ensure at least this many courses exist")
+        parser.add_argument("--lessons", type=int, default=8, help="Lessons per newly created course")
+        parser.add_argument("--enrollments-per-user", type=float, default=10.0, help="Mean enrollments per user (exponential)")
+        parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent for course popularity (0 = uniform)")
+        parser.add_argument("--review-rate", type=float, default=0.15, help="Probability an enrollment leaves a review")
+        parser.add_argument("--note-rate", type=float, default=0.2)
+        parser.add_argument("--discussion-rate", type=float, default=0.05)
+        parser.add_argument("--attempt-rate", type=float, default=0.3)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--workers", type=int, default=4, help="Worker processes (forced to 1 on SQLite)")
+        parser.add_argument("--chunk-size", type=int, default=5_000, help="Users per worker task")
+        parser.add_argument("--batch-size", type=int, default=5_000, help="Rows per INSERT")
+
+    def handle(self, *args, **opts):
+        started = time.perf_counter()
+        rng = random.Random(opts["seed"])
+        self._ensure_courses(rng, opts)
+
+        course_ids = list(Course.objects.order_by("id").values_list("id", flat=True))
+        # popularity rank is independent of id order
+        rng.shuffle(course_ids)
+        lessons_by_course = {}
+        for lesson_id, course_id in Lesson.objects.values_list("id", "course_id"):
+            lessons_by_course.setdefault(course_id, []).append(lesson_id)
+        quizzes_by_course = {}
+        for quiz_id, course_id in Quiz.objects.values_list("id", "course_id"):
+            quizzes_by_course.setdefault(course_id, []).append(quiz_id)
+
+        plan = {
+            "seed": opts["seed"],
+            "batch_size": opts["batch_size"],
+            "course_ids": course_ids,
+            "cum_weights": zipf_weights(len(course_ids), opts["zipf"]),
+            "lessons_by_course": lessons_by_course,
+            "quizzes_by_course": quizzes_by_course,
+            "enrollments_per_user": opts["enrollments_per_user"],
+            "review_rate": opts["review_rate"],
+            "note_rate": opts["note_rate"],
+            "discussion_rate": opts["discussion_rate"],
+            "attempt_rate": opts["attempt_rate"],
+        }
+
+        # continue numbering after a previous run so usernames stay unique
+        user_start = User.objects.filter(username__startswith="seed_user_").count()
+        chunk = opts["chunk_size"]
+        tasks = [
+            (i, user_start + off, min(chunk, opts["users"] - off))
+            for i, off in enumerate(range(0, opts["users"], chunk))
+        ]
+        workers = opts["workers"]
+        if connection.vendor == "sqlite" and workers > 1:
+            self.stdout.write(self.style.WARNING("SQLite allows a single writer; running with 1 worker."))
+            workers = 1
+
+        totals = {}
+        if workers <= 1:
+            for task in tasks:
+                self._add(totals, seed_chunk(*task, plan))
+                self._progress(totals, started)
+        else:
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+                futures = [pool.submit(seed_chunk, *task, plan) for task in tasks]
+                for fut in as_completed(futures):
+                    self._add(totals, fut.result())
+                    self._progress(totals, started)
+
+        self._refresh_ratings()
+        elapsed = time.perf_counter() - started
+        rows = sum(totals.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Done in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s): "
+            + ", ".join(f"{k}={v:,}" for k, v in totals.items())
+        ))
+
+    def _ensure_courses(self, rng, opts):
+        missing = opts["courses"] - Course.objects.count()
+        if missing <= 0:
+            return
+        categories = ["Programming", "Data Science", "Design", "Business", "DevOps", "AI"]
+        start = Course.objects.filter(title__startswith="Bulk Course").count()
+        courses = Course.objects.bulk_create([
+            Course(
+                title=f"Bulk Course {start + i}",
+                description=" ".join(rng.choice(WORDS) for _ in range(40)),
+                category=rng.choice(categories),
+                level=rng.choice(["beginner", "intermediate", "advanced"]),
+                language=rng.choice(["English", "English", "Spanish", "Hindi"]),
+                price=rng.choice([0, 0, 9.99, 19.99, 49.99]),
+                tags=",".join(rng.sample(WORDS, 3)),
+            )
+            for i in range(missing)
+        ], batch_size=opts["batch_size"])
+        Lesson.objects.bulk_create([
+            Lesson(course=c, title=f"Lesson {n}", order=n, duration_seconds=rng.randint(120, 1200),
+                   content=" ".join(rng.choice(WORDS) for _ in range(200)))
+            for c in courses for n in range(1, opts["lessons"] + 1)
+        ], batch_size=opts["batch_size"])
+        quizzes = Quiz.objects.bulk_create([Quiz(course=c, title=f"{c.title} quiz") for c in courses], batch_size=opts["batch_size"])
+        questions = Question.objects.bulk_create(
+            [Question(quiz=q, text=f"Question {n}", order=n) for q in quizzes for n in range(1, 4)],
+            batch_size=opts["batch_size"],
+        )
+        Choice.objects.bulk_create(
+            [Choice(question=q, text=f"Choice {n}", is_correct=(n == 0)) for q in questions for n in range(3)],
+            batch_size=opts["batch_size"],
+        )
+        self.stdout.write(f"Created {len(courses)} courses with {opts['lessons']} lessons each.")
+
+    def _refresh_ratings(self):
+        stats = {
+            row["course_id"]: row
+            for row in Review.objects.values("course_id").annotate(avg=Avg("rating"), n=Count("id"))
+        }
+        courses = list(Course.objects.only("id", "rating_avg", "rating_count"))
+        for c in courses:
+            row = stats.get(c.id)
+            c.rating_avg = round(row["avg"], 2) if row else 0
+            c.rating_count = row["n"] if row else 0
+        Course.objects.bulk_update(courses, ["rating_avg", "rating_count"], batch_size=1000)
+
+    def _add(self, totals, counts):
+        for k, v in counts.items():
+            totals[k] = totals.get(k, 0) + v
+
+    def _progress(self, totals, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"  {totals.get('users', 0):,} users, {totals.get('enrollments', 0):,} enrollments ({elapsed:.1f}s)"
+        )
@@ -1,9 +1,38 @@
+import random
+
+from django.contrib.auth.models import User
 from django.core.management.base import BaseCommand
-from courses.models import Course, Lesson
+from django.db import transaction
+from django.utils import timezone
+
+from courses.models import Course, Lesson, Enrollment, Review, Discussion
+from quizzes.models import Quiz, Question, Choice, Attempt
+from users.models import Profile
+
+CATEGORIES = ["Programming", "Data Science", "Design", "Business", "DevOps", "AI"]
+LANGUAGES = ["English", "Spanish", "Hindi", "French"]
+LEVELS = ["beginner", "intermediate", "advanced"]
+WORDS = (
+    "python django react api data model cloud docker testing design pattern async cache query "
+    "index vector network security deploy pipeline stream graph learning neural"
+).split()
 
 
 class Command(BaseCommand):
-    help = "Create additional demo course and lessons if missing (ensures /api/courses/2 and lessons >=4 exist)."
+    help = (
+        "Create additional demo course and lessons if missing (ensures /api/courses/2 and lessons >=4 exist). "
+        "With --courses/--users it also seeds a synthetic dataset for benchmarking."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--courses", type=int, default=0, help="Synthetic courses to add")
+        parser.add_argument("--lessons", type=int, default=5, help="Lessons per synthetic course")
+        parser.add_argument("--users", type=int, default=0, help="Synthetic users to add")
+        parser.add_argument("--enrollments", type=int, default=3, help="Enrollments per synthetic user")
+        parser.add_argument("--reviews", type=int, default=5, help="Reviews per synthetic course")
+        parser.add_argument("--discussions", type=int, default=2, help="Discussion threads per synthetic lesson")
+        parser.add_argument("--attempts", type=int, default=1, help="Quiz attempts per synthetic user")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed (same seed -> same dataset)")
 
     def handle(self, *args, **options):
         # Ensure at least two courses
@@ -28,4 +57,97 @@ class Command(BaseCommand):
             self.stdout.write(self.style.SUCCESS("Created demo course id=2 with 3 lessons."))
         else:
             self.stdout.write("Course id=2 already exists. Skipping.")
+
+        if options["courses"] or options["users"]:
+            with transaction.atomic():
+                self._seed_synthetic(random.Random(options["seed"]), options)
         self.stdout.write(self.style.SUCCESS("Done."))
+
+    def _sentence(self, rng, n):
+        return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+    def _seed_synthetic(self, rng, opts):
+        start = Course.objects.filter(title__startswith="Synthetic Course").count()
+        courses = Course.objects.bulk_create([
+            Course(
+                title=f"Synthetic Course {start + i}",
+                description=" ".join(self._sentence(rng, 12) for _ in range(3)),
+                instructor="Bench Instructor",
+                category=rng.choice(CATEGORIES),
+                level=rng.choice(LEVELS),
+                language=rng.choice(LANGUAGES),
+                price=rng.choice([0, 0, 9.99, 19.99, 49.99]),
+                tags=",".join(rng.sample(WORDS, 3)),
+            )
+            for i in range(opts["courses"])
+        ], batch_size=500)
+        lessons = Lesson.objects.bulk_create([
+            Lesson(
+                course=c, title=f"{c.title} - Lesson {n}", order=n,
+                content="\n\n".join(self._sentence(rng, 40) for _ in range(5)),
+                transcript="\n\n".join(self._sentence(rng, 40) for _ in range(5)),
+                duration_seconds=rng.randint(120, 1200),
+            )
+            for c in courses for n in range(1, opts["lessons"] + 1)
+        ], batch_size=500)
+
+        quizzes = Quiz.objects.bulk_create([Quiz(course=c, title=f"{c.title} quiz") for c in courses], batch_size=500)
+        questions = Question.objects.bulk_create([
+            Question(quiz=q, text=self._sentence(rng, 8), order=n) for q in quizzes for n in range(1, 4)
+        ], batch_size=500)
+        Choice.objects.bulk_create([
+            Choice(question=q, text=self._sentence(rng, 3), is_correct=(n == 0)) for q in questions for n in range(3)
+        ], batch_size=1000)
+
+        ustart = User.objects.filter(username__startswith="bench_user_").count()
+        users = User.objects.bulk_create([
+            User(username=f"bench_user_{ustart + i}", email=f"bench{ustart + i}@example.com", password="!")
+            for i in range(opts["users"])
+        ], batch_size=1000)
+        # bulk_create skips the post_save signal that normally creates profiles
+        Profile.objects.bulk_create([Profile(user=u) for u in users], batch_size=1000)
+
+        all_courses = courses or list(Course.objects.all())
+        all_users = users or list(User.objects.filter(username__startswith="bench_user_"))
+        enrollments = []
+        for u in users:
+            for c in rng.sample(all_courses, min(opts["enrollments"], len(all_courses))):
+                enrollments.append(Enrollment(user=u, course=c, progress_percent=rng.choice([0, 25, 50, 100])))
+        Enrollment.objects.bulk_create(enrollments, batch_size=1000, ignore_conflicts=True)
+
+        reviews = []
+        for c in courses:
+            for u in rng.sample(all_users, min(opts["reviews"], len(all_users))):
+                reviews.append(Review(user=u, course=c, rating=rng.randint(1, 5), text=self._sentence(rng, 15)))
+        Review.objects.bulk_create(reviews, batch_size=1000, ignore_conflicts=True)
+        for c in courses:
+            ratings = [r.rating for r in reviews if r.course_id == c.id]
+            if ratings:
+                c.rating_avg = round(sum(ratings) / len(ratings), 2)
+                c.rating_count = len(ratings)
+        Course.objects.bulk_update(courses, ["rating_avg", "rating_count"], batch_size=500)
+
+        threads = []
+        if all_users:
+            for l in lessons:
+                for _ in range(opts["discussions"]):
+                    threads.append(Discussion(user=rng.choice(all_users), lesson=l, text=self._sentence(rng, 20)))
+        threads = Discussion.objects.bulk_create(threads, batch_size=1000)
+        Discussion.objects.bulk_create([
+            Discussion(user=rng.choice(all_users), lesson_id=t.lesson_id, parent=t, text=self._sentence(rng, 10))
+            for t in threads
+        ], batch_size=1000)
+
+        all_quizzes = quizzes or list(Quiz.objects.all())
+        now = timezone.now()
+        attempts = []
+        if all_quizzes:
+            for u in users:
+                for _ in range(opts["attempts"]):
+                    attempts.append(Attempt(user=u, quiz=rng.choice(all_quizzes), score=rng.choice([0, 33.3, 66.7, 100]), finished_at=now))
+        Attempt.objects.bulk_create(attempts, batch_size=1000)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(courses)} courses, {len(lessons)} lessons, {len(users)} users, {len(enrollments)} enrollments, "
+            f"{len(reviews)} reviews, {len(threads) * 2} discussion posts, {len(attempts)} attempts."
+        ))
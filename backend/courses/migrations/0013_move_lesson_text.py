@@ -0,0 +1,82 @@
+"""Copy Lesson.transcript/content into ContentBlob, CHUNK lessons per transaction.
+
+Not atomic as a whole: on a large table one transaction would hold the write
+lock for minutes. Each chunk commits on its own and only lessons without
+blobs yet are picked up, so an interrupted run resumes where it stopped.
+"""
+from django.db import migrations, transaction
+from django.db.models import Q
+
+from courses.content_store import decode, digest, encode
+
+CHUNK = 1000
+
+
+def move_text(apps, schema_editor):
+    Lesson = apps.get_model("courses", "Lesson")
+    ContentBlob = apps.get_model("courses", "ContentBlob")
+    db = schema_editor.connection.alias
+    pending = Lesson.objects.using(db).filter(
+        Q(transcript__isnull=False, transcript_blob__isnull=True) | Q(content__isnull=False, content_blob__isnull=True)
+    )
+    last = 0
+    while True:
+        with transaction.atomic(using=db):
+            rows = list(pending.filter(id__gt=last).order_by("id").values_list("id", "transcript", "content")[:CHUNK])
+            if not rows:
+                return
+            texts = {digest(t): t for _, *pair in rows for t in pair if t is not None}
+            existing = set(ContentBlob.objects.using(db).filter(digest__in=list(texts)).values_list("digest", flat=True))
+            blobs = []
+            for key, text in texts.items():
+                if key not in existing:
+                    codec, data = encode(text)
+                    blobs.append(ContentBlob(digest=key, codec=codec, size=len(text), data=data))
+            ContentBlob.objects.using(db).bulk_create(blobs, batch_size=500)
+            Lesson.objects.using(db).bulk_update([
+                Lesson(
+                    id=lesson_id,
+                    transcript_blob_id=None if transcript is None else digest(transcript),
+                    content_blob_id=None if content is None else digest(content),
+                )
+                for lesson_id, transcript, content in rows
+            ], ["transcript_blob", "content_blob"], batch_size=500)
+            last = rows[-1][0]
+
+
+def restore_text(apps, schema_editor):
+    Lesson = apps.get_model("courses", "Lesson")
+    ContentBlob = apps.get_model("courses", "ContentBlob")
+    db = schema_editor.connection.alias
+    last = 0
+    while True:
+        with transaction.atomic(using=db):
+            rows = list(
+                Lesson.objects.using(db).filter(id__gt=last).order_by("id")
+                .values_list("id", "transcript_blob_id", "content_blob_id")[:CHUNK]
+            )
+            if not rows:
+                return
+            keys = {key for _, *pair in rows for key in pair if key is not None}
+            texts = {
+                key: decode(codec, data)
+                for key, codec, data in ContentBlob.objects.using(db).filter(digest__in=list(keys))
+                .values_list("digest", "codec", "data")
+            }
+            Lesson.objects.using(db).bulk_update([
+                Lesson(id=lesson_id, transcript=texts.get(transcript), content=texts.get(content))
+                for lesson_id, transcript, content in rows
+            ], ["transcript", "content"], batch_size=500)
+            last = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('courses', '0012_content_blobs'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_text, restore_text),
+    ]
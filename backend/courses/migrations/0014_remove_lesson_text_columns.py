@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 21:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0013_move_lesson_text'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='lesson',
+            name='content',
+        ),
+        migrations.RemoveField(
+            model_name='lesson',
+            name='transcript',
+        ),
+    ]
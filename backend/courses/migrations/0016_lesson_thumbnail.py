@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0015_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='thumbnail',
+            field=models.URLField(blank=True, null=True),
+        ),
+    ]
@@ -1,6 +1,11 @@
+import uuid
+
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import User
 
+from . import content_store
+
 class Course(models.Model):
     LEVEL_CHOICES = (
         ("beginner", "Beginner"),
@@ -20,27 +25,119 @@ class Course(models.Model):
     tags = models.CharField(max_length=255, blank=True, default="")  # comma-separated
     trailer_video_url = models.URLField(blank=True, null=True)
     thumbnail = models.URLField(blank=True, null=True)
+    thumbnail_variants = models.JSONField(default=dict, blank=True)  # resized copies, see config/images.py
     type = models.CharField(max_length=20, default="recorded", choices=[("recorded", "Recorded"), ("ai", "AI Lesson")])
+    # maintained by courses/counters.py; buffered, so they trail live traffic by a few seconds
+    view_count = models.PositiveIntegerField(default=0)
+    enrollment_count = models.PositiveIntegerField(default=0)
+    trending_score = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            # catalog facets: category/language are matched case-insensitively
+            models.Index(Lower("category"), name="course_category_lower_idx"),
+            models.Index(Lower("language"), name="course_language_lower_idx"),
+            models.Index(fields=["level", "rating_avg"], name="course_level_rating_idx"),
+            models.Index(fields=["rating_avg"], name="course_rating_idx"),
+            models.Index(fields=["price"], name="course_price_idx"),
+            # catalog sort orders
+            models.Index(fields=["-enrollment_count", "-id"], name="course_popular_idx"),
+            models.Index(fields=["-trending_score", "-id"], name="course_trending_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
 
+class ContentBlob(models.Model):
+    """A distinct lesson text, compressed (courses/content_store.py)."""
+    digest = models.CharField(max_length=64, primary_key=True)  # sha256 of the text
+    codec = models.CharField(max_length=8)  # zstd, zlib or raw
+    size = models.PositiveIntegerField()  # characters, so length filters need not decode
+    data = models.BinaryField()
+
+    def __str__(self):
+        return f"{self.digest[:12]} ({self.size} chars, {self.codec})"
+
+
+class LessonQuerySet(models.QuerySet):
+    """Stores transcript/content blobs before the bulk writes, which bypass Lesson.save()."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        content_store.attach(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        content_store.attach(objs)
+        return super().bulk_update(objs, content_store.blob_fields(fields), *args, **kwargs)
+
+
 class Lesson(models.Model):
     course = models.ForeignKey(Course, related_name="lessons", on_delete=models.CASCADE)
     title = models.CharField(max_length=200)
     video_url = models.URLField(blank=True, null=True)
-    content = models.TextField(blank=True, null=True)
-    transcript = models.TextField(blank=True, null=True)
+    thumbnail = models.URLField(blank=True, null=True)  # title slide, see ai/thumbnails.py
+    # the text itself lives in ContentBlob; see the content/transcript properties below
+    content_blob = models.ForeignKey(
+        ContentBlob, null=True, blank=True, related_name="+", on_delete=models.PROTECT,
+    )
+    transcript_blob = models.ForeignKey(
+        ContentBlob, null=True, blank=True, related_name="+", on_delete=models.PROTECT,
+    )
     duration_seconds = models.PositiveIntegerField(default=0)
     order = models.PositiveIntegerField(default=1)
 
+    objects = LessonQuerySet.as_manager()
+
+    content = content_store.text_property("content")
+    transcript = content_store.text_property("transcript")
+
     class Meta:
         ordering = ["order"]
+        indexes = [
+            models.Index(fields=["course", "order"], name="lesson_course_order_idx"),
+        ]
 
     def __str__(self):
         return f"{self.course.title} - {self.title}"
 
+    def save(self, *args, **kwargs):
+        content_store.attach([self])
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = content_store.blob_fields(kwargs["update_fields"])
+        super().save(*args, **kwargs)
+
+
+class CourseNeighbor(models.Model):
+    """Precomputed related courses (courses/recommend.py, `refresh_recommendations`)."""
+    course = models.ForeignKey(Course, related_name="neighbors", on_delete=models.CASCADE)
+    neighbor = models.ForeignKey(Course, related_name="recommended_for", on_delete=models.CASCADE)
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ("course", "neighbor")
+        indexes = [
+            models.Index(fields=["course", "rank"], name="courseneighbor_course_rank_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.course_id} -> {self.neighbor_id} ({self.score:.3f})"
+
+
+class RecommendationRun(models.Model):
+    """One refresh of CourseNeighbor; the fingerprint lets unchanged data skip the next run."""
+    created_at = models.DateTimeField(auto_now_add=True)
+    fingerprint = models.CharField(max_length=64)
+    courses = models.PositiveIntegerField(default=0)
+    rows_changed = models.PositiveIntegerField(default=0)
+    seconds = models.FloatField(default=0)
+
+    def __str__(self):
+        return f"{self.created_at:%Y-%m-%d %H:%M} ({self.rows_changed} changed)"
+
 
 class Enrollment(models.Model):
     user = models.ForeignKey(User, related_name="enrollments", on_delete=models.CASCADE)
@@ -67,6 +164,9 @@ class Review(models.Model):
     class Meta:
         unique_together = ("user", "course")
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["course", "-created_at"], name="review_course_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.course.title} - {self.rating} by {self.user.username}"
@@ -81,6 +181,9 @@ class Note(models.Model):
 
     class Meta:
         ordering = ["timestamp_seconds", "created_at"]
+        indexes = [
+            models.Index(fields=["user", "lesson", "timestamp_seconds"], name="note_user_lesson_ts_idx"),
+        ]
 
 
 class Discussion(models.Model):
@@ -92,3 +195,38 @@ class Discussion(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["lesson", "parent", "-created_at"], name="discussion_lesson_parent_idx"),
+        ]
+
+
+class Certificate(models.Model):
+    """Issued once per (user, course); the PDF is rendered at issue time and stored."""
+    user = models.ForeignKey(User, related_name="certificates", on_delete=models.CASCADE)
+    course = models.ForeignKey(Course, related_name="certificates", on_delete=models.CASCADE)
+    verification_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    recipient_name = models.CharField(max_length=150)
+    issued_at = models.DateTimeField(auto_now_add=True)
+    pdf = models.FileField(upload_to="certificates/", blank=True)
+
+    class Meta:
+        unique_together = ("user", "course")
+
+    def __str__(self):
+        return f"{self.recipient_name} - {self.course_id} ({self.verification_id})"
+
+
+class RecentView(models.Model):
+    """Last time a signed-in user opened a course; written in batches by courses/history.py."""
+    user = models.ForeignKey(User, related_name="recent_views", on_delete=models.CASCADE)
+    course = models.ForeignKey(Course, related_name="recent_views", on_delete=models.CASCADE)
+    viewed_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("user", "course")
+        indexes = [
+            models.Index(fields=["user", "-viewed_at"], name="recentview_user_time_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} viewed {self.course_id} at {self.viewed_at}"
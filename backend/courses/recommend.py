@@ -0,0 +1,159 @@
+"""Offline related-course scoring.
+
+score(a, b) = TEXT_WEIGHT * cosine(tfidf(a), tfidf(b))
+            + (1 - TEXT_WEIGHT) * co(a, b) / sqrt(n(a) * n(b))
+
+tf-idf vectors come from title, tags (counted twice), category and
+description. co(a, b) counts users enrolled in both courses, and n(c) counts
+enrollments, so the second term is a cosine over enrollment sets. Scores are
+computed in row blocks with NumPy matrix products and the top K per course are
+picked with ``argpartition``. Only the courses whose neighbour list changed
+are rewritten.
+"""
+import hashlib
+import math
+import re
+from collections import Counter
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Max
+
+from .models import Course, CourseNeighbor, Enrollment
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#.-]*")
+_STOP = frozenset(
+    "a an and are as at be by for from how in into is it of on or that the this to with you your learn course "
+    "introduction basics".split()
+)
+# one user's enrollments produce n^2 pairs; very broad learners add little signal
+MAX_COURSES_PER_USER = 50
+
+
+def _tokens(course):
+    tags = [t.strip().lower() for t in (course["tags"] or "").split(",") if t.strip()]
+    words = _TOKEN.findall(f"{course['title']} {course['category']} {course['description']}".lower())
+    return [w for w in words if w not in _STOP] + tags * 2
+
+
+def tfidf_matrix(courses, max_features=4096):
+    """Row-normalised float32 tf-idf matrix (len(courses) x vocab)."""
+    docs = [Counter(_tokens(c)) for c in courses]
+    df = Counter(term for doc in docs for term in doc)
+    vocab = [t for t, n in df.most_common(max_features) if n >= 2 or len(docs) < 3]
+    index = {t: i for i, t in enumerate(vocab)}
+    idf = np.array([math.log((1 + len(docs)) / (1 + df[t])) + 1 for t in vocab], dtype=np.float32)
+    x = np.zeros((len(docs), len(vocab)), dtype=np.float32)
+    for row, doc in enumerate(docs):
+        for term, count in doc.items():
+            col = index.get(term)
+            if col is not None:
+                x[row, col] = 1 + math.log(count)
+    x *= idf
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    np.divide(x, norms, out=x, where=norms > 0)
+    return x
+
+
+def co_enrollment(position):
+    """(rows, cols, weights) of the normalised co-enrollment matrix, both directions."""
+    rows = Enrollment.objects.order_by("user_id").values_list("user_id", "course_id").iterator(chunk_size=20000)
+    pairs = np.array([(u, position[c]) for u, c in rows if c in position], dtype=np.int64).reshape(-1, 2)
+    empty = (np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0, np.float32))
+    if not len(pairs):
+        return empty
+    users, courses = pairs[:, 0], pairs[:, 1]
+    per_course = np.bincount(courses, minlength=len(position)).astype(np.float32)
+
+    # group boundaries per user, then every ordered pair within a group
+    starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+    sizes = np.diff(np.r_[starts, len(users)])
+    keep = (sizes > 1) & (sizes <= MAX_COURSES_PER_USER)
+    starts, sizes = starts[keep], sizes[keep]
+    if not len(starts):
+        return empty
+    reps = sizes * sizes
+    group_start = np.repeat(starts, reps)
+    group_size = np.repeat(sizes, reps)
+    offset = np.arange(reps.sum()) - np.repeat(np.cumsum(reps) - reps, reps)
+    a = courses[group_start + offset // group_size]
+    b = courses[group_start + offset % group_size]
+    mask = a != b
+    n = len(position)
+    keys, counts = np.unique(a[mask] * n + b[mask], return_counts=True)
+    rows, cols = keys // n, keys % n
+    weights = counts / np.sqrt(per_course[rows] * per_course[cols])
+    return rows, cols, weights.astype(np.float32)
+
+
+def top_neighbors(courses, k=6, text_weight=0.6, block=512):
+    """{course_id: [(neighbor_id, score), ...]} best first."""
+    ids = np.array([c["id"] for c in courses], dtype=np.int64)
+    position = {int(cid): i for i, cid in enumerate(ids)}
+    x = tfidf_matrix(courses)
+    co_rows, co_cols, co_w = co_enrollment(position)
+    order = np.argsort(co_rows, kind="stable")
+    co_rows, co_cols, co_w = co_rows[order], co_cols[order], co_w[order]
+
+    result = {}
+    k = min(k, len(ids) - 1)
+    if k <= 0:
+        return {int(cid): [] for cid in ids}
+    for start in range(0, len(ids), block):
+        stop = min(start + block, len(ids))
+        scores = text_weight * (x[start:stop] @ x.T)
+        lo, hi = np.searchsorted(co_rows, [start, stop])
+        if hi > lo:
+            np.add.at(scores, (co_rows[lo:hi] - start, co_cols[lo:hi]), (1 - text_weight) * co_w[lo:hi])
+        scores[np.arange(stop - start), np.arange(start, stop)] = -np.inf  # never recommend itself
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        ranked = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, ranked, axis=1)
+        top_scores = np.take_along_axis(top_scores, ranked, axis=1)
+        for r in range(stop - start):
+            result[int(ids[start + r])] = [
+                (int(ids[c]), round(float(s), 4)) for c, s in zip(top[r], top_scores[r]) if s > 0
+            ]
+    return result
+
+
+def fingerprint(courses):
+    """Changes whenever course text or the enrollment set changes."""
+    h = hashlib.sha256()
+    for c in courses:
+        h.update(f"{c['id']}\0{c['title']}\0{c['category']}\0{c['tags']}\0{c['description']}\1".encode())
+    enrollments = Enrollment.objects.aggregate(n=Count("id"), last=Max("id"))
+    h.update(f"{enrollments['n']}:{enrollments['last']}".encode())
+    return h.hexdigest()
+
+
+def load_courses():
+    return list(Course.objects.order_by("id").values("id", "title", "category", "tags", "description"))
+
+
+def write_neighbors(neighbors):
+    """Replace the stored lists whose neighbours or order changed. Returns the number of courses rewritten.
+
+    Scores alone are not compared: any text change shifts idf and with it
+    every score slightly, which would otherwise rewrite the whole table.
+    """
+    current = {}
+    for course_id, neighbor_id in CourseNeighbor.objects.order_by("course_id", "rank").values_list(
+        "course_id", "neighbor_id"
+    ).iterator(chunk_size=20000):
+        current.setdefault(course_id, []).append(neighbor_id)
+    changed = [cid for cid, rows in neighbors.items() if current.get(cid, []) != [nid for nid, _ in rows]]
+    if not changed:
+        return 0
+    with transaction.atomic():
+        for i in range(0, len(changed), 500):
+            CourseNeighbor.objects.filter(course_id__in=changed[i:i + 500]).delete()
+        CourseNeighbor.objects.bulk_create(
+            [
+                CourseNeighbor(course_id=cid, neighbor_id=nid, rank=rank, score=score)
+                for cid in changed for rank, (nid, score) in enumerate(neighbors[cid], start=1)
+            ],
+            batch_size=2000,
+        )
+    return len(changed)
@@ -0,0 +1,111 @@
+"""Chunk worker for the ``seed_bulk`` management command.
+
+Kept free of module-level model imports so it can be loaded by spawned worker
+processes (the default on Windows) before Django is configured.
+"""
+import bisect
+import itertools
+import os
+import random
+
+WORDS = (
+    "python django react api data model cloud docker testing design pattern async cache query "
+    "index vector network security deploy pipeline stream graph learning neural"
+).split()
+
+
+def zipf_weights(n, s):
+    """Cumulative Zipf weights for ranks 1..n (rank 1 = most popular)."""
+    return list(itertools.accumulate(1.0 / (k ** s) for k in range(1, n + 1)))
+
+
+def init_worker():
+    import django
+    from django.apps import apps
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    if not apps.ready:
+        django.setup()
+    # never share the parent's DB connection across a fork
+    from django.db import connections
+    for conn in connections.all(initialized_only=True):
+        conn.close()
+
+
+def _text(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def _sample_courses(rng, course_ids, cum_weights, k):
+    total = cum_weights[-1]
+    picked = set()
+    # popular courses collide often under Zipf, so cap the number of draws
+    for _ in range(k * 4):
+        if len(picked) >= k:
+            break
+        picked.add(course_ids[bisect.bisect_left(cum_weights, rng.random() * total)])
+    return picked
+
+
+def seed_chunk(chunk_index, user_start, user_count, plan):
+    """Create ``user_count`` users and their activity; returns row counts.
+
+    The RNG is seeded from (seed, chunk_index) so the dataset depends only on
+    the seed and chunk size, not on how many workers run the chunks.
+    """
+    from django.contrib.auth.models import User
+    from django.db import transaction
+    from django.utils import timezone
+
+    from courses.models import Enrollment, Review, Note, Discussion
+    from quizzes.models import Attempt
+    from users.models import Profile
+
+    rng = random.Random(plan["seed"] * 1_000_003 + chunk_index)
+    batch = plan["batch_size"]
+    course_ids = plan["course_ids"]
+    cum = plan["cum_weights"]
+    lessons_by_course = plan["lessons_by_course"]
+    quizzes_by_course = plan["quizzes_by_course"]
+    now = timezone.now()
+    counts = dict.fromkeys(["users", "enrollments", "reviews", "notes", "discussions", "attempts"], 0)
+
+    with transaction.atomic():
+        users = User.objects.bulk_create([
+            User(username=f"seed_user_{i}", email=f"seed{i}@example.com", password="!")
+            for i in range(user_start, user_start + user_count)
+        ], batch_size=batch)
+        Profile.objects.bulk_create([Profile(user_id=u.id) for u in users], batch_size=batch)
+        counts["users"] = len(users)
+
+        enrollments, reviews, notes, discussions, attempts = [], [], [], [], []
+        for u in users:
+            k = max(1, min(len(course_ids), round(rng.expovariate(1 / plan["enrollments_per_user"]))))
+            for course_id in _sample_courses(rng, course_ids, cum, k):
+                progress = rng.choice((0, 0, 10, 25, 50, 75, 100))
+                enrollments.append(Enrollment(user_id=u.id, course_id=course_id, progress_percent=progress))
+                if rng.random() < plan["review_rate"]:
+                    reviews.append(Review(user_id=u.id, course_id=course_id, rating=rng.choices((1, 2, 3, 4, 5), (1, 1, 3, 6, 9))[0], text=_text(rng, 12)))
+                lessons = lessons_by_course.get(course_id)
+                if lessons:
+                    for _ in range(int(rng.random() < plan["note_rate"]) * rng.randint(1, 3)):
+                        notes.append(Note(user_id=u.id, lesson_id=rng.choice(lessons), timestamp_seconds=rng.randint(0, 900), text=_text(rng, 10)))
+                    if rng.random() < plan["discussion_rate"]:
+                        discussions.append(Discussion(user_id=u.id, lesson_id=rng.choice(lessons), text=_text(rng, 20)))
+                quiz_ids = quizzes_by_course.get(course_id)
+                if quiz_ids and rng.random() < plan["attempt_rate"]:
+                    attempts.append(Attempt(user_id=u.id, quiz_id=rng.choice(quiz_ids), score=rng.choice((0, 33.3, 66.7, 100)), finished_at=now))
+
+            if len(enrollments) >= batch:
+                Enrollment.objects.bulk_create(enrollments, batch_size=batch)
+                counts["enrollments"] += len(enrollments)
+                enrollments = []
+
+        Enrollment.objects.bulk_create(enrollments, batch_size=batch)
+        counts["enrollments"] += len(enrollments)
+        Review.objects.bulk_create(reviews, batch_size=batch)
+        Note.objects.bulk_create(notes, batch_size=batch)
+        Discussion.objects.bulk_create(discussions, batch_size=batch)
+        Attempt.objects.bulk_create(attempts, batch_size=batch)
+        counts.update(reviews=len(reviews), notes=len(notes), discussions=len(discussions), attempts=len(attempts))
+    return counts
@@ -1,13 +1,38 @@
+from django.db import models
 from rest_framework import serializers
+
+from config import images
+from config.serializers import TimedListSerializer, TimedModelSerializer
+
+from . import content_store
 from .models import Course, Lesson, Enrollment, Review, Note, Discussion
 
-class LessonSerializer(serializers.ModelSerializer):
+
+def _instances(data):
+    return list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+
+
+class LessonListSerializer(TimedListSerializer):
+    def to_representation(self, data):
+        lessons = _instances(data)
+        content_store.load_texts(lessons)  # one query for the whole list
+        return super().to_representation(lessons)
+
+
+class LessonSerializer(TimedModelSerializer):
+    def to_representation(self, instance):
+        if self.parent is None:  # in a list, LessonListSerializer has loaded them already
+            content_store.load_texts([instance])  # both fields in one query
+        return super().to_representation(instance)
+
     class Meta:
         model = Lesson
+        list_serializer_class = LessonListSerializer
         fields = [
             "id",
             "title",
             "video_url",
+            "thumbnail",
             "content",
             "transcript",
             "duration_seconds",
@@ -15,11 +40,29 @@ class LessonSerializer(serializers.ModelSerializer):
         ]
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseListSerializer(TimedListSerializer):
+    def to_representation(self, data):
+        courses = _instances(data)
+        # with lessons prefetched, read every lesson's text in one go rather than per course
+        content_store.load_texts([
+            lesson for course in courses
+            if "lessons" in getattr(course, "_prefetched_objects_cache", {})
+            for lesson in course.lessons.all()
+        ])
+        return super().to_representation(courses)
+
+
+class CourseSerializer(TimedModelSerializer):
     lessons = LessonSerializer(many=True, read_only=True)
+    thumbnail_variants = serializers.SerializerMethodField()
+
+    def get_thumbnail_variants(self, obj):
+        # site-relative URLs: catalog responses are cached and shared across hosts
+        return images.variant_urls(obj, "thumbnail")
 
     class Meta:
         model = Course
+        list_serializer_class = CourseListSerializer
         fields = [
             "id",
             "title",
@@ -31,15 +74,30 @@ class CourseSerializer(serializers.ModelSerializer):
             "price",
             "rating_avg",
             "rating_count",
+            "view_count",
+            "enrollment_count",
             "tags",
             "trailer_video_url",
             "thumbnail",
+            "thumbnail_variants",
             "type",
             "lessons",
         ]
 
 
-class EnrollmentSerializer(serializers.ModelSerializer):
+class CachedCourseSerializer(CourseSerializer):
+    """CourseSerializer without the popularity counters, for responses kept in the course cache.
+
+    The counters change on every flush (courses/counters.py); leaving them in
+    would invalidate a popular course's cached responses every few seconds.
+    CourseStatsView serves them uncached.
+    """
+
+    class Meta(CourseSerializer.Meta):
+        fields = [f for f in CourseSerializer.Meta.fields if f not in ("view_count", "enrollment_count")]
+
+
+class EnrollmentSerializer(TimedModelSerializer):
     class Meta:
         model = Enrollment
         fields = [
@@ -53,7 +111,7 @@ class EnrollmentSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at"]
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(TimedModelSerializer):
     user_name = serializers.CharField(source="user.username", read_only=True)
 
     class Meta:
@@ -62,14 +120,14 @@ class ReviewSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at", "user"]
 
 
-class NoteSerializer(serializers.ModelSerializer):
+class NoteSerializer(TimedModelSerializer):
     class Meta:
         model = Note
         fields = ["id", "lesson", "timestamp_seconds", "text", "created_at"]
         read_only_fields = ["id", "created_at"]
 
 
-class DiscussionSerializer(serializers.ModelSerializer):
+class DiscussionSerializer(TimedModelSerializer):
     user_name = serializers.CharField(source="user.username", read_only=True)
     replies = serializers.SerializerMethodField()
 
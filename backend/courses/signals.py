@@ -0,0 +1,30 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from config import images
+
+from . import cache
+from .models import Course, Lesson, Review
+
+
+@receiver([post_save, post_delete], sender=Course)
+def course_changed(sender, instance, **kwargs):
+    # other courses' related lists include this one
+    cache.bump_course(instance.pk, catalog=True)
+    if kwargs["signal"] is post_save and images.needs_refresh(instance, "thumbnail"):
+        images.schedule(refresh_thumbnail, instance.pk)
+
+
+def refresh_thumbnail(course_id):
+    if images.refresh(Course, course_id, "thumbnail"):
+        cache.bump_course(course_id, catalog=True)  # update() skips the signal above
+
+
+@receiver([post_save, post_delete], sender=Lesson)
+def lesson_changed(sender, instance, **kwargs):
+    cache.bump_course(instance.course_id)
+
+
+@receiver([post_save, post_delete], sender=Review)
+def review_changed(sender, instance, **kwargs):
+    cache.bump_course(instance.course_id)
@@ -0,0 +1,110 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import transaction
+from django.test import TestCase
+
+from courses import cache, facets
+from courses.models import Course, Lesson, Review
+
+
+@mock.patch("courses.history.record_view")
+@mock.patch("courses.counters.course_viewed")
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        caches[settings.COURSE_CACHE_ALIAS].clear()
+        self.course = Course.objects.create(title="Rust", description="Systems", instructor="Ana", category="Code")
+        self.other = Course.objects.create(title="Go", description="Services", instructor="Ben", category="Code")
+        self.lesson = Lesson.objects.create(course=self.course, title="Ownership", order=1, content="text")
+
+    def get(self, path, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get(path, HTTP_ACCEPT="application/json", **headers)
+
+    def write(self, fn, *args, **kwargs):
+        # the bumps run on commit, which TestCase otherwise never reaches
+        with self.captureOnCommitCallbacks(execute=True):
+            return fn(*args, **kwargs)
+
+    def test_detail_is_served_from_cache_until_the_course_changes(self, *mocks):
+        url = f"/api/courses/{self.course.pk}/"
+        self.assertEqual(self.get(url).json()["title"], "Rust")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get(url).json()["title"], "Rust")
+
+        self.course.title = "Rust in practice"
+        self.write(self.course.save)
+
+        self.assertEqual(self.get(url).json()["title"], "Rust in practice")
+
+    def test_etag_answers_304_until_a_lesson_or_review_changes(self, *mocks):
+        url = f"/api/courses/{self.course.pk}/lessons/"
+        etag = self.get(url)["ETag"]
+        self.assertEqual(self.get(url, etag).status_code, 304)
+
+        self.write(Lesson.objects.create, course=self.course, title="Borrowing", order=2)
+        response = self.get(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([l["title"] for l in response.json()], ["Ownership", "Borrowing"])
+
+        etag = response["ETag"]
+        user = User.objects.create_user("rev", "r@example.com", "pw")
+        self.write(Review.objects.create, course=self.course, user=user, rating=5)
+        self.assertEqual(self.get(url, etag).status_code, 200)
+
+    def test_a_course_write_leaves_other_course_entries_alone(self, *mocks):
+        detail = f"/api/courses/{self.course.pk}/"
+        related = f"/api/courses/{self.course.pk}/related/"
+        detail_etag, related_etag = self.get(detail)["ETag"], self.get(related)["ETag"]
+
+        self.other.title = "Go in practice"
+        self.write(self.other.save)
+
+        self.assertEqual(self.get(detail, detail_etag).status_code, 304)
+        # related lists include other courses, so they follow the catalog version
+        response = self.get(related, related_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c["title"] for c in response.json()], ["Go in practice"])
+
+    def test_deleting_a_lesson_invalidates_the_list(self, *mocks):
+        url = f"/api/courses/{self.course.pk}/lessons/"
+        etag = self.get(url)["ETag"]
+
+        self.write(self.lesson.delete)
+
+        response = self.get(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+
+    def test_rolled_back_writes_do_not_bump(self, *mocks):
+        before = cache.versions(self.course.pk, cache.CATALOG)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.course.title = "Never saved"
+                self.course.save()
+                raise RuntimeError
+
+        self.assertEqual(cache.versions(self.course.pk, cache.CATALOG), before)
+
+    def test_bulk_writes_bump_explicitly(self, *mocks):
+        before = cache.versions(self.course.pk, self.other.pk, cache.CATALOG)
+
+        self.write(cache.bump_courses, [self.course.pk])
+
+        after = cache.versions(self.course.pk, self.other.pk, cache.CATALOG)
+        self.assertNotEqual(after[0], before[0])
+        self.assertEqual(after[1:], before[1:])
+
+    def test_facets_follow_the_catalog_version(self, *mocks):
+        filters = facets.normalize({})
+        self.assertEqual({t["value"]: t["count"] for t in facets.facet_counts(filters)["category"]}, {"code": 2})
+        with self.assertNumQueries(0):
+            facets.facet_counts(filters)
+
+        self.write(Course.objects.create, title="Figma", description="UI", instructor="Cy", category="Design")
+
+        counts = {t["value"]: t["count"] for t in facets.facet_counts(filters)["category"]}
+        self.assertEqual(counts, {"code": 2, "design": 1})
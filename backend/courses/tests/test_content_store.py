@@ -0,0 +1,108 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from courses import content_store
+from courses.models import ContentBlob, Course, Lesson
+
+LONG = "Ownership moves values between bindings. " * 200
+
+
+class ContentStoreTests(TestCase):
+    def setUp(self):
+        content_store._cache.clear()
+        self.course = Course.objects.create(title="Rust", description="Systems", instructor="Ana")
+
+    def fresh(self, lesson):
+        content_store._cache.clear()
+        return Lesson.objects.get(pk=lesson.pk)
+
+    def test_save_round_trip_stores_shared_text_once(self):
+        lesson = Lesson.objects.create(course=self.course, title="Ownership", transcript=LONG, content=LONG)
+
+        self.assertEqual(ContentBlob.objects.count(), 1)
+        blob = ContentBlob.objects.get()
+        self.assertEqual(blob.digest, content_store.digest(LONG))
+        self.assertEqual(blob.size, len(LONG))
+        self.assertLess(len(blob.data), len(LONG))
+        loaded = self.fresh(lesson)
+        self.assertEqual(loaded.transcript, LONG)
+        self.assertEqual(loaded.content, LONG)
+
+    def test_identical_text_across_lessons_is_one_blob(self):
+        for i in range(3):
+            Lesson.objects.create(course=self.course, title=f"L{i}", transcript=LONG, content=f"notes {i} ü✓")
+
+        self.assertEqual(ContentBlob.objects.count(), 4)
+        self.assertEqual(self.fresh(Lesson.objects.get(title="L2")).content, "notes 2 ü✓")
+
+    def test_none_and_empty_text(self):
+        lesson = Lesson.objects.create(course=self.course, title="Blank", transcript="", content=None)
+
+        loaded = self.fresh(lesson)
+        self.assertEqual(loaded.transcript, "")
+        self.assertIsNone(loaded.content)
+        self.assertIsNone(loaded.content_blob_id)
+
+    def test_codecs_round_trip(self):
+        for text in (LONG, "short", "", "ünïcødé " * 50):
+            codec, data = content_store.encode(text)
+            self.assertEqual(content_store.decode(codec, data), text)
+        self.assertEqual(content_store.encode("short")[0], "raw")
+        with mock.patch.object(content_store, "zstandard", None):
+            codec, data = content_store.encode(LONG)
+        self.assertEqual(codec, "zlib")
+        self.assertEqual(content_store.decode(codec, memoryview(data)), LONG)
+
+    def test_save_with_update_fields_writes_the_new_blob(self):
+        lesson = Lesson.objects.create(course=self.course, title="Ownership", transcript="old text")
+        lesson.transcript = "new text"
+        lesson.save(update_fields=["transcript"])
+
+        self.assertEqual(self.fresh(lesson).transcript, "new text")
+
+    def test_bulk_create_and_bulk_update(self):
+        lessons = Lesson.objects.bulk_create([
+            Lesson(course=self.course, title=f"L{i}", order=i, transcript=f"transcript {i}", content=LONG)
+            for i in range(5)
+        ])
+        self.assertEqual(
+            [self.fresh(l).transcript for l in lessons], [f"transcript {i}" for i in range(5)],
+        )
+
+        for lesson in lessons:
+            lesson.transcript = lesson.transcript.upper()
+        Lesson.objects.bulk_update(lessons, ["transcript"])
+
+        self.assertEqual(
+            sorted(Lesson.objects.values_list("transcript_blob_id", flat=True)),
+            sorted(content_store.digest(f"TRANSCRIPT {i}") for i in range(5)),
+        )
+        self.assertEqual(self.fresh(lessons[3]).transcript, "TRANSCRIPT 3")
+        self.assertEqual(self.fresh(lessons[3]).content, LONG)
+
+    def test_prune_deletes_only_unreferenced_blobs(self):
+        lesson = Lesson.objects.create(course=self.course, title="Ownership", transcript="v1", content=LONG)
+        lesson.transcript = "v2"
+        lesson.save()
+
+        self.assertEqual(content_store.prune(), 1)
+        self.assertEqual(
+            set(ContentBlob.objects.values_list("digest", flat=True)),
+            {content_store.digest("v2"), content_store.digest(LONG)},
+        )
+
+    def test_load_texts_reads_a_list_in_one_query(self):
+        Lesson.objects.bulk_create([
+            Lesson(course=self.course, title=f"L{i}", order=i, transcript=f"transcript {i}", content=f"content {i}")
+            for i in range(20)
+        ])
+        content_store._cache.clear()
+        lessons = list(Lesson.objects.filter(course=self.course))
+
+        with self.assertNumQueries(1):
+            content_store.load_texts(lessons)
+        with self.assertNumQueries(0):
+            self.assertEqual([l.content for l in lessons], [f"content {i}" for i in range(20)])
+        with self.assertNumQueries(1):  # the lesson row; its texts come from the process cache
+            self.assertEqual(Lesson.objects.get(pk=lessons[4].pk).transcript, "transcript 4")
@@ -0,0 +1,39 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from courses import counters
+from courses.models import Course
+
+
+@mock.patch("courses.counters.course_viewed")  # keep the background writer out of the test
+class CounterFlushTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(title="Django", description="Web apps.")
+        self.other = Course.objects.create(title="SQL", description="Queries.", enrollment_count=3)
+
+    def flush(self, *events):
+        with self.captureOnCommitCallbacks(execute=True):
+            counters._writer._write(list(events))
+
+    def test_flush_leaves_cached_responses_alone(self, _):
+        detail = f"/api/courses/{self.course.id}/"
+        etag = self.client.get(detail)["ETag"]
+        self.assertNotIn("view_count", self.client.get(detail).json())
+
+        self.flush((self.course.id, 1, 0, 0.0), (self.course.id, 1, 1, 5.0))
+
+        self.assertEqual(self.client.get(detail, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        stats = self.client.get(f"/api/courses/{self.course.id}/stats/").json()
+        self.assertEqual(stats, {"view_count": 2, "enrollment_count": 1})
+
+    def test_stats_of_a_missing_course(self, _):
+        self.assertEqual(self.client.get("/api/courses/999999/stats/").status_code, 404)
+
+    def test_enrollment_count_never_goes_negative(self, _):
+        self.flush((self.course.id, 0, -1, 0.0), (self.other.id, 0, 1, 5.0))
+
+        self.course.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 0)
+        self.assertEqual(self.other.enrollment_count, 4)  # the other course's deltas still land
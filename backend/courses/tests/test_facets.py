@@ -0,0 +1,117 @@
+import random
+from decimal import Decimal
+
+from django.test import TestCase
+
+from courses import facets
+from courses.models import Course
+
+CATEGORIES = ["Programming", "programming", "Design", "Data Science", ""]
+LANGUAGES = ["English", "english", "Spanish", "Hindi", ""]
+TITLES = ["Python basics", "Advanced Django", "Color theory", "Statistics", "Rust for pythonistas"]
+
+
+def matches(course, filters, skip=None):
+    """The catalog filters, evaluated in Python on one course."""
+    q = filters["q"].lower()
+    return (
+        (skip == "category" or not filters["category"] or course.category.lower() == filters["category"])
+        and (skip == "level" or not filters["level"] or course.level == filters["level"])
+        and (skip == "language" or not filters["language"] or course.language.lower() == filters["language"])
+        and (skip == "min_rating" or filters["min_rating"] is None or course.rating_avg >= filters["min_rating"])
+        and (skip == "max_price" or filters["max_price"] is None or course.price <= Decimal(str(filters["max_price"])))
+        and (not q or any(q in text.lower() for text in (course.title, course.description, course.tags)))
+    )
+
+
+def brute_force(courses, filters):
+    out = {}
+    for dimension, attr in (("category", "category"), ("level", "level"), ("language", "language")):
+        counts = {}
+        for course in courses:
+            value = getattr(course, attr).lower() if attr != "level" else course.level
+            if value and matches(course, filters, skip=dimension):
+                counts[value] = counts.get(value, 0) + 1
+        out[dimension] = counts
+    out["min_rating"] = [
+        {"value": t, "count": sum(matches(c, {**filters, "min_rating": t}) for c in courses)}
+        for t in facets.RATING_THRESHOLDS
+    ]
+    out["max_price"] = [
+        {"value": t, "count": sum(matches(c, {**filters, "max_price": t}) for c in courses)}
+        for t in facets.PRICE_THRESHOLDS
+    ]
+    return out
+
+
+class FacetCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(43)
+        Course.objects.bulk_create([
+            Course(
+                title=f"{rng.choice(TITLES)} {i}",
+                description=rng.choice(["Learn by building", "Hands-on projects", "Theory first"]),
+                tags=rng.choice(["", "python,web", "stats", "ui,color"]),
+                category=rng.choice(CATEGORIES),
+                level=rng.choice([value for value, _ in Course.LEVEL_CHOICES]),
+                language=rng.choice(LANGUAGES),
+                rating_avg=rng.choice([0, 2.9, 3.0, 3.4, 3.5, 3.99, 4.0, 4.5, 4.8, 5.0]),
+                price=rng.choice([Decimal("0"), Decimal("9.99"), Decimal("20"), Decimal("20.01"), Decimal("50"),
+                                  Decimal("99.99"), Decimal("100"), Decimal("149")]),
+            )
+            for i in range(120)
+        ])
+        cls.courses = list(Course.objects.all())
+
+    def assert_matches_brute_force(self, params):
+        filters = facets.normalize(params)
+        got = facets.compute(filters)
+        expected = brute_force(self.courses, filters)
+
+        for dimension in ("category", "level", "language"):
+            terms = got[dimension]
+            self.assertEqual({t["value"]: t["count"] for t in terms}, expected[dimension], f"{dimension} {params}")
+            self.assertEqual(len(terms), len({t["value"] for t in terms}))
+            self.assertEqual([t["count"] for t in terms], sorted((t["count"] for t in terms), reverse=True))
+        self.assertEqual(got["min_rating"], expected["min_rating"], params)
+        self.assertEqual(got["max_price"], expected["max_price"], params)
+
+    def test_no_filters(self):
+        self.assert_matches_brute_force({})
+
+    def test_single_filters(self):
+        for params in (
+            {"category": "Programming"}, {"category": "PROGRAMMING "}, {"level": "advanced"},
+            {"language": "english"}, {"min_rating": "3.5"}, {"min_rating": "4.25"}, {"max_price": "20"},
+            {"max_price": "75"}, {"max_price": "0"}, {"q": "python"}, {"q": "THEORY"},
+        ):
+            with self.subTest(params=params):
+                self.assert_matches_brute_force(params)
+
+    def test_random_filter_combinations(self):
+        rng = random.Random(4300)
+        for _ in range(40):
+            params = {
+                "category": rng.choice(["", "programming", "Design", "data science"]),
+                "level": rng.choice(["", "beginner", "intermediate", "advanced"]),
+                "language": rng.choice(["", "English", "spanish"]),
+                "min_rating": rng.choice(["", "3", "3.5", "4", "4.9"]),
+                "max_price": rng.choice(["", "0", "20", "50", "120"]),
+                "q": rng.choice(["", "", "python", "projects", "stats"]),
+            }
+            with self.subTest(params=params):
+                self.assert_matches_brute_force(params)
+
+    def test_counts_agree_with_the_filtered_list(self):
+        # picking a facet value must yield as many courses as the facet promised
+        filters = facets.normalize({"level": "beginner", "max_price": "50"})
+        for term in facets.compute(filters)["category"]:
+            listed = facets.apply(Course.objects.all(), {**filters, "category": term["value"]}).count()
+            self.assertEqual(listed, term["count"], term)
+
+    def test_labels_keep_the_stored_spelling(self):
+        labels = {t["value"]: t["label"] for t in facets.compute(facets.normalize({}))["category"]}
+
+        self.assertEqual(labels["programming"], "Programming")  # Min() of "Programming" / "programming"
+        self.assertEqual(labels["data science"], "Data Science")
@@ -0,0 +1,41 @@
+from django.contrib.auth.models import User
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from courses import history
+from courses.models import Course, RecentView
+
+
+class HistoryWriterTests(TransactionTestCase):
+    # deferred foreign keys are only checked on commit, so this can't run inside TestCase's transaction
+
+    def test_views_of_deleted_rows_do_not_drop_the_batch(self):
+        alice = User.objects.create_user("alice")
+        bob = User.objects.create_user("bob")
+        kept = Course.objects.create(title="Kept", description="")
+        gone = Course.objects.create(title="Gone", description="")
+        gone_id, bob_id = gone.id, bob.id
+        gone.delete()
+        bob.delete()
+        now = timezone.now()
+
+        with self.assertLogs("courses.history", "WARNING") as logs:
+            history._writer._write([
+                (alice.id, kept.id, now),
+                (alice.id, gone_id, now),
+                (bob_id, kept.id, now),
+            ])
+
+        self.assertEqual(list(RecentView.objects.values_list("user_id", "course_id")), [(alice.id, kept.id)])
+        self.assertIn("dropped 2 recent views", logs.output[0])
+
+    def test_upsert_keeps_the_latest_view(self):
+        alice = User.objects.create_user("alice")
+        course = Course.objects.create(title="Django", description="")
+        first = timezone.now()
+        later = first + timezone.timedelta(minutes=5)
+
+        history._writer._write([(alice.id, course.id, first)])
+        history._writer._write([(alice.id, course.id, later), (alice.id, course.id, first)])
+
+        self.assertEqual(RecentView.objects.get().viewed_at, later)
@@ -43,16 +43,17 @@ def create_quiz():
         print(f"Created quiz: {quiz.title}")
         
         # Q1
-        q1 = Question.objects.create(quiz=quiz, text="What is Django?")
-        Choice.objects.create(question=q1, text="A web framework", is_correct=True)
-        Choice.objects.create(question=q1, text="A database", is_correct=False)
-        Choice.objects.create(question=q1, text="A programming language", is_correct=False)
-        
+        q1 = Question.objects.create(quiz=quiz, text="What is Django?", order=1)
         # Q2
-        q2 = Question.objects.create(quiz=quiz, text="Which file is used for URL routing?")
-        Choice.objects.create(question=q2, text="models.py", is_correct=False)
-        Choice.objects.create(question=q2, text="views.py", is_correct=False)
-        Choice.objects.create(question=q2, text="urls.py", is_correct=True)
+        q2 = Question.objects.create(quiz=quiz, text="Which file is used for URL routing?", order=2)
+        Choice.objects.bulk_create([
+            Choice(question=q1, text="A web framework", is_correct=True),
+            Choice(question=q1, text="A database", is_correct=False),
+            Choice(question=q1, text="A programming language", is_correct=False),
+            Choice(question=q2, text="models.py", is_correct=False),
+            Choice(question=q2, text="views.py", is_correct=False),
+            Choice(question=q2, text="urls.py", is_correct=True),
+        ])
         
         print("Added questions.")
     else:
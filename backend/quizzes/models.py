@@ -19,6 +19,9 @@ class Question(models.Model):
 
     class Meta:
         ordering = ["order"]
+        indexes = [
+            models.Index(fields=["quiz", "order"], name="question_quiz_order_idx"),
+        ]
 
     def __str__(self):
         return f"Q{self.order}: {self.text[:60]}"
@@ -40,5 +43,10 @@ class Attempt(models.Model):
     started_at = models.DateTimeField(auto_now_add=True)
     finished_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "quiz", "-started_at"], name="attempt_user_quiz_idx"),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.quiz.title} - {self.score}"
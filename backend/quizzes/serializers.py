@@ -1,31 +1,33 @@
 from rest_framework import serializers
+
+from config.serializers import TimedModelSerializer
 from .models import Quiz, Question, Choice, Attempt
 
-class ChoiceSerializer(serializers.ModelSerializer):
+class ChoiceSerializer(TimedModelSerializer):
     class Meta:
         model = Choice
         fields = ["id", "text"]
 
-class QuestionSerializer(serializers.ModelSerializer):
+class QuestionSerializer(TimedModelSerializer):
     choices = ChoiceSerializer(many=True, read_only=True)
     class Meta:
         model = Question
         fields = ["id", "text", "order", "choices"]
 
-class QuizListSerializer(serializers.ModelSerializer):
+class QuizListSerializer(TimedModelSerializer):
     questions_count = serializers.IntegerField(source='questions.count', read_only=True)
 
     class Meta:
         model = Quiz
         fields = ["id", "title", "description", "time_limit_minutes", "questions_count"]
 
-class QuizDetailSerializer(serializers.ModelSerializer):
+class QuizDetailSerializer(TimedModelSerializer):
     questions = QuestionSerializer(many=True, read_only=True)
     class Meta:
         model = Quiz
         fields = ["id", "title", "description", "time_limit_minutes", "questions"]
 
-class AttemptSerializer(serializers.ModelSerializer):
+class AttemptSerializer(TimedModelSerializer):
     class Meta:
         model = Attempt
         fields = ["id", "user", "quiz", "score", "started_at", "finished_at"]
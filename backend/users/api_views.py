@@ -4,8 +4,11 @@ from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth.models import User
+from django.shortcuts import get_object_or_404
 from datetime import datetime
 
+from . import revocation
+from .models import Profile
 from .serializers import UserSerializer, ProfileSerializer
 from .forms import ContactForm
 
@@ -31,7 +34,11 @@ class ProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return self.request.user.profile
+        # with claims auth the token names the profile: one query for it and its user
+        profile_id = getattr(self.request.user, "profile_id", None)
+        if profile_id is None:
+            return self.request.user.profile
+        return get_object_or_404(Profile.objects.select_related("user"), pk=profile_id, user_id=self.request.user.pk)
 
 
 # LOGOUT (BLACKLIST REFRESH TOKEN)
@@ -54,6 +61,9 @@ class LogoutView(APIView):
                 {"detail": "Invalid token."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        # the access token would otherwise stay valid until it expires
+        if request.auth is not None:
+            revocation.revoke_token(request.auth)
 
         return Response({"detail": "Logout successful."}, status=200)
 
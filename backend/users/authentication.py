@@ -0,0 +1,106 @@
+"""JWT authentication from token claims.
+
+simplejwt's JWTAuthentication loads the User row on every authenticated
+request. Most requests only need the user's id: progress heartbeats, notes,
+enrollment checks. ClaimsJWTAuthentication builds the user from the access
+token instead (users/tokens.py puts the claims there). The result is a
+ClaimsUser: its id, username and flags come from the token and its other
+fields are deferred. The first deferred read loads the full row, which is
+kept for JWT_USER_CACHE_SECONDS (default 30) in a per-process cache.
+
+Since no row is read, a deleted, deactivated or demoted user would keep
+access until the token expires. users/revocation.py covers that with a
+cached deny-list, checked on every request in both modes.
+
+JWT_CLAIMS_AUTH=False goes back to loading the user row per request. Tokens
+issued before the claims existed are handled the same way until they expire.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from . import revocation
+from .models import ClaimsUser
+from .tokens import CLAIMS
+
+
+class _UserCache:
+    """Full User rows by id for JWT_USER_CACHE_SECONDS, at most JWT_USER_CACHE_SIZE of them (LRU)."""
+
+    def __init__(self):
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            item = self._items.get(user_id)
+            if item is None or item[0] < time.monotonic():
+                return None
+            self._items.move_to_end(user_id)
+            return item[1]
+
+    def put(self, user_id, user):
+        ttl = float(getattr(settings, "JWT_USER_CACHE_SECONDS", 30))
+        size = int(getattr(settings, "JWT_USER_CACHE_SIZE", 10_000))
+        with self._lock:
+            self._items[user_id] = (time.monotonic() + ttl, user)
+            self._items.move_to_end(user_id)
+            while len(self._items) > size:
+                self._items.popitem(last=False)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._items.pop(user_id, None)
+
+
+_users = _UserCache()
+
+
+def full_user(user_id):
+    """The User row for ``user_id``, from the cache when it is fresh enough."""
+    user = _users.get(user_id)
+    if user is None:
+        user = User.objects.get(pk=user_id)
+        _users.put(user_id, user)
+    return user
+
+
+def forget_user(user_id):
+    _users.discard(user_id)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if revocation.is_revoked(validated_token.payload):
+            raise AuthenticationFailed("Token has been revoked.", code="token_revoked")
+        if not getattr(settings, "JWT_CLAIMS_AUTH", True) or any(c not in validated_token for c in CLAIMS):
+            return super().get_user(validated_token)
+        try:
+            # simplejwt writes the id as a string
+            user_id = ClaimsUser._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError as e:
+            raise InvalidToken("Token contained no recognizable user identification") from e
+        user = ClaimsUser.from_claims(
+            user_id, validated_token["username"], bool(validated_token["is_staff"]),
+            bool(validated_token["is_superuser"]),
+        )
+        user.role = validated_token["role"]
+        user.profile_id = validated_token["profile_id"]
+        return user
+
+
+class OptionalJWTAuthentication(ClaimsJWTAuthentication):
+    """JWT auth for public endpoints: a missing, expired or invalid token
+    yields an anonymous request instead of a 401."""
+
+    def authenticate(self, request):
+        try:
+            return super().authenticate(request)
+        except (InvalidToken, AuthenticationFailed):
+            return None
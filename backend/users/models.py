@@ -6,6 +6,7 @@ class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     bio = models.TextField(blank=True)
     avatar = models.ImageField(upload_to='avatars/', null=True, blank=True)
+    avatar_variants = models.JSONField(default=dict, blank=True)  # resized copies, see config/images.py
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='student')
     created_at = models.DateTimeField(auto_now_add=True)
     def __str__(self): return self.user.username
@@ -19,3 +20,46 @@ class ContactMessage(models.Model):
 
     def __str__(self):
         return f"{self.name} - {self.subject}"
+
+
+class ClaimsUser(User):
+    """A User built from access-token claims instead of a database row (users/authentication.py).
+
+    id, username, is_staff, is_superuser and is_active come from the token;
+    the other fields are deferred. Reading one loads the whole row at once,
+    through a short-lived per-process cache. ``role`` and ``profile_id`` are
+    plain attributes taken from the token too.
+    """
+
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_claims(cls, user_id, username, is_staff, is_superuser):
+        # is_active: deactivating a user revokes their tokens (users/signals.py)
+        loaded = {"id": user_id, "username": username, "is_staff": is_staff, "is_superuser": is_superuser, "is_active": True}
+        # from_db() expects the values in the model's field order, whatever the order of field_names
+        names = [f.attname for f in cls._meta.concrete_fields if f.attname in loaded]
+        return cls.from_db("default", names, [loaded[name] for name in names])
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred = self.get_deferred_fields()
+        if fields is None or not set(fields) <= deferred:
+            return super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        from .authentication import full_user
+
+        row = full_user(self.pk)
+        for field in self._meta.concrete_fields:
+            if field.attname in deferred:
+                setattr(self, field.attname, getattr(row, field.attname))
+
+
+class RevokedToken(models.Model):
+    """Deny-list entry: one access token (``jti``), or every token of ``user_id`` issued before ``revoked_at``."""
+    jti = models.CharField(max_length=255, blank=True, db_index=True)
+    user_id = models.BigIntegerField(null=True, blank=True)  # not a foreign key: must outlive a deleted user
+    revoked_at = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)  # no token it covers is valid after this
+
+    def __str__(self):
+        return self.jti or f"all tokens of user {self.user_id} before {self.revoked_at}"
@@ -0,0 +1,93 @@
+"""Deny-list for JWTs that must stop working before they expire.
+
+Access tokens are checked without loading the user, so logging out,
+deactivating an account or an admin's "sign out everywhere" must be
+recorded somewhere. Entries are RevokedToken rows: one token by ``jti``, or
+all tokens of a user issued before a point in time. A row is only kept until
+the latest token it covers would have expired anyway; every revocation
+prunes the expired ones, so the table stays small.
+
+Each process keeps the live entries in memory and reloads them every
+JWT_DENYLIST_REFRESH_SECONDS (default 5): one query per interval rather than
+one per request. Revocations made in the same process apply at once; other
+processes pick them up within the interval.
+"""
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import RevokedToken
+
+
+def _refresh_seconds():
+    return float(getattr(settings, "JWT_DENYLIST_REFRESH_SECONDS", 5))
+
+
+class _DenyList:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jtis = frozenset()
+        self._users = {}  # str(user id), as in the token -> revoked_at (epoch seconds)
+        self._loaded_at = None
+
+    def snapshot(self):
+        now = time.monotonic()
+        if self._loaded_at is None or now - self._loaded_at >= _refresh_seconds():
+            with self._lock:
+                if self._loaded_at is None or now - self._loaded_at >= _refresh_seconds():
+                    self._load()
+                    self._loaded_at = now
+        return self._jtis, self._users
+
+    def _load(self):
+        jtis, users = set(), {}
+        rows = RevokedToken.objects.filter(expires_at__gt=timezone.now()).values_list("jti", "user_id", "revoked_at")
+        for jti, user_id, revoked_at in rows:
+            if jti:
+                jtis.add(jti)
+            elif user_id is not None:
+                key = str(user_id)
+                users[key] = max(users.get(key, 0), revoked_at.timestamp())
+        self._jtis, self._users = frozenset(jtis), users
+
+    def invalidate(self):
+        self._loaded_at = None
+
+
+_denylist = _DenyList()
+
+
+def is_revoked(payload):
+    jtis, users = _denylist.snapshot()
+    if payload.get(api_settings.JTI_CLAIM) in jtis:
+        return True
+    revoked_at = users.get(str(payload.get(api_settings.USER_ID_CLAIM)))
+    return revoked_at is not None and payload.get("iat", 0) <= revoked_at
+
+
+def revoke_token(token):
+    """Deny one token (e.g. the access token of a logout) until it expires."""
+    expires_at = datetime.fromtimestamp(token["exp"], tz=dt_timezone.utc)
+    prune()
+    RevokedToken.objects.create(jti=token[api_settings.JTI_CLAIM], revoked_at=timezone.now(), expires_at=expires_at)
+    _denylist.invalidate()
+
+
+def revoke_user(user_id):
+    """Deny every token issued to ``user_id`` so far, access and refresh alike."""
+    now = timezone.now()
+    lifetime = max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME)
+    prune()
+    # ``iat`` has one-second resolution, so a token issued later within this same second is denied too
+    RevokedToken.objects.create(user_id=user_id, revoked_at=now, expires_at=now + lifetime)
+    _denylist.invalidate()
+
+
+def prune():
+    """Delete entries whose tokens have all expired. Returns the number deleted."""
+    deleted, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -1,8 +1,11 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+
+from config import images
+from config.serializers import TimedModelSerializer
 from .models import Profile
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedModelSerializer):
     password = serializers.CharField(write_only=True)
 
     class Meta:
@@ -17,11 +20,16 @@ class UserSerializer(serializers.ModelSerializer):
         )
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(TimedModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
     email = serializers.EmailField(source='user.email', read_only=True)
+    avatar_variants = serializers.SerializerMethodField()
+
+    def get_avatar_variants(self, obj):
+        # {} until the background worker has resized a new upload
+        return images.variant_urls(obj, "avatar", self.context.get("request"))
 
     class Meta:
         model = Profile
-        fields = ["id", "username", "email", "avatar", "bio", "role"]
+        fields = ["id", "username", "email", "avatar", "avatar_variants", "bio", "role"]
 
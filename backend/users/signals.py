@@ -1,9 +1,60 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
+
+from config import images
+from . import revocation
+from .authentication import forget_user
 from .models import Profile
 
 @receiver(post_save, sender=User)
 def create_profile(sender, instance, created, **kwargs):
     if created:
         Profile.objects.create(user=instance)
+
+
+@receiver(post_save, sender=Profile)
+def avatar_changed(sender, instance, **kwargs):
+    if images.needs_refresh(instance, "avatar"):
+        images.schedule(images.refresh, Profile, instance.pk, "avatar", True)
+
+
+# access tokens carry these flags (users/tokens.py): losing one must end the sessions that still claim it
+PRIVILEGE_FIELDS = ("is_active", "is_staff", "is_superuser")
+
+
+def _saves_any(update_fields, names):
+    return update_fields is None or bool(set(update_fields) & set(names))
+
+
+@receiver(pre_save, sender=User)
+def remember_privileges(sender, instance, update_fields=None, **kwargs):
+    if instance.pk is not None and _saves_any(update_fields, PRIVILEGE_FIELDS):
+        instance._saved_privileges = User.objects.filter(pk=instance.pk).values(*PRIVILEGE_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, **kwargs):
+    forget_user(instance.pk)
+    before = instance.__dict__.pop("_saved_privileges", None)
+    if before and any(before[f] and not getattr(instance, f) for f in PRIVILEGE_FIELDS):
+        revocation.revoke_user(instance.pk)
+
+
+@receiver(pre_save, sender=Profile)
+def remember_role(sender, instance, update_fields=None, **kwargs):
+    if instance.pk is not None and _saves_any(update_fields, ("role",)):
+        instance._saved_role = Profile.objects.filter(pk=instance.pk).values_list("role", flat=True).first()
+
+
+@receiver(post_save, sender=Profile)
+def role_changed(sender, instance, **kwargs):
+    # a new role reaches the token at the next refresh; losing instructor can't wait that long
+    if instance.__dict__.pop("_saved_role", None) == "instructor" and instance.role != "instructor":
+        revocation.revoke_user(instance.user_id)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    forget_user(instance.pk)
+    revocation.revoke_user(instance.pk)
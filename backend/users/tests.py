@@ -0,0 +1,178 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient, APIRequestFactory
+
+from courses.certificates import display_name
+
+from . import revocation
+from .authentication import ClaimsJWTAuthentication, _users
+from .models import ClaimsUser
+from .tokens import ClaimsRefreshToken
+
+
+class ClaimsAuthTestCase(TestCase):
+    def setUp(self):
+        revocation._denylist.invalidate()
+        _users._items.clear()
+        self.client = APIClient()
+
+    def login(self, username, password="pw-12345!"):
+        response = self.client.post("/api/auth/token/", {"username": username, "password": password}, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def authenticate(self, access):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {access}")
+        user, _ = ClaimsJWTAuthentication().authenticate(request)
+        return user
+
+    def get_me(self, access):
+        return self.client.get("/api/auth/me/", HTTP_AUTHORIZATION=f"Bearer {access}")
+
+
+class ClaimsUserTests(ClaimsAuthTestCase):
+    def test_user_built_from_claims_has_the_right_fields(self):
+        bob = User.objects.create_user("bob", "bob@example.com", "pw-12345!", first_name="Bob", last_name="Ray")
+        user = self.authenticate(self.login("bob")["access"])
+
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual(user.pk, bob.pk)
+        self.assertEqual(user.username, "bob")
+        self.assertIs(user.is_staff, False)
+        self.assertIs(user.is_superuser, False)
+        self.assertIs(user.is_active, True)
+        self.assertFalse(user.has_perm("auth.delete_user"))
+        self.assertEqual(user.profile_id, bob.profile.pk)
+        self.assertEqual(user.role, "student")
+
+    def test_staff_flag_comes_through_without_superuser(self):
+        User.objects.create_user("staff", "s@example.com", "pw-12345!", is_staff=True)
+        user = self.authenticate(self.login("staff")["access"])
+
+        self.assertIs(user.is_staff, True)
+        self.assertIs(user.is_superuser, False)
+        self.assertFalse(user.has_perm("auth.delete_user"))
+
+    def test_no_user_query_until_a_deferred_field_is_read(self):
+        User.objects.create_user("carol", "carol@example.com", "pw-12345!", first_name="Carol", last_name="Ng")
+        access = self.login("carol")["access"]
+        revocation._denylist.snapshot()  # loaded once per interval, not per request
+
+        with self.assertNumQueries(0):
+            user = self.authenticate(access)
+            self.assertEqual(user.username, "carol")
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, "carol@example.com")
+            self.assertEqual(display_name(user), "Carol Ng")
+
+    def test_me_endpoint(self):
+        User.objects.create_user("dave", "dave@example.com", "pw-12345!")
+        response = self.get_me(self.login("dave")["access"])
+
+        self.assertEqual(response.json(), {"username": "dave", "email": "dave@example.com"})
+
+    def test_profile_view_reads_profile_by_claim(self):
+        User.objects.create_user("erin", "erin@example.com", "pw-12345!")
+        access = self.login("erin")["access"]
+
+        response = self.client.get("/api/auth/profile/", HTTP_AUTHORIZATION=f"Bearer {access}")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["username"], "erin")
+        self.assertEqual(response.json()["email"], "erin@example.com")
+
+    def test_refresh_reissues_current_claims(self):
+        frank = User.objects.create_user("frank", "f@example.com", "pw-12345!")
+        tokens = self.login("frank")
+        frank.profile.role = "instructor"
+        frank.profile.save()
+
+        response = self.client.post("/api/auth/refresh/", {"refresh": tokens["refresh"]}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.authenticate(response.json()["access"]).role, "instructor")
+
+    @override_settings(JWT_CLAIMS_AUTH=False)
+    def test_database_mode_returns_the_row(self):
+        User.objects.create_user("gina", "g@example.com", "pw-12345!")
+        user = self.authenticate(self.login("gina")["access"])
+
+        self.assertNotIsInstance(user, ClaimsUser)
+        self.assertEqual(user.username, "gina")
+
+
+class RevocationTests(ClaimsAuthTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user("hank", "h@example.com", "pw-12345!")
+
+    def test_logout_revokes_the_access_token(self):
+        tokens = self.login("hank")
+
+        response = self.client.post(
+            "/api/auth/logout/", {"refresh": tokens["refresh"]}, format="json",
+            HTTP_AUTHORIZATION=f"Bearer {tokens['access']}",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_me(tokens["access"]).status_code, 401)
+
+    def test_deactivation_revokes_access_and_refresh(self):
+        tokens = self.login("hank")
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.get_me(tokens["access"]).status_code, 401)
+        response = self.client.post("/api/auth/refresh/", {"refresh": tokens["refresh"]}, format="json")
+        self.assertEqual(response.status_code, 401)
+
+    def test_losing_staff_revokes(self):
+        self.user.is_staff = True
+        self.user.save()
+        access = self.login("hank")["access"]
+        self.assertEqual(self.get_me(access).status_code, 200)
+
+        self.user.is_staff = False
+        self.user.save()
+
+        self.assertEqual(self.get_me(access).status_code, 401)
+
+    def test_losing_instructor_role_revokes(self):
+        profile = self.user.profile
+        profile.role = "instructor"
+        profile.save()
+        access = self.login("hank")["access"]
+
+        profile.role = "student"
+        profile.save()
+
+        self.assertEqual(self.get_me(access).status_code, 401)
+
+    def test_unrelated_saves_keep_sessions(self):
+        access = self.login("hank")["access"]
+        self.user.first_name = "Hank"
+        self.user.save()
+        self.user.profile.bio = "hi"
+        self.user.profile.save()
+
+        self.assertEqual(self.get_me(access).status_code, 200)
+
+    def test_deleted_user_is_revoked(self):
+        access = self.login("hank")["access"]
+        self.user.delete()
+
+        self.assertEqual(self.get_me(access).status_code, 401)
+
+    def test_revocation_reaches_other_processes_after_reload(self):
+        access = self.login("hank")["access"]
+        self.assertEqual(self.get_me(access).status_code, 200)
+        # as if another process revoked: the row exists but this process's snapshot is older
+        revocation.RevokedToken.objects.create(
+            user_id=self.user.pk, revoked_at=revocation.timezone.now(),
+            expires_at=revocation.timezone.now() + ClaimsRefreshToken.lifetime,
+        )
+        self.assertEqual(self.get_me(access).status_code, 200)
+
+        revocation._denylist.invalidate()  # the reload interval passing
+
+        self.assertEqual(self.get_me(access).status_code, 401)
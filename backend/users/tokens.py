@@ -0,0 +1,63 @@
+"""JWTs that carry enough of the user for ClaimsJWTAuthentication.
+
+Access tokens get ``username``, ``role``, ``profile_id``, ``is_staff`` and
+``is_superuser`` claims next to ``user_id``. They are read from the
+database when a token pair is issued and again on every refresh, so a
+new role or a promotion shows up at the next refresh at the latest. Losing
+a privilege can't wait that long: dropping is_staff, is_superuser,
+is_active or the instructor role revokes the user's tokens instead
+(users/signals.py). Changes made with ``queryset.update()`` send no signals
+and must call ``revocation.revoke_user()`` themselves.
+"""
+from django.contrib.auth.models import User
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import revocation
+
+CLAIMS = ("username", "role", "profile_id", "is_staff", "is_superuser")
+
+
+def claims_for(user):
+    profile = getattr(user, "profile", None)
+    return {
+        "username": user.username,
+        "role": getattr(profile, "role", None),
+        "profile_id": getattr(profile, "pk", None),
+        "is_staff": user.is_staff,
+        "is_superuser": user.is_superuser,
+    }
+
+
+class ClaimsRefreshToken(RefreshToken):
+    def verify(self):
+        super().verify()
+        if revocation.is_revoked(self.payload):
+            raise TokenError("Token has been revoked")
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.user = user  # saves a lookup when the access token is derived right away
+        return token
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        user = getattr(self, "user", None)
+        if user is None:
+            user = User.objects.select_related("profile").filter(pk=self[api_settings.USER_ID_CLAIM]).first()
+        if user is not None:
+            for claim, value in claims_for(user).items():
+                access[claim] = value
+        return access
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = ClaimsRefreshToken
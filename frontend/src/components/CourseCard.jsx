@@ -5,10 +5,21 @@ export default function CourseCard({ course }) {
     <Link to={`/courses/${course.id}`} className="block h-full">
       <div className="card h-full flex flex-col group cursor-pointer hover:shadow-xl transition rounded-2xl overflow-hidden">
         <div className="relative overflow-hidden">
-          {course.thumbnail ? (
+          {course.thumbnail_variants?.["256"] ? (
+            <picture>
+              <source srcSet={course.thumbnail_variants["256"].webp} type="image/webp" />
+              <img
+                src={course.thumbnail_variants["256"].jpeg}
+                alt={course.title}
+                loading="lazy"
+                className="w-full h-40 object-cover transition-transform duration-300 group-hover:scale-105"
+              />
+            </picture>
+          ) : course.thumbnail ? (
             <img
               src={course.thumbnail}
               alt={course.title}
+              loading="lazy"
               className="w-full h-40 object-cover transition-transform duration-300 group-hover:scale-105"
             />
           ) : (
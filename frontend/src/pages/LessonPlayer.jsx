@@ -104,7 +104,7 @@ export default function LessonPlayer() {
             {(lesson.video_url || lesson.videoUrl) ? (
               <div className="bg-black aspect-video relative group">
                 {String(lesson.video_url||lesson.videoUrl).endsWith('.mp4') ? (
-                  <video ref={videoRef} src={lesson.video_url || lesson.videoUrl} className="w-full h-full object-contain" controls />
+                  <video ref={videoRef} src={lesson.video_url || lesson.videoUrl} poster={lesson.thumbnail || undefined} className="w-full h-full object-contain" controls />
                 ) : (
                   <iframe className="w-full h-full" src={lesson.video_url || lesson.videoUrl} title="Lesson Video" allowFullScreen></iframe>
                 )}
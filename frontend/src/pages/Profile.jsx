@@ -87,7 +87,7 @@ export default function Profile() {
               <div className="w-full md:w-1/3 flex flex-col items-center">
                 <div className="w-32 h-32 rounded-full bg-slate-200 overflow-hidden mb-4 border-4 border-white shadow-lg">
                   {profile?.avatar ? (
-                    <img src={profile.avatar} alt="Avatar" className="w-full h-full object-cover" />
+                    <img src={profile.avatar_variants?.["256"]?.webp || profile.avatar} alt="Avatar" className="w-full h-full object-cover" />
                   ) : (
                     <div className="w-full h-full flex items-center justify-center text-4xl text-slate-400 bg-slate-100">
                       {profile?.username?.[0]?.toUpperCase()}